@@ -3,12 +3,23 @@
 🚀 FINAL DATABASE SETUP SCRIPT
 Face Recognition Attendance System
 This script will setup your complete database with ONE command
+
+Generator mode bulk-loads a synthetic test-scale dataset (persons, primary
+face encodings and a year of attendance) for query-plan and export testing:
+
+    python FINAL_setup_database.py --generate --persons 20000 --days 365
+    python FINAL_setup_database.py --generate --skip-setup --method infile
 """
 
+import argparse
+import json
 import mysql.connector
+import random
 import sys
 import os
-from datetime import datetime
+import tempfile
+import time
+from datetime import datetime, date, timedelta
 
 # ===================================================================
 # DATABASE CONFIGURATION
@@ -73,6 +84,234 @@ def setup_complete_database():
         print(f"❌ Script Error: {e}")
         return False
 
+# ===================================================================
+# SYNTHETIC DATA GENERATOR
+# ===================================================================
+GENERATOR_CONFIG = {
+    'persons': 10000,
+    'days': 365,              # Calendar days of attendance ending yesterday (weekdays only)
+    'dim': 512,               # ArcFace embedding size
+    'attendance_rate': 0.92,  # Share of persons present on a working day
+    'batch_size': 2000,       # Rows per multi-row INSERT / per commit
+    'method': 'multirow',     # 'multirow' (executemany multi-row INSERTs) or 'infile' (LOAD DATA LOCAL INFILE)
+    'seed': 42,
+}
+
+DEPARTMENTS = ['Engineering', 'Human Resources', 'Marketing', 'Sales', 'Finance', 'Operations', 'IT Support']
+POSITIONS = ['Staff', 'Senior Staff', 'Team Lead', 'Manager', 'Specialist']
+
+GENERATED_TABLES = ('persons', 'face_encodings', 'attendance_records')
+
+PERSON_COLUMNS = ('id', 'employee_id', 'name', 'email', 'department', 'position', 'hire_date', 'status')
+ENCODING_COLUMNS = ('person_id', 'encoding_data', 'confidence_score', 'is_primary', 'is_active', 'quality_score')
+ATTENDANCE_COLUMNS = ('person_id', 'check_in_time', 'check_out_time', 'date', 'status',
+                      'total_hours', 'overtime_hours', 'confidence_score')
+
+def generate_persons(first_id, count, rnd):
+    today = date.today()
+    for person_id in range(first_id, first_id + count):
+        yield (person_id, f"GEN{person_id:07d}", f"Synthetic Person {person_id}",
+               f"synthetic.{person_id}@example.com", DEPARTMENTS[person_id % len(DEPARTMENTS)],
+               rnd.choice(POSITIONS), today - timedelta(days=rnd.randint(30, 3650)), 'active')
+
+def generate_encodings(first_id, count, dim, seed, chunk=1000):
+    """One random unit-length primary embedding per person, generated in chunks"""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    for offset in range(0, count, chunk):
+        vectors = rng.standard_normal((min(chunk, count - offset), dim)).astype(np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        for i, vector in enumerate(vectors.round(6).tolist()):
+            yield (first_id + offset + i, json.dumps(vector), 0.99, 1, 1, 0.9)
+
+# Attendance rules the generated statuses follow, overridden by system_settings (see load_attendance_rules)
+ATTENDANCE_RULES = {
+    'default_on_time_start': '08:00:00',
+    'default_on_time_end': '09:30:00',
+    'overtime_threshold': '8.0',
+}
+
+def load_attendance_rules(cursor):
+    """On-time window and overtime threshold as the backend's attendance calendar reads them"""
+    cursor.execute("SELECT setting_key, setting_value FROM system_settings WHERE setting_key IN (%s, %s, %s)",
+                   tuple(ATTENDANCE_RULES))
+    values = {**ATTENDANCE_RULES, **{key: value for key, value in cursor.fetchall() if value is not None}}
+    return {
+        'on_time_start': datetime.strptime(values['default_on_time_start'], '%H:%M:%S').time(),
+        'on_time_end': datetime.strptime(values['default_on_time_end'], '%H:%M:%S').time(),
+        'overtime_threshold': float(values['overtime_threshold']),
+    }
+
+def generate_attendance(first_id, count, days, rate, rules, rnd):
+    """Weekday check-ins between 08:00 and 10:00 with 6-10 hour shifts, ending yesterday.
+
+    Statuses follow the seeded settings: overtime past overtime_threshold hours,
+    otherwise late when checking in outside the default on-time window.
+    """
+    end_date = date.today() - timedelta(days=1)
+    overtime_threshold = rules['overtime_threshold']
+    for day_offset in range(days - 1, -1, -1):
+        day = end_date - timedelta(days=day_offset)
+        if day.weekday() >= 5:
+            continue
+        start_of_day = datetime.combine(day, datetime.min.time())
+        for person_id in range(first_id, first_id + count):
+            if rnd.random() > rate:
+                continue
+            check_in = start_of_day + timedelta(hours=8, minutes=rnd.randint(0, 120))
+            check_out = check_in + timedelta(minutes=rnd.randint(6 * 60, 10 * 60))
+            hours = round((check_out - check_in).total_seconds() / 3600, 2)
+            if hours > overtime_threshold:
+                status = 'overtime'
+            elif not rules['on_time_start'] <= check_in.time() <= rules['on_time_end']:
+                status = 'late'
+            else:
+                status = 'present'
+            yield (person_id, check_in, check_out, day, status, hours, max(0.0, round(hours - overtime_threshold, 2)),
+                   round(rnd.uniform(0.6, 0.99), 3))
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def load_multirow(conn, cursor, table, columns, rows, batch_size):
+    """executemany on an INSERT is sent as one multi-row INSERT per batch by mysql.connector"""
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+    total = 0
+    for batch in _batches(rows, batch_size):
+        cursor.executemany(query, batch)
+        conn.commit()
+        total += len(batch)
+    return total
+
+def _infile_value(value):
+    if value is None:
+        return '\\N'
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    text = str(value)
+    return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n')
+
+def load_infile(conn, cursor, table, columns, rows, batch_size):
+    """Stream rows to a tab-separated file and load it with one LOAD DATA LOCAL INFILE"""
+    total = 0
+    with tempfile.NamedTemporaryFile('w', suffix=f'_{table}.tsv', encoding='utf-8', delete=False) as f:
+        path = f.name
+        for row in rows:
+            f.write('\t'.join(_infile_value(value) for value in row) + '\n')
+            total += 1
+    try:
+        cursor.execute(
+            f"LOAD DATA LOCAL INFILE '{path.replace(os.sep, '/')}' INTO TABLE {table} CHARACTER SET utf8mb4 "
+            f"FIELDS TERMINATED BY '\\t' LINES TERMINATED BY '\\n' ({', '.join(columns)})")
+        conn.commit()
+    finally:
+        os.remove(path)
+    return total
+
+def drop_secondary_indexes(cursor, table):
+    """Drop non-unique secondary indexes before the load; returns their definitions for rebuild.
+
+    Indexes a foreign key depends on are kept (MySQL refuses to drop them).
+    """
+    cursor.execute("""
+        SELECT INDEX_NAME, GROUP_CONCAT(COLUMN_NAME ORDER BY SEQ_IN_INDEX)
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND NON_UNIQUE = 1
+        GROUP BY INDEX_NAME
+    """, (table,))
+    dropped = []
+    for name, columns in cursor.fetchall():
+        try:
+            cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}")
+            dropped.append((name, columns))
+        except mysql.connector.Error:
+            pass  # Needed in a foreign key constraint
+    return dropped
+
+def rebuild_indexes(cursor, table, indexes):
+    """Recreate dropped indexes in a single ALTER (one sort pass per index, one table rebuild)"""
+    if indexes:
+        cursor.execute(f"ALTER TABLE {table} " +
+                       ", ".join(f"ADD INDEX {name} ({columns})" for name, columns in indexes))
+
+def generate_dataset(persons, days, method, batch_size, seed, dim):
+    """Bulk-load synthetic persons, primary encodings and attendance into attendance_system"""
+    config = DB_CONFIG.copy()
+    config['database'] = 'attendance_system'
+    if method == 'infile':
+        config['allow_local_infile'] = True
+    conn = mysql.connector.connect(**config)
+    conn.autocommit = False
+    cursor = conn.cursor()
+    load = load_infile if method == 'infile' else load_multirow
+    rnd = random.Random(seed)
+
+    print(f"\n🏭 GENERATING SYNTHETIC DATASET ({method})")
+    print(f"   • {persons:,} persons, {days} days of attendance, {dim}-d embeddings")
+
+    if method == 'infile':
+        cursor.execute("SHOW GLOBAL VARIABLES LIKE 'local_infile'")
+        row = cursor.fetchone()
+        if not row or row[1] != 'ON':
+            print("❌ local_infile is disabled on the server (SET GLOBAL local_infile = 1, or use --method multirow)")
+            return False
+
+    cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM persons")
+    first_id = cursor.fetchone()[0]
+    rules = load_attendance_rules(cursor)
+    print(f"   • Statuses: on time {rules['on_time_start']}-{rules['on_time_end']}, "
+          f"overtime after {rules['overtime_threshold']}h")
+
+    # Drop while foreign key checks are on, so indexes that back a foreign key are kept
+    started = time.perf_counter()
+    dropped = {}
+    for table in GENERATED_TABLES:
+        dropped[table] = drop_secondary_indexes(cursor, table)
+    print(f"   ✓ Dropped {sum(len(d) for d in dropped.values())} secondary indexes for the load")
+
+    # Foreign keys and unique values hold by construction; skip checking them row by row
+    cursor.execute("SET SESSION foreign_key_checks = 0")
+    cursor.execute("SET SESSION unique_checks = 0")
+
+    loads = [
+        ('persons', PERSON_COLUMNS, generate_persons(first_id, persons, rnd)),
+        ('face_encodings', ENCODING_COLUMNS, generate_encodings(first_id, persons, dim, seed)),
+        ('attendance_records', ATTENDANCE_COLUMNS,
+         generate_attendance(first_id, persons, days, GENERATOR_CONFIG['attendance_rate'], rules, rnd)),
+    ]
+    total_rows = 0
+    try:
+        for table, columns, rows in loads:
+            table_started = time.perf_counter()
+            count = load(conn, cursor, table, columns, rows, batch_size)
+            elapsed = time.perf_counter() - table_started
+            total_rows += count
+            print(f"   ✓ {table}: {count:,} rows in {elapsed:.1f}s ({count / max(elapsed, 1e-9):,.0f} rows/sec)")
+    finally:
+        index_started = time.perf_counter()
+        for table in GENERATED_TABLES:
+            rebuild_indexes(cursor, table, dropped[table])
+        print(f"   ✓ Rebuilt indexes in {time.perf_counter() - index_started:.1f}s")
+        cursor.execute("SET SESSION unique_checks = 1")
+        cursor.execute("SET SESSION foreign_key_checks = 1")
+        for table in GENERATED_TABLES:
+            cursor.execute(f"ANALYZE TABLE {table}")
+            cursor.fetchall()
+        cursor.close()
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"   ✅ Loaded {total_rows:,} rows in {elapsed:.1f}s "
+          f"({total_rows / max(elapsed, 1e-9):,.0f} rows/sec including index builds)")
+    return True
+
 def test_database_connection():
     """Test the database and show summary"""
     try:
@@ -127,6 +366,18 @@ def test_database_connection():
 
 def main():
     """Main execution function"""
+    parser = argparse.ArgumentParser(description='Set up the attendance database (and optionally bulk-load test data)')
+    parser.add_argument('--generate', action='store_true', help='Bulk-load a synthetic dataset after setup')
+    parser.add_argument('--skip-setup', action='store_true',
+                        help='Keep the existing database (do not run FINAL_setup_database.sql)')
+    parser.add_argument('--persons', type=int, default=GENERATOR_CONFIG['persons'])
+    parser.add_argument('--days', type=int, default=GENERATOR_CONFIG['days'])
+    parser.add_argument('--dim', type=int, default=GENERATOR_CONFIG['dim'])
+    parser.add_argument('--method', choices=('multirow', 'infile'), default=GENERATOR_CONFIG['method'])
+    parser.add_argument('--batch-size', type=int, default=GENERATOR_CONFIG['batch_size'])
+    parser.add_argument('--seed', type=int, default=GENERATOR_CONFIG['seed'])
+    args = parser.parse_args()
+    
     print(f"🕐 Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # Check MySQL connection first
@@ -145,10 +396,20 @@ def main():
         return False
     
     # Setup database
-    if not setup_complete_database():
+    if not args.skip_setup and not setup_complete_database():
         print("\n❌ SETUP FAILED!")
         return False
     
+    # Bulk-load synthetic data
+    if args.generate:
+        try:
+            if not generate_dataset(args.persons, args.days, args.method, args.batch_size, args.seed, args.dim):
+                print("\n❌ DATA GENERATION FAILED!")
+                return False
+        except mysql.connector.Error as e:
+            print(f"❌ MySQL Error during generation: {e}")
+            return False
+    
     # Test database
     if not test_database_connection():
         print("\n❌ DATABASE TEST FAILED!")
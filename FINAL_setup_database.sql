@@ -84,9 +84,13 @@ CREATE TABLE attendance_records (
     location VARCHAR(100) DEFAULT 'Main Office',
     ip_address VARCHAR(45),
     notes TEXT,
+    check_in_event_id CHAR(32),   -- Offline journal event ids (idempotent replay)
+    check_out_event_id CHAR(32),
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
     updated_at DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     created_by INT,
+    UNIQUE KEY uq_attendance_check_in_event (check_in_event_id),
+    UNIQUE KEY uq_attendance_check_out_event (check_out_event_id),
     FOREIGN KEY (person_id) REFERENCES persons(id) ON DELETE CASCADE,
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
 );
@@ -106,6 +110,8 @@ CREATE TABLE recognition_logs (
     ip_address VARCHAR(45),
     user_agent TEXT,
     session_id VARCHAR(100),
+    event_id CHAR(32),            -- Offline journal event id (idempotent replay)
+    UNIQUE KEY uq_recognition_logs_event (event_id),
     FOREIGN KEY (person_id) REFERENCES persons(id) ON DELETE SET NULL
 );
 
@@ -196,6 +202,25 @@ CREATE TABLE work_schedules (
     FOREIGN KEY (created_by) REFERENCES users(id) ON DELETE SET NULL
 );
 
+-- 11. Person sites table (location-scoped face galleries; a person may work at several sites)
+CREATE TABLE person_sites (
+    person_id INT NOT NULL,
+    site VARCHAR(100) NOT NULL,
+    assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (person_id, site),
+    FOREIGN KEY (person_id) REFERENCES persons(id) ON DELETE CASCADE
+);
+
+-- 12. Recognition embeddings table (probe embeddings for offline threshold evaluation;
+--     only written when log_embeddings is enabled in the backend)
+CREATE TABLE recognition_embeddings (
+    log_id INT PRIMARY KEY,
+    embedding_data LONGTEXT NOT NULL,
+    candidates TEXT,
+    margin FLOAT,
+    FOREIGN KEY (log_id) REFERENCES recognition_logs(id) ON DELETE CASCADE
+);
+
 -- ===================================================================
 -- INDEX CREATION FOR PERFORMANCE
 -- ===================================================================
@@ -203,9 +228,16 @@ CREATE TABLE work_schedules (
 CREATE INDEX idx_persons_employee_id ON persons(employee_id);
 CREATE INDEX idx_persons_department ON persons(department);
 CREATE INDEX idx_persons_status ON persons(status);
+CREATE INDEX idx_persons_last_updated ON persons(last_updated);
+CREATE INDEX idx_persons_registration_date ON persons(registration_date);
 CREATE INDEX idx_face_encodings_person_active ON face_encodings(person_id, is_active);
-CREATE INDEX idx_attendance_person_date ON attendance_records(person_id, date);
-CREATE INDEX idx_attendance_date ON attendance_records(date);
+CREATE INDEX idx_face_encodings_primary_person ON face_encodings(is_primary, person_id);
+-- Hot attendance indexes, designed around backend/queries.py (verify with backend/check_query_plans.py):
+--   person_open: today's open record per person (covering), per-person date ranges in summaries
+--   date_cover:  present-today in check-in order and summary aggregates without row lookups,
+--                date filter + check-in ordering for the attendance list, date ranges for export
+CREATE INDEX idx_attendance_person_open ON attendance_records(person_id, date, check_out_time, check_in_time);
+CREATE INDEX idx_attendance_date_cover ON attendance_records(date, check_in_time, person_id, check_out_time, total_hours, overtime_hours, status);
 CREATE INDEX idx_attendance_check_in_time ON attendance_records(check_in_time);
 CREATE INDEX idx_recognition_logs_time ON recognition_logs(recognition_time);
 CREATE INDEX idx_recognition_logs_person_time ON recognition_logs(person_id, recognition_time);
@@ -214,6 +246,7 @@ CREATE INDEX idx_audit_logs_timestamp ON audit_logs(timestamp);
 CREATE INDEX idx_audit_logs_user_action ON audit_logs(user_id, action);
 CREATE INDEX idx_holidays_date ON holidays(date);
 CREATE INDEX idx_work_schedules_person_effective ON work_schedules(person_id, effective_from, effective_to);
+CREATE INDEX idx_person_sites_site ON person_sites(site);
 
 -- ===================================================================
 -- SAMPLE DATA INSERTION
@@ -248,6 +281,8 @@ INSERT INTO system_settings (setting_key, setting_value, setting_type, descripti
 ('overtime_threshold', '8.0', 'float', 'Hours after which overtime is calculated'),
 ('late_arrival_threshold', '15', 'integer', 'Minutes after scheduled start time considered late'),
 ('early_departure_threshold', '30', 'integer', 'Minutes before scheduled end time considered early'),
+('default_on_time_start', '08:00:00', 'string', 'Start of the on-time check-in window for persons without a work schedule'),
+('default_on_time_end', '09:30:00', 'string', 'End of the on-time check-in window for persons without a work schedule'),
 ('camera_resolution_width', '640', 'integer', 'Camera capture width in pixels'),
 ('camera_resolution_height', '480', 'integer', 'Camera capture height in pixels'),
 ('session_timeout', '30', 'integer', 'Session timeout in minutes'),
@@ -0,0 +1,160 @@
+# Admission control and load shedding for the recognition pipeline
+import threading
+import time
+from collections import deque
+
+import metrics
+
+# Admission configuration
+ADMISSION_CONFIG = {
+    'enabled': True,
+    'max_concurrent': 2,          # Recognition pipelines running at once (match inference capacity)
+    'max_queue': 16,              # Requests allowed to wait for a slot across all kiosks
+    'max_waiting_per_kiosk': 1,   # A newer frame from the same kiosk replaces its older waiting frame
+    'queue_timeout': 5.0,         # Max seconds a request waits for a slot
+    'frame_deadline': 4.0,        # Frames older than this when granted are dropped before inference
+    'retry_after': 2              # Seconds suggested to shed clients (kiosk scan interval)
+}
+
+QUEUE_WAIT_SECONDS = metrics.registry.histogram(
+    'attnd_admission_queue_wait_seconds', 'Time recognition requests waited for an admission slot')
+ADMITTED = metrics.registry.counter(
+    'attnd_admission_admitted_total', 'Recognition requests admitted to the pipeline')
+SHED = metrics.registry.counter(
+    'attnd_admission_shed_total', 'Recognition requests rejected before inference', ('reason',))
+
+class _Waiter:
+    __slots__ = ('kiosk_id', 'arrived_at', 'granted', 'rejected')
+
+    def __init__(self, kiosk_id, arrived_at):
+        self.kiosk_id = kiosk_id
+        self.arrived_at = arrived_at
+        self.granted = False
+        self.rejected = None
+
+class AdmissionController:
+    """Bounded admission queue with round-robin fairness across kiosks"""
+
+    def __init__(self, config=None):
+        self.config = config or ADMISSION_CONFIG
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = {}        # kiosk_id -> deque of waiters
+        self._rotation = deque()  # kiosks with waiters, in service order
+        self._queued = 0
+
+    def acquire(self, kiosk_id):
+        """Wait for a pipeline slot.
+
+        Returns (True, None) when admitted (caller must call release()), or
+        (False, reason) when the request is shed; reason is one of 'queue_full',
+        'queue_timeout', 'stale_frame' or 'superseded'.
+        """
+        if not self.config['enabled']:
+            return True, None
+
+        arrived_at = time.monotonic()
+        with self._cond:
+            if self._active < self.config['max_concurrent'] and not self._queued:
+                self._active += 1
+                self._admitted(0.0)
+                return True, None
+
+            queue = self._waiting.get(kiosk_id)
+            if queue and len(queue) >= self.config['max_waiting_per_kiosk']:
+                # Keep only the newest frames from this kiosk
+                oldest = queue.popleft()
+                oldest.rejected = 'superseded'
+                self._queued -= 1
+            elif self._queued >= self.config['max_queue']:
+                return self._shed('queue_full')
+
+            waiter = _Waiter(kiosk_id, arrived_at)
+            if queue is None:
+                queue = self._waiting[kiosk_id] = deque()
+            if not queue and kiosk_id not in self._rotation:
+                self._rotation.append(kiosk_id)
+            queue.append(waiter)
+            self._queued += 1
+            self._dispatch()
+            self._cond.notify_all()
+
+            deadline = arrived_at + self.config['queue_timeout']
+            while not waiter.granted and waiter.rejected is None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._remove(waiter)
+                    waiter.rejected = 'queue_timeout'
+                    break
+                self._cond.wait(remaining)
+
+            if waiter.granted:
+                self._admitted(time.monotonic() - arrived_at)
+                return True, None
+            return self._shed(waiter.rejected)
+
+    def release(self):
+        """Free a pipeline slot and hand it to the next kiosk in rotation"""
+        if not self.config['enabled']:
+            return
+
+        with self._cond:
+            self._active -= 1
+            self._dispatch()
+            self._cond.notify_all()
+
+    def _dispatch(self):
+        """Grant free slots round-robin across kiosks, dropping stale frames (lock held)"""
+        now = time.monotonic()
+        while self._active < self.config['max_concurrent'] and self._rotation:
+            kiosk_id = self._rotation.popleft()
+            queue = self._waiting.get(kiosk_id)
+            if not queue:
+                self._waiting.pop(kiosk_id, None)
+                continue
+
+            waiter = queue.popleft()
+            self._queued -= 1
+            if queue:
+                self._rotation.append(kiosk_id)
+            else:
+                del self._waiting[kiosk_id]
+
+            if now - waiter.arrived_at > self.config['frame_deadline']:
+                waiter.rejected = 'stale_frame'
+                continue
+
+            waiter.granted = True
+            self._active += 1
+
+    def _remove(self, waiter):
+        """Drop a waiter that gave up (lock held)"""
+        queue = self._waiting.get(waiter.kiosk_id)
+        if queue and waiter in queue:
+            queue.remove(waiter)
+            self._queued -= 1
+            if not queue:
+                del self._waiting[waiter.kiosk_id]
+                if waiter.kiosk_id in self._rotation:
+                    self._rotation.remove(waiter.kiosk_id)
+
+    def _admitted(self, waited):
+        ADMITTED.inc()
+        QUEUE_WAIT_SECONDS.observe(waited)
+
+    def _shed(self, reason):
+        SHED.inc(reason=reason)
+        return False, reason
+
+    def stats(self):
+        """Current occupancy for health and metrics endpoints"""
+        with self._cond:
+            return {
+                'active': self._active,
+                'queued': self._queued,
+                'kiosks_waiting': len(self._waiting),
+                'max_concurrent': self.config['max_concurrent'],
+                'max_queue': self.config['max_queue']
+            }
+
+admission_controller = AdmissionController()
@@ -1,28 +1,95 @@
 # Flask Backend API for Face Recognition Attendance System with ArcFace
 import os
-import cv2
-import numpy as np
+import atexit
+import functools
+import multiprocessing
 import json
-import base64
 import datetime
+import time
 from io import BytesIO
-from PIL import Image
 import mysql.connector
-from sklearn.metrics.pairwise import cosine_similarity
-import insightface
-from insightface.app import FaceAnalysis
-from flask import Flask, request, jsonify, Response, send_file
+from flask import Flask, request, jsonify, Response, send_file, g
 from flask_cors import CORS
-import pandas as pd
-from io import BytesIO
-import xlsxwriter
+import face_engine
+from face_engine import (
+    decode_base64_bytes, image_bytes_to_cv, encoding_from_faces, group_encodings_from_faces, detection_from_faces
+)
+from face_cache import FACE_CACHE_CONFIG, face_cache, image_content_key
+from frame_quality import FRAME_QUALITY_CONFIG, frame_quality_gate
+from inference_pool import INFERENCE_CONFIG, InferencePool
+from admission import ADMISSION_CONFIG, admission_controller
+from attendance_calendar import attendance_calendar
+from response_cache import response_cache
+from serialization import json_response, rows_from_cursor
+from gallery import GALLERY_CONFIG, face_gallery
+import queries
+from offline_journal import JOURNAL_CONFIG, UNAVAILABLE_ERRORS, offline_journal
+import metrics
 
 app = Flask(__name__)
 CORS(app)
 
-# Initialize ArcFace model
-face_app = FaceAnalysis(allowed_modules=['detection', 'recognition'])
-face_app.prepare(ctx_id=0, det_size=(640, 640))
+@app.before_request
+def start_request_timer():
+    """Start per-route latency timer"""
+    if metrics.enabled():
+        g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_latency(response):
+    """Record per-route latency histogram"""
+    start = g.pop('request_start', None)
+    if start is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_SECONDS.observe(
+            time.perf_counter() - start,
+            method=request.method, route=route, status=response.status_code
+        )
+    return response
+
+# Initialize ArcFace model in the background so the server answers health checks immediately.
+# In 'process' mode the model lives in worker processes instead; the parent_process() check
+# keeps spawned workers (which re-import this module as __mp_main__) from starting a pool.
+inference_pool = None
+if INFERENCE_CONFIG['backend'] == 'process':
+    if multiprocessing.parent_process() is None:
+        inference_pool = InferencePool(INFERENCE_CONFIG, face_engine.MODEL_CONFIG, FRAME_QUALITY_CONFIG)
+        inference_pool.start()
+        atexit.register(inference_pool.shutdown)
+else:
+    face_engine.start_model_loading()
+
+def model_ready():
+    """True when face inference can be served (in-process model or at least one pool worker)"""
+    if inference_pool is not None:
+        return inference_pool.is_ready()
+    return face_engine.is_ready()
+
+def model_status():
+    """Model loading / worker pool state for health endpoints"""
+    if inference_pool is not None:
+        return {'backend': 'process', **inference_pool.stats()}
+    return {'backend': 'thread', **face_engine.model_status()}
+
+# Scrape-time metrics from the face analysis cache and quality gate
+metrics.registry.register_collector(
+    'attnd_face_cache', 'Face analysis cache counters', 'gauge', face_cache.stats)
+metrics.registry.register_collector(
+    'attnd_frame_quality', 'Pre-inference quality gate counters', 'gauge', frame_quality_gate.stats)
+metrics.registry.register_collector(
+    'attnd_model_ready', 'Whether the ArcFace model is loaded and warmed up', 'gauge',
+    lambda: 1 if model_ready() else 0)
+metrics.registry.register_collector(
+    'attnd_admission', 'Admission controller occupancy', 'gauge', admission_controller.stats)
+metrics.registry.register_collector(
+    'attnd_gallery', 'In-memory face gallery size and reloads', 'gauge', face_gallery.stats)
+metrics.registry.register_collector(
+    'attnd_response_cache', 'Versioned GET response cache counters', 'gauge', response_cache.stats)
+metrics.registry.register_collector(
+    'attnd_offline_journal', 'Offline event journal queue depth and sync counters', 'gauge', offline_journal.stats)
+if inference_pool is not None:
+    metrics.registry.register_collector(
+        'attnd_inference_pool', 'Inference worker pool state and counters', 'gauge', inference_pool.stats)
 
 # Database configuration
 DB_CONFIG = {
@@ -37,324 +104,530 @@ DB_CONFIG = {
 def get_db_connection():
     """Get database connection"""
     try:
-        return mysql.connector.connect(**DB_CONFIG)
+        with metrics.stage('db_connect'):
+            conn = mysql.connector.connect(**DB_CONFIG)
+        return metrics.instrument_connection(conn)
     except mysql.connector.Error as e:
+        metrics.DB_CONNECT_FAILURES.inc()
         print(f"Database connection error: {e}")
         return None
 
-def decode_base64_image(base64_string):
-    """Decode base64 image to OpenCV format"""
+def on_journal_synced(kinds):
+    """Replayed journal events changed MySQL: drop cached responses built from those tables"""
+    if 'recognition_log' in kinds:
+        response_cache.invalidate('recognition_logs')
+
+# Attendance rules (settings, schedules, holidays) and the per-site face gallery are held in
+# memory and refreshed in the background, so the recognition path adds no queries for them.
+# Attendance and recognition events are journaled locally when MySQL is unreachable.
+if multiprocessing.parent_process() is None:
+    attendance_calendar.start(lambda: get_db_connection())
+    face_gallery.start(lambda: get_db_connection())
+    if JOURNAL_CONFIG['enabled']:
+        offline_journal.start(lambda: get_db_connection(), on_journal_synced)
+
+def analyze_face_image(base64_string, kiosk_id=None):
+    """Decode image and run ArcFace once, sharing the result through the content-hash cache.
+    
+    Frames that fail the cheap quality gate (blur, brightness, unchanged scene for
+    kiosk_id) are rejected before the model runs.
+    
+    Returns a dict with 'face_data', 'error' (as from extract_face_encoding),
+    'faces' (every usable face in group mode, see group_encodings_from_faces) and
+    'detection' (as from detection_from_faces), or None if the image is invalid.
+    """
+    with metrics.stage('decode_base64'):
+        image_data = decode_base64_bytes(base64_string)
+    if not image_data:
+        return None
+    
+    cache_key = None
+    if FACE_CACHE_CONFIG['enabled']:
+        cache_key = image_content_key(image_data)
+        cached = face_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    if inference_pool is not None:
+        return _analyze_in_pool(image_data, cache_key, kiosk_id)
+    
+    with metrics.stage('decode_image'):
+        cv_image = image_bytes_to_cv(image_data)
+    if cv_image is None:
+        return None
+    
+    # Pre-inference quality gate (not cached: the unchanged-frame check depends on kiosk state)
+    with metrics.stage('quality_gate'):
+        gate_error, gate_reason, thumbnail = frame_quality_gate.check(cv_image, kiosk_id)
+    if gate_error:
+        return {
+            'face_data': None,
+            'error': gate_error,
+            'detection': {'face_detected': False, 'face_count': 0, 'rejected': gate_reason}
+        }
+    
+    face_app = face_engine.get_model()
+    if face_app is None:
+        return {'face_data': None, 'error': face_engine.NOT_READY_MESSAGE, 'detection': None}
+    
+    metrics.MODEL_QUEUE_DEPTH.inc()
     try:
-        # Remove data URL prefix if present
-        if ',' in base64_string:
-            base64_string = base64_string.split(',')[1]
-        
-        # Decode base64
-        image_data = base64.b64decode(base64_string)
-        
-        # Convert to PIL Image
-        pil_image = Image.open(BytesIO(image_data))
-        
-        # Convert to OpenCV format
-        cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
-        
-        return cv_image
+        with metrics.stage('face_model'):
+            faces = face_app.get(cv_image)
     except Exception as e:
-        print(f"Error decoding image: {e}")
+        # Model failures are transient, do not cache them
+        print(f"Error extracting face encoding: {e}")
+        return {'face_data': None, 'error': f"Error processing face: {str(e)}", 'detection': None}
+    finally:
+        metrics.MODEL_QUEUE_DEPTH.dec()
+    
+    face_data, error = encoding_from_faces(faces, cv_image)
+    group_faces = group_encodings_from_faces(faces, cv_image)
+    # A frame with usable faces succeeds in group mode, so it must not be replayed as an error
+    frame_quality_gate.record_outcome(kiosk_id, thumbnail, None if group_faces else error)
+    analysis = {
+        'face_data': face_data,
+        'error': error,
+        'faces': group_faces,
+        'detection': detection_from_faces(faces)
+    }
+    
+    if cache_key is not None:
+        face_cache.put(cache_key, analysis)
+    
+    return analysis
+
+def _analyze_in_pool(image_data, cache_key, kiosk_id):
+    """analyze_face_image for the process-pool backend (decode, gate and model run in a worker)"""
+    # Only an unchanged-frame comparison needs the previous thumbnail; skip sending it otherwise
+    previous = frame_quality_gate.kiosk_state(kiosk_id)
+    if previous and not previous['error']:
+        previous = None
+    
+    metrics.MODEL_QUEUE_DEPTH.inc()
+    try:
+        with metrics.stage('face_model'):
+            result = inference_pool.analyze(image_data, previous)
+    finally:
+        metrics.MODEL_QUEUE_DEPTH.dec()
+    
+    if result.get('invalid'):
         return None
+    
+    if result.get('gate_error'):
+        frame_quality_gate.record_check(kiosk_id, result['gate_reason'])
+        return {
+            'face_data': None,
+            'error': result['gate_error'],
+            'detection': {'face_detected': False, 'face_count': 0, 'rejected': result['gate_reason']}
+        }
+    
+    analysis = {'face_data': result['face_data'], 'error': result['error'], 'faces': result.get('faces'),
+                'detection': result['detection']}
+    if result.get('transient'):
+        return analysis
+    
+    frame_quality_gate.record_check(kiosk_id, None)
+    frame_quality_gate.record_outcome(kiosk_id, result['thumbnail'], None if result.get('faces') else result['error'])
+    if cache_key is not None:
+        face_cache.put(cache_key, analysis)
+    
+    return analysis
 
-def extract_face_encoding(image):
-    """Extract face encoding using ArcFace"""
+def find_matching_person(target_embedding, threshold=0.6, site=None):
+    """Find matching person using cosine similarity, searching the kiosk's site first.
+    
+    Returns ((person_id, person_name), similarity) or (None, best similarity).
+    """
+    search = rank_candidates(target_embedding, threshold, site)
+    return search['match'], search['similarity']
+
+def rank_candidates(target_embedding, threshold=0.6, site=None):
+    """Top-k gallery candidates with best-vs-second margin (see FaceGallery.search)"""
     try:
-        faces = face_app.get(image)
+        with metrics.stage('gallery_scan'):
+            return face_gallery.search(target_embedding, threshold, site)
         
-        if len(faces) == 0:
-            return None, "No face detected"
+    except Exception as e:
+        print(f"Error finding matching person: {e}")
+        return {'match': None, 'similarity': 0.0, 'margin': 0.0, 'candidates': [], 'shard': None,
+                'rejected': 'error'}
+
+def record_attendance(person_id, person_name, confidence_score, face_data, mode='check_in'):
+    """Record attendance in database with proper validation and time-based status"""
+    try:
+        conn = get_db_connection()
+        if not conn:
+            return record_attendance_offline(person_id, person_name, confidence_score, mode)
+        
+        try:
+            cursor = conn.cursor()
+            result = apply_attendance(cursor, person_id, person_name, confidence_score, mode)
+            if result['success']:
+                conn.commit()
+        except UNAVAILABLE_ERRORS as e:
+            print(f"Database unavailable while recording attendance: {e}")
+            return record_attendance_offline(person_id, person_name, confidence_score, mode)
+        finally:
+            conn.close()
         
-        if len(faces) > 1:
-            return None, "Multiple faces detected. Please ensure only one face is visible."
+        offline_journal.note_attendance(person_id, person_name, mode, result)
+        return result
         
-        face = faces[0]
+    except Exception as e:
+        print(f"Error recording attendance: {e}")
+        return {'success': False, 'error': str(e)}
+
+def record_attendance_offline(person_id, person_name, confidence_score, mode='check_in'):
+    """Validate against today's local snapshot and journal the transition for later sync"""
+    if not JOURNAL_CONFIG['enabled']:
+        return {'success': False, 'error': 'Database connection failed'}
+    return offline_journal.record_attendance(person_id, person_name, confidence_score, mode, attendance_calendar)
+
+def apply_attendance(cursor, person_id, person_name, confidence_score, mode='check_in'):
+    """Validate and write one check-in/check-out on an open cursor (caller commits)"""
+    today = datetime.date.today()
+    
+    if mode == 'check_in':
+        # Check if already checked in today
+        cursor.execute(queries.OPEN_RECORD_QUERY, (person_id, today))
+        existing = cursor.fetchone()
+        
+        if existing:
+            print(f"Person {person_name} already checked in today")
+            return {
+                'success': False, 
+                'error': 'already_checked_in',
+                'message': f'{person_name}, you have already checked in today. Your check-in time was {existing[1].strftime("%H:%M:%S")}.'
+            }
         
-        # Get face embedding (512-dimensional vector)
-        embedding = face.embedding
+        # Record actual check-in time
+        actual_time = datetime.datetime.now()
         
-        # Check if embedding is valid
-        if embedding is None:
-            return None, "Failed to extract face features. Please try with better lighting."
+        # Determine attendance status from the person's schedule, holidays and settings
+        status, status_message = attendance_calendar.evaluate_check_in(person_id, actual_time)
         
-        # Get face bounding box and landmarks for validation
-        bbox = face.bbox
-        landmarks = face.landmark_2d_106
+        # Insert new check-in record with time-based status
+        insert_query = """
+            INSERT INTO attendance_records (person_id, check_in_time, date, check_in_method, status, confidence_score)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """
+        values = (person_id, actual_time, today, 'face_recognition', status, confidence_score)
+        cursor.execute(insert_query, values)
+        attendance_id = cursor.lastrowid
         
-        # Validate bbox and landmarks
-        if bbox is None:
-            return None, "Failed to detect face boundaries."
+        return {
+            'success': True, 
+            'attendance_id': attendance_id,
+            'message': f'Welcome {person_name}! Check-in recorded successfully at {actual_time.strftime("%H:%M:%S")} ({status_message}).',
+            'timestamp': actual_time.isoformat(),
+            'status': status
+        }
         
-        if landmarks is None:
-            landmarks = []  # Set empty list if landmarks not available
+    else:  # check_out
+        # Find today's open check-in record
+        cursor.execute(queries.OPEN_RECORD_QUERY, (person_id, today))
+        record = cursor.fetchone()
         
-        # Calculate face quality score based on size and position
-        face_width = bbox[2] - bbox[0]
-        face_height = bbox[3] - bbox[1]
-        face_area = face_width * face_height
-        image_area = image.shape[0] * image.shape[1]
-        face_ratio = face_area / image_area
+        if not record:
+            print(f"No valid check-in found for {person_name} today")
+            return {
+                'success': False,
+                'error': 'no_checkin',
+                'message': f'{person_name}, you did not check in today or you have already checked out. Unable to process check-out.'
+            }
         
-        # Quality checks
-        if face_ratio < 0.05:  # Face too small
-            return None, "Face too small. Please move closer to the camera."
+        check_in_id, check_in_time = record
+        check_out_time = datetime.datetime.now()
         
-        if face_width < 100 or face_height < 100:  # Face resolution too low
-            return None, "Face resolution too low. Please ensure good lighting."
+        # Calculate total hours
+        time_diff = check_out_time - check_in_time
+        total_hours = round(time_diff.total_seconds() / 3600, 2)
         
-        return {
-            'embedding': embedding.tolist(),
-            'bbox': bbox.tolist(),
-            'landmarks': landmarks.tolist() if len(landmarks) > 0 else [],
-            'confidence': float(face.det_score) if hasattr(face, 'det_score') and face.det_score is not None else 0.0,
-            'face_area': face_area,
-            'quality_score': min(1.0, face_ratio * 10)  # Normalize quality score
-        }, None
+        # Determine checkout status from overtime/early departure settings and the schedule
+        checkout_status, status_message = attendance_calendar.evaluate_check_out(person_id, check_out_time, total_hours)
         
-    except Exception as e:
-        print(f"Error extracting face encoding: {e}")
-        return None, f"Error processing face: {str(e)}"
+        # Update the record with check-out time and status
+        update_query = """
+            UPDATE attendance_records 
+            SET check_out_time = %s, check_out_method = %s, total_hours = %s, status = %s
+            WHERE id = %s
+        """
+        values = (check_out_time, 'face_recognition', total_hours, checkout_status, check_in_id)
+        cursor.execute(update_query, values)
+        
+        return {
+            'success': True,
+            'attendance_id': check_in_id,
+            'message': f'Goodbye {person_name}! Check-out recorded successfully at {check_out_time.strftime("%H:%M:%S")} {status_message}.',
+            'total_hours': total_hours,
+            'timestamp': check_out_time.isoformat(),
+            'status': checkout_status
+        }
 
-def find_matching_person(target_embedding, threshold=0.6):
-    """Find matching person in database using cosine similarity"""
+def log_recognition_attempt(person_id, confidence_score, status, face_data, search=None):
+    """Log recognition attempt for monitoring (plus the probe embedding when log_embeddings is on)"""
     try:
+        # Journaled logs are inserted by the background syncer in batches
+        if JOURNAL_CONFIG['enabled'] and JOURNAL_CONFIG['journal_logs']:
+            journal_recognition_log(person_id, confidence_score, status, face_data, search)
+            return
+        
         conn = get_db_connection()
         if not conn:
-            return None, 0.0
+            if JOURNAL_CONFIG['enabled']:
+                journal_recognition_log(person_id, confidence_score, status, face_data, search)
+            return
         
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT fe.person_id, fe.encoding_data, p.name, p.status 
-            FROM face_encodings fe
-            JOIN persons p ON fe.person_id = p.id
-            WHERE fe.is_primary = true AND p.status = 'active'
-        """)
-        
-        encodings = cursor.fetchall()
+        insert_recognition_log(cursor, person_id, confidence_score, status, face_data, search)
+        conn.commit()
         conn.close()
-        
-        if not encodings:
-            return None, 0.0
-        
-        best_match_id = None
-        best_similarity = 0.0
-        best_person_name = None
-        
-        target_embedding = np.array(target_embedding).reshape(1, -1)
-        
-        for person_id, encoding_data, person_name, status in encodings:
-            try:
-                stored_embedding = np.array(json.loads(encoding_data)).reshape(1, -1)
-                similarity = cosine_similarity(target_embedding, stored_embedding)[0][0]
-                
-                if similarity > best_similarity and similarity >= threshold:
-                    best_similarity = similarity
-                    best_match_id = person_id
-                    best_person_name = person_name
-                    
-            except Exception as e:
-                print(f"Error comparing embedding for person {person_id}: {e}")
-                continue
-        
-        return (best_match_id, best_person_name) if best_match_id else (None, None), best_similarity
+        response_cache.invalidate('recognition_logs')
+        print(f"Successfully logged recognition: person_id={person_id}, confidence={confidence_score}, status={status}")
         
     except Exception as e:
-        print(f"Error finding matching person: {e}")
-        return None, 0.0
+        print(f"Error logging recognition attempt: {e}")
 
-def record_attendance(person_id, person_name, confidence_score, face_data, mode='check_in'):
-    """Record attendance in database with proper validation and time-based status"""
-    try:
+def journal_recognition_log(person_id, confidence_score, status, face_data, search=None):
+    """Queue a recognition log (and embedding) in the offline journal"""
+    offline_journal.log_recognition(recognition_log_row(person_id, confidence_score, status),
+                                    recognition_embedding(face_data, search))
+
+def recognition_log_row(person_id, confidence_score, status):
+    """recognition_logs column values for a recognition status"""
+    # Map status to success boolean and recognition type
+    success = 1 if status in ['recognized', 'validation_failed'] else 0
+    recognition_type = 'verification'  # Default type
+    error_message = None
+    
+    if status == 'validation_failed':
+        error_message = 'Attendance validation failed'
+    elif status == 'unknown':
+        error_message = 'Face not recognized'
+    elif status == 'ambiguous':
+        error_message = 'Ambiguous match'
+    
+    return {
+        'person_id': person_id,
+        'recognition_time': datetime.datetime.now(),
+        'confidence_score': float(confidence_score),
+        'recognition_type': recognition_type,
+        'success': success,
+        'error_message': error_message
+    }
+
+def recognition_embedding(face_data, search):
+    """Probe embedding and ranked candidates to store with a log, when log_embeddings is on"""
+    if not GALLERY_CONFIG['log_embeddings'] or not face_data or search is None:
+        return None
+    return {
+        'embedding': face_data['embedding'],
+        'candidates': [[pid, round(sim, 6)] for pid, _, sim in search['candidates']],
+        'margin': search['margin']
+    }
+
+def insert_recognition_log(cursor, person_id, confidence_score, status, face_data, search=None):
+    """Write one recognition_logs row (and its embedding) on an open cursor (caller commits)"""
+    row = recognition_log_row(person_id, confidence_score, status)
+    log_query = """
+        INSERT INTO recognition_logs (person_id, recognition_time, confidence_score, recognition_type, success, error_message)
+        VALUES (%s, %s, %s, %s, %s, %s)
+    """
+    
+    log_values = (
+        row['person_id'],
+        row['recognition_time'],
+        row['confidence_score'],
+        row['recognition_type'],
+        row['success'],
+        row['error_message']
+    )
+    
+    cursor.execute(log_query, log_values)
+    
+    embedding = recognition_embedding(face_data, search)
+    if embedding:
+        cursor.execute(
+            "INSERT INTO recognition_embeddings (log_id, embedding_data, candidates, margin) VALUES (%s, %s, %s, %s)",
+            (cursor.lastrowid, json.dumps(embedding['embedding']), json.dumps(embedding['candidates']),
+             embedding['margin'])
+        )
+
+def group_face_result(index, face, search, best_face, mode, record, log):
+    """Record one face of a group frame with the given attendance and log writers"""
+    result = {
+        'face_index': index,
+        'bbox': face['bbox'],
+        'similarity': float(search['similarity']),
+        'margin': float(search['margin'])
+    }
+    match = search['match']
+    if match is None or best_face.get(match[0]) != index:
+        status = 'ambiguous' if search['rejected'] == 'ambiguous' else 'unknown'
+        log(None, search['similarity'], status, face, search)
+        result.update({'recognized': False, 'success': False})
+        if match is not None:
+            result['error'] = 'Same person matched on another face in this frame'
+        return result
+    
+    person_id, person_name = match
+    attendance = record(person_id, person_name, search['similarity'], mode)
+    status = 'recognized' if attendance['success'] else 'validation_failed'
+    log(person_id, search['similarity'], status, face, search)
+    result.update({
+        'recognized': True,
+        'person_id': person_id,
+        'person_name': person_name,
+        'success': attendance['success'],
+        'error': attendance.get('error'),
+        'message': attendance.get('message'),
+        'attendance_id': attendance.get('attendance_id'),
+        'status': attendance.get('status'),
+        'total_hours': attendance.get('total_hours'),
+        'timestamp': attendance.get('timestamp')
+    })
+    if attendance.get('offline'):
+        result['offline'] = True
+    return result
+
+def recognize_group(faces, mode, site=None):
+    """Match every face of a group frame in one batch and record them in one transaction.
+    
+    Returns per-face result dicts in frame order (largest face first).
+    """
+    with metrics.stage('find_matching_person'):
+        try:
+            with metrics.stage('gallery_scan'):
+                searches = face_gallery.search_many([face['embedding'] for face in faces], site=site)
+        except Exception as e:
+            print(f"Error finding matching persons: {e}")
+            return [{'face_index': i, 'bbox': face['bbox'], 'recognized': False, 'success': False,
+                     'error': str(e)} for i, face in enumerate(faces)]
+    
+    # A person can only be matched once per frame: keep their best-scoring face
+    best_face = {}
+    for i, search in enumerate(searches):
+        if search['match']:
+            person_id = search['match'][0]
+            if person_id not in best_face or search['similarity'] > searches[best_face[person_id]]['similarity']:
+                best_face[person_id] = i
+    
+    with metrics.stage('record_attendance'):
         conn = get_db_connection()
         if not conn:
-            return {'success': False, 'error': 'Database connection failed'}
-        
-        cursor = conn.cursor()
-        today = datetime.date.today()
-        
-        if mode == 'check_in':
-            # Check if already checked in today
-            check_query = "SELECT id, check_in_time FROM attendance_records WHERE person_id = %s AND date = %s AND check_in_time IS NOT NULL AND check_out_time IS NULL"
-            cursor.execute(check_query, (person_id, today))
-            existing = cursor.fetchone()
-            
-            if existing:
-                conn.close()
-                print(f"Person {person_name} already checked in today")
-                return {
-                    'success': False, 
-                    'error': 'already_checked_in',
-                    'message': f'{person_name}, you have already checked in today. Your check-in time was {existing[1].strftime("%H:%M:%S")}.'
-                }
-            
-            # Record actual check-in time
-            actual_time = datetime.datetime.now()
-            check_in_time_only = actual_time.time()
-            
-            # Determine attendance status based on time
-            # On time: 8:00 AM - 9:30 AM (08:00:00 - 09:30:00)
-            # Late: after 9:30 AM (09:30:01 and beyond)
-            on_time_start = datetime.time(8, 0, 0)   # 8:00 AM
-            on_time_end = datetime.time(9, 30, 0)    # 9:30 AM
-            
-            if on_time_start <= check_in_time_only <= on_time_end:
-                status = 'present'
-                status_message = "on time"
-            else:
-                status = 'late'
-                status_message = "late"
-            
-            # Insert new check-in record with time-based status
-            insert_query = """
-                INSERT INTO attendance_records (person_id, check_in_time, date, check_in_method, status, confidence_score)
-                VALUES (%s, %s, %s, %s, %s, %s)
-            """
-            values = (person_id, actual_time, today, 'face_recognition', status, confidence_score)
-            cursor.execute(insert_query, values)
-            attendance_id = cursor.lastrowid
-            
+            return record_group_offline(faces, searches, best_face, mode)
+        try:
+            cursor = conn.cursor()
+            results = [
+                group_face_result(
+                    i, face, search, best_face, mode,
+                    lambda *args: apply_attendance(cursor, *args),
+                    lambda *args: insert_recognition_log(cursor, *args))
+                for i, (face, search) in enumerate(zip(faces, searches))
+            ]
             conn.commit()
-            conn.close()
-            
-            return {
-                'success': True, 
-                'attendance_id': attendance_id,
-                'message': f'Welcome {person_name}! Check-in recorded successfully at {actual_time.strftime("%H:%M:%S")} ({status_message}).',
-                'timestamp': actual_time.isoformat(),
-                'status': status
-            }
-            
-        else:  # check_out
-            # Find today's open check-in record
-            check_query = """
-                SELECT id, check_in_time FROM attendance_records 
-                WHERE person_id = %s AND date = %s AND check_in_time IS NOT NULL AND check_out_time IS NULL
-                ORDER BY check_in_time DESC LIMIT 1
-            """
-            cursor.execute(check_query, (person_id, today))
-            record = cursor.fetchone()
-            
-            if not record:
+        except UNAVAILABLE_ERRORS as e:
+            # Connection lost mid-frame: the transaction never committed, so journal the whole frame
+            print(f"Database unavailable while recording group attendance: {e}")
+            return record_group_offline(faces, searches, best_face, mode)
+        except Exception as e:
+            print(f"Error recording group attendance: {e}")
+            try:
+                conn.rollback()
+            except UNAVAILABLE_ERRORS:
+                # The connection died with the transaction: nothing was written
+                return record_group_offline(faces, searches, best_face, mode)
+            return [{'face_index': i, 'bbox': face['bbox'], 'recognized': False, 'success': False,
+                     'error': str(e)} for i, face in enumerate(faces)]
+        finally:
+            try:
                 conn.close()
-                print(f"No valid check-in found for {person_name} today")
-                return {
-                    'success': False,
-                    'error': 'no_checkin',
-                    'message': f'{person_name}, you did not check in today or you have already checked out. Unable to process check-out.'
-                }
-            
-            check_in_id, check_in_time = record
-            check_out_time = datetime.datetime.now()
-            
-            # Calculate total hours
-            time_diff = check_out_time - check_in_time
-            total_hours = round(time_diff.total_seconds() / 3600, 2)
-            
-            # Determine checkout status based on total hours worked
-            # Standard work day: 8 hours
-            # Overtime: more than 9 hours
-            if total_hours > 9.0:
-                checkout_status = 'overtime'
-                status_message = f"with overtime ({total_hours} hours)"
-            else:
-                checkout_status = 'present'
-                status_message = f"({total_hours} hours worked)"
-            
-            # Update the record with check-out time and status
-            update_query = """
-                UPDATE attendance_records 
-                SET check_out_time = %s, check_out_method = %s, total_hours = %s, status = %s
-                WHERE id = %s
-            """
-            values = (check_out_time, 'face_recognition', total_hours, checkout_status, check_in_id)
-            cursor.execute(update_query, values)
-            
-            conn.commit()
-            conn.close()
-            
-            return {
-                'success': True,
-                'attendance_id': check_in_id,
-                'message': f'Goodbye {person_name}! Check-out recorded successfully at {check_out_time.strftime("%H:%M:%S")} {status_message}.',
-                'total_hours': total_hours,
-                'timestamp': check_out_time.isoformat(),
-                'status': checkout_status
-            }
-        
-    except Exception as e:
-        print(f"Error recording attendance: {e}")
-        return {'success': False, 'error': str(e)}
+            except UNAVAILABLE_ERRORS:
+                pass
+    
+    for result in results:
+        if result['success']:
+            offline_journal.note_attendance(result['person_id'], result['person_name'], mode, result)
+    response_cache.invalidate('recognition_logs')
+    return results
+
+def record_group_offline(faces, searches, best_face, mode):
+    """Validate a group frame against today's snapshot and journal every face"""
+    if not JOURNAL_CONFIG['enabled']:
+        return [{'face_index': i, 'bbox': face['bbox'], 'recognized': False, 'success': False,
+                 'error': 'Database connection failed'} for i, face in enumerate(faces)]
+    return [group_face_result(i, face, search, best_face, mode, record_attendance_offline, journal_recognition_log)
+            for i, (face, search) in enumerate(zip(faces, searches))]
+
+def request_kiosk_id():
+    """Kiosk identifier sent by the frontend, falling back to the client address"""
+    data = request.get_json(silent=True) or {}
+    return data.get('kiosk_id') or request.remote_addr
+
+def admission_controlled(view):
+    """Run the view only after the admission controller grants a pipeline slot"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        admitted, reason = admission_controller.acquire(request_kiosk_id())
+        if not admitted:
+            retry_after = ADMISSION_CONFIG['retry_after']
+            response = jsonify({
+                'recognized': False,
+                'success': False,
+                'error': 'busy',
+                'reason': reason,
+                'message': 'Recognition is busy. Please hold still, retrying shortly.',
+                'retry_after': retry_after
+            })
+            response.headers['Retry-After'] = str(retry_after)
+            return response, 429
+        try:
+            return view(*args, **kwargs)
+        finally:
+            admission_controller.release()
+    return wrapper
 
-def log_recognition_attempt(person_id, confidence_score, status, face_data):
-    """Log recognition attempt for monitoring"""
+# API Routes
+
+def query_data_version(query):
+    """Run a single-row version query for the response cache (None if the DB is unavailable)"""
     try:
         conn = get_db_connection()
         if not conn:
-            return
-        
+            return None
         cursor = conn.cursor()
-        
-        # Map status to success boolean and recognition type
-        success = 1 if status in ['recognized', 'validation_failed'] else 0
-        recognition_type = 'verification'  # Default type
-        error_message = None
-        
-        if status == 'validation_failed':
-            error_message = 'Attendance validation failed'
-        elif status == 'unknown':
-            error_message = 'Face not recognized'
-        
-        log_query = """
-            INSERT INTO recognition_logs (person_id, recognition_time, confidence_score, recognition_type, success, error_message)
-            VALUES (%s, %s, %s, %s, %s, %s)
-        """
-        
-        log_values = (
-            person_id,
-            datetime.datetime.now(),
-            confidence_score,
-            recognition_type,
-            success,
-            error_message
-        )
-        
-        cursor.execute(log_query, log_values)
-        conn.commit()
+        cursor.execute(query)
+        version = tuple(cursor.fetchone())
         conn.close()
-        print(f"Successfully logged recognition: person_id={person_id}, confidence={confidence_score}, status={status}")
-        
+        return version
     except Exception as e:
-        print(f"Error logging recognition attempt: {e}")
-
-# API Routes
+        print(f"Error reading data version: {e}")
+        return None
 
 @app.route('/api/persons', methods=['GET'])
 def get_persons():
-    """Get all registered persons"""
+    """Get all registered persons (cached until persons change)"""
+    return response_cache.respond(
+        'persons',
+        lambda: query_data_version(queries.PERSONS_VERSION_QUERY),
+        build_persons_response
+    )
+
+def build_persons_response():
+    """Query and serialize all registered persons"""
     try:
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("SELECT * FROM persons ORDER BY registration_date DESC")
-        persons = cursor.fetchall()
+        cursor = conn.cursor()
+        cursor.execute(queries.PERSONS_QUERY)
+        persons = rows_from_cursor(cursor)
         conn.close()
         
-        # Convert datetime objects to strings
-        for person in persons:
-            if person.get('registration_date'):
-                person['registration_date'] = person['registration_date'].isoformat()
-            if person.get('last_updated'):
-                person['last_updated'] = person['last_updated'].isoformat()
-        
-        return jsonify(persons)
+        # Datetimes are encoded as ISO 8601 strings by the serializer
+        return json_response(persons)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -371,13 +644,15 @@ def create_person():
         if not data.get('face_image'):
             return jsonify({'error': 'Face image is required'}), 400
         
-        # Decode and process face image
-        cv_image = decode_base64_image(data['face_image'])
-        if cv_image is None:
+        if not model_ready():
+            return jsonify({'error': face_engine.NOT_READY_MESSAGE}), 503
+        
+        # Decode and process face image (reuses the detection result for the same capture)
+        analysis = analyze_face_image(data['face_image'])
+        if analysis is None:
             return jsonify({'error': 'Invalid image format'}), 400
         
-        # Extract face encoding
-        face_data, error = extract_face_encoding(cv_image)
+        face_data, error = analysis['face_data'], analysis['error']
         if error:
             return jsonify({'error': error}), 400
         
@@ -424,8 +699,15 @@ def create_person():
         )
         
         cursor.execute(encoding_query, encoding_values)
+        
+        # Optional site assignment for location-scoped matching
+        if data.get('site'):
+            cursor.execute("INSERT INTO person_sites (person_id, site) VALUES (%s, %s)", (person_id, data['site']))
+        
         conn.commit()
         conn.close()
+        response_cache.invalidate('persons')
+        face_gallery.invalidate()
         
         return jsonify({
             'id': person_id,
@@ -447,44 +729,25 @@ def detect_face():
         if not data.get('image'):
             return jsonify({'face_detected': False, 'error': 'No image provided'}), 400
         
-        # Decode image
-        cv_image = decode_base64_image(data['image'])
-        if cv_image is None:
-            return jsonify({'face_detected': False, 'error': 'Invalid image format'}), 400
-        
-        # Use ArcFace to detect faces
-        faces = face_app.get(cv_image)
+        if not model_ready():
+            return jsonify({'face_detected': False, 'error': face_engine.NOT_READY_MESSAGE}), 503
         
-        face_detected = len(faces) > 0
-        face_count = len(faces)
-        
-        response = {
-            'face_detected': face_detected,
-            'face_count': face_count
-        }
+        # Decode image and detect faces with ArcFace
+        analysis = analyze_face_image(data['image'])
+        if analysis is None:
+            return jsonify({'face_detected': False, 'error': 'Invalid image format'}), 400
         
-        if face_detected:
-            # Get face details for the first face
-            face = faces[0]
-            bbox = face.bbox
-            
-            response.update({
-                'face_area': {
-                    'x': int(bbox[0]),
-                    'y': int(bbox[1]),
-                    'width': int(bbox[2] - bbox[0]),
-                    'height': int(bbox[3] - bbox[1])
-                },
-                'confidence': float(face.det_score)
-            })
+        if analysis['detection'] is None:
+            return jsonify({'face_detected': False, 'error': analysis['error']}), 500
         
-        return jsonify(response)
+        return jsonify(analysis['detection'])
         
     except Exception as e:
         print(f"Error in face detection: {e}")
         return jsonify({'face_detected': False, 'error': str(e)}), 500
 
 @app.route('/api/face-recognition', methods=['POST'])
+@admission_controlled
 def recognize_face():
     """Recognize face and record attendance with proper validation"""
     try:
@@ -493,40 +756,72 @@ def recognize_face():
         if not data.get('image'):
             return jsonify({'error': 'Image is required'}), 400
         
+        if not model_ready():
+            return jsonify({'error': face_engine.NOT_READY_MESSAGE, 'recognized': False, 'success': False}), 503
+        
         # Get attendance mode (default to check_in)
         attendance_mode = data.get('mode', 'check_in')
         
-        # Decode image
-        cv_image = decode_base64_image(data['image'])
-        if cv_image is None:
+        # Decode image and extract face encoding (kiosk id scopes the unchanged-frame check)
+        analysis = analyze_face_image(data['image'], kiosk_id=request_kiosk_id())
+        if analysis is None:
             return jsonify({'error': 'Invalid image format'}), 400
         
-        # Extract face encoding
-        face_data, error = extract_face_encoding(cv_image)
+        # Group mode: everyone in a multi-face frame is matched and recorded together
+        if data.get('group') and analysis.get('faces'):
+            site = face_gallery.site_for(data.get('location'), request_kiosk_id())
+            results = recognize_group(analysis['faces'], attendance_mode, site)
+            recorded = [r for r in results if r['success']]
+            return jsonify({
+                'group': True,
+                'recognized': any(r['recognized'] for r in results),
+                'success': bool(recorded),
+                'face_count': len(results),
+                'recorded_count': len(recorded),
+                'message': ' '.join(r['message'] for r in results if r.get('message'))
+                           or 'No registered faces recognized. Please register first.',
+                'mode': attendance_mode,
+                'faces': results,
+                'timestamp': datetime.datetime.now().isoformat()
+            })
+        
+        face_data, error = analysis['face_data'], analysis['error']
         if error:
             return jsonify({'error': error, 'recognized': False}), 400
         
-        # Find matching person
-        match_result, similarity = find_matching_person(face_data['embedding'])
+        # Rank candidates (kiosk's site gallery first, then company-wide)
+        site = face_gallery.site_for(data.get('location'), request_kiosk_id())
+        with metrics.stage('find_matching_person'):
+            search = rank_candidates(face_data['embedding'], site=site)
+        match_result, similarity = search['match'], search['similarity']
+        # Scores only; names of other candidates are not sent to the kiosk
+        candidates = [{'person_id': pid, 'similarity': round(sim, 4)} for pid, _, sim in search['candidates']]
         
         if match_result is None:
-            # Log unrecognized face attempt
-            log_recognition_attempt(None, similarity, 'unknown', face_data)
+            # Log unrecognized (or ambiguous, when the margin rule rejected it) face attempt
+            ambiguous = search['rejected'] == 'ambiguous'
+            with metrics.stage('log_recognition'):
+                log_recognition_attempt(None, similarity, 'ambiguous' if ambiguous else 'unknown', face_data, search)
             return jsonify({
                 'recognized': False,
-                'message': 'Face not recognized. Please register first.',
+                'message': ('Face match is not certain. Please look directly at the camera.' if ambiguous
+                            else 'Face not recognized. Please register first.'),
                 'similarity': float(similarity),
+                'margin': float(search['margin']),
+                'candidates': candidates,
                 'success': False
             })
         
         person_id, person_name = match_result
         
         # Record attendance with validation
-        attendance_result = record_attendance(person_id, person_name, similarity, face_data, attendance_mode)
+        with metrics.stage('record_attendance'):
+            attendance_result = record_attendance(person_id, person_name, similarity, face_data, attendance_mode)
         
         # Log recognition attempt
         status = 'recognized' if attendance_result['success'] else 'validation_failed'
-        log_recognition_attempt(person_id, similarity, status, face_data)
+        with metrics.stage('log_recognition'):
+            log_recognition_attempt(person_id, similarity, status, face_data, search)
         
         if not attendance_result['success']:
             # Attendance validation failed
@@ -535,6 +830,8 @@ def recognize_face():
                 'person_id': person_id,
                 'person_name': person_name,
                 'similarity': float(similarity),
+                'margin': float(search['margin']),
+                'candidates': candidates,
                 'success': False,
                 'error': attendance_result.get('error'),
                 'message': attendance_result.get('message', 'Attendance validation failed'),
@@ -548,13 +845,16 @@ def recognize_face():
             'person_id': person_id,
             'person_name': person_name,
             'similarity': float(similarity),
+            'margin': float(search['margin']),
+            'candidates': candidates,
             'success': True,
             'attendance_id': attendance_result.get('attendance_id'),
             'mode': attendance_mode,
             'message': attendance_result['message'],
             'timestamp': attendance_result.get('timestamp', datetime.datetime.now().isoformat()),
             'total_hours': attendance_result.get('total_hours'),
-            'status': attendance_result.get('status')
+            'status': attendance_result.get('status'),
+            'offline': attendance_result.get('offline', False)
         })
         
     except Exception as e:
@@ -569,53 +869,15 @@ def get_attendance():
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor = conn.cursor(dictionary=True)
-        
-        # Get query parameters
-        date_filter = request.args.get('date')
-        person_id = request.args.get('person_id')
-        
-        # Join with persons table to get employee details
-        query = """
-            SELECT 
-                ar.*,
-                p.name as person_name,
-                p.department,
-                p.position
-            FROM attendance_records ar
-            LEFT JOIN persons p ON ar.person_id = p.id
-            WHERE 1=1
-        """
-        params = []
-        
-        if date_filter:
-            query += " AND ar.date = %s"
-            params.append(date_filter)
-        
-        if person_id:
-            query += " AND ar.person_id = %s"
-            params.append(person_id)
-        
-        query += " ORDER BY ar.check_in_time DESC"
+        cursor = conn.cursor()
         
+        query, params = queries.attendance_query(request.args.get('date'), request.args.get('person_id'))
         cursor.execute(query, params)
-        attendance_records = cursor.fetchall()
+        attendance_records = rows_from_cursor(cursor)
         conn.close()
         
-        # Convert datetime objects to strings
-        for record in attendance_records:
-            if record.get('check_in_time'):
-                record['check_in_time'] = record['check_in_time'].isoformat()
-            if record.get('check_out_time'):
-                record['check_out_time'] = record['check_out_time'].isoformat()
-            if record.get('date'):
-                record['date'] = record['date'].isoformat()
-            if record.get('created_at'):
-                record['created_at'] = record['created_at'].isoformat()
-            if record.get('updated_at'):
-                record['updated_at'] = record['updated_at'].isoformat()
-        
-        return jsonify(attendance_records)
+        # Datetimes and dates are encoded as ISO 8601 strings by the serializer
+        return json_response(attendance_records)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -626,49 +888,32 @@ def get_present_today():
     try:
         conn = get_db_connection()
         if not conn:
-            return jsonify({'error': 'Database connection failed'}), 500
+            if not JOURNAL_CONFIG['enabled']:
+                return jsonify({'error': 'Database connection failed'}), 500
+            # Serve the offline journal's snapshot of today's attendance
+            currently_present = offline_journal.present_today()
+            return json_response({
+                'date': datetime.date.today(),
+                'present_count': len(currently_present),
+                'employees': currently_present,
+                'offline': True
+            })
         
-        cursor = conn.cursor(dictionary=True)
+        cursor = conn.cursor()
         
         # Get today's date
         today = datetime.date.today()
         
         # Get employees who checked in today and haven't checked out yet
-        query = """
-            SELECT DISTINCT
-                p.id,
-                p.name,
-                p.department,
-                p.position,
-                ar.check_in_time,
-                ar.check_out_time,
-                ar.total_hours
-            FROM persons p
-            INNER JOIN attendance_records ar ON p.id = ar.person_id
-            WHERE ar.date = %s 
-              AND ar.check_in_time IS NOT NULL
-              AND p.status = 'active'
-            ORDER BY ar.check_in_time ASC
-        """
-        
-        cursor.execute(query, (today,))
-        present_employees = cursor.fetchall()
+        cursor.execute(queries.PRESENT_TODAY_QUERY, (today,))
+        present_employees = rows_from_cursor(cursor)
         conn.close()
         
-        # Convert datetime objects to strings and filter currently present
-        currently_present = []
-        for employee in present_employees:
-            if employee.get('check_in_time'):
-                employee['check_in_time'] = employee['check_in_time'].isoformat()
-            if employee.get('check_out_time'):
-                employee['check_out_time'] = employee['check_out_time'].isoformat()
-            
-            # Only include employees who haven't checked out yet (check_out_time is NULL)
-            if not employee.get('check_out_time'):
-                currently_present.append(employee)
+        # Only include employees who haven't checked out yet (check_out_time is NULL)
+        currently_present = [employee for employee in present_employees if not employee['check_out_time']]
         
-        return jsonify({
-            'date': today.isoformat(),
+        return json_response({
+            'date': today,
             'present_count': len(currently_present),
             'employees': currently_present
         })
@@ -678,30 +923,28 @@ def get_present_today():
 
 @app.route('/api/recognition-logs', methods=['GET'])
 def get_recognition_logs():
-    """Get recent recognition attempts for monitoring"""
+    """Get recent recognition attempts for monitoring (cached until a new attempt is logged)"""
+    return response_cache.respond(
+        'recognition_logs',
+        lambda: query_data_version(queries.RECOGNITION_LOGS_VERSION_QUERY),
+        build_recognition_logs_response
+    )
+
+def build_recognition_logs_response():
+    """Query and serialize the 100 most recent recognition attempts"""
     try:
         conn = get_db_connection()
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute("""
-            SELECT rl.*, p.name as person_name
-            FROM recognition_logs rl
-            LEFT JOIN persons p ON rl.person_id = p.id
-            ORDER BY rl.recognition_time DESC
-            LIMIT 100
-        """)
-        
-        logs = cursor.fetchall()
-        conn.close()
+        cursor = conn.cursor()
+        cursor.execute(queries.RECOGNITION_LOGS_QUERY)
         
-        # Convert datetime objects to strings
-        for log in logs:
-            if log.get('recognition_time'):
-                log['recognition_time'] = log['recognition_time'].isoformat()
+        logs = rows_from_cursor(cursor)
+        conn.close()
         
-        return jsonify(logs)
+        # Datetimes are encoded as ISO 8601 strings by the serializer
+        return json_response(logs)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -722,32 +965,11 @@ def export_attendance():
         if not conn:
             return jsonify({'error': 'Database connection failed'}), 500
         
-        # Query attendance data with employee details
-        query = """
-            SELECT 
-                p.employee_id,
-                p.name as employee_name,
-                p.department,
-                p.position,
-                ar.date,
-                ar.check_in_time,
-                ar.check_out_time,
-                ar.total_hours,
-                ar.overtime_hours,
-                ar.status,
-                ar.check_in_method,
-                ar.check_out_method,
-                ar.location,
-                ar.notes
-            FROM attendance_records ar
-            JOIN persons p ON ar.person_id = p.id
-            WHERE ar.date BETWEEN %s AND %s
-            AND p.status = 'active'
-            ORDER BY ar.date DESC, p.name ASC
-        """
+        # Reporting dependencies are only imported when an export is requested
+        import pandas as pd
         
         # Execute query and get data
-        df = pd.read_sql(query, conn, params=[start_date, end_date])
+        df = pd.read_sql(queries.EXPORT_QUERY, conn, params=[start_date, end_date])
         conn.close()
         
         if df.empty:
@@ -855,44 +1077,11 @@ def get_attendance_summary():
         cursor = conn.cursor(dictionary=True)
         
         # Get summary statistics
-        summary_query = """
-            SELECT 
-                COUNT(DISTINCT ar.person_id) as total_employees,
-                COUNT(ar.id) as total_attendance_records,
-                AVG(ar.total_hours) as avg_daily_hours,
-                SUM(ar.total_hours) as total_hours_worked,
-                SUM(ar.overtime_hours) as total_overtime_hours,
-                COUNT(CASE WHEN ar.status = 'late' THEN 1 END) as late_instances,
-                COUNT(CASE WHEN ar.status = 'early_leave' THEN 1 END) as early_leave_instances
-            FROM attendance_records ar
-            JOIN persons p ON ar.person_id = p.id
-            WHERE ar.date BETWEEN %s AND %s
-            AND p.status = 'active'
-        """
-        
-        cursor.execute(summary_query, [start_date, end_date])
+        cursor.execute(queries.SUMMARY_QUERY, [start_date, end_date])
         summary = cursor.fetchone()
         
         # Get employee-wise statistics
-        employee_query = """
-            SELECT 
-                p.employee_id,
-                p.name,
-                p.department,
-                COUNT(ar.id) as days_present,
-                AVG(ar.total_hours) as avg_hours,
-                SUM(ar.total_hours) as total_hours,
-                SUM(ar.overtime_hours) as overtime_hours,
-                COUNT(CASE WHEN ar.status = 'late' THEN 1 END) as late_days
-            FROM persons p
-            LEFT JOIN attendance_records ar ON p.id = ar.person_id 
-                AND ar.date BETWEEN %s AND %s
-            WHERE p.status = 'active'
-            GROUP BY p.id, p.employee_id, p.name, p.department
-            ORDER BY p.name
-        """
-        
-        cursor.execute(employee_query, [start_date, end_date])
+        cursor.execute(queries.EMPLOYEE_SUMMARY_QUERY, [start_date, end_date])
         employees = cursor.fetchall()
         conn.close()
         
@@ -932,10 +1121,46 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.datetime.now().isoformat(),
-        'arcface_loaded': face_app is not None
+        'arcface_loaded': model_ready(),
+        'model': model_status(),
+        'face_cache': face_cache.stats(),
+        'frame_quality': frame_quality_gate.stats(),
+        'admission': admission_controller.stats(),
+        'attendance_calendar': attendance_calendar.stats(),
+        'gallery': face_gallery.stats(),
+        'offline_journal': offline_journal.stats()
+    })
+
+@app.route('/api/gallery/stats', methods=['GET'])
+def gallery_stats():
+    """Per-site gallery shard sizes, hit rates and match latency"""
+    return jsonify({
+        'global_fallback': GALLERY_CONFIG['global_fallback'],
+        'shards': face_gallery.shard_stats()
     })
 
+@app.route('/api/health/live', methods=['GET'])
+def liveness_check():
+    """Liveness probe: the process is up and serving requests"""
+    return jsonify({'status': 'alive', 'timestamp': datetime.datetime.now().isoformat()})
+
+@app.route('/api/health/ready', methods=['GET'])
+def readiness_check():
+    """Readiness probe: the ArcFace model is loaded and warmed up"""
+    ready = model_ready()
+    return jsonify({
+        'status': 'ready' if ready else 'not_ready',
+        'timestamp': datetime.datetime.now().isoformat(),
+        'arcface_loaded': ready,
+        'model': model_status()
+    }), 200 if ready else 503
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus-style metrics scrape endpoint"""
+    return Response(metrics.registry.render(), mimetype='text/plain; version=0.0.4')
+
 if __name__ == '__main__':
     print("Starting Face Recognition Attendance System...")
-    print("ArcFace model loaded and ready!")
+    print("ArcFace model loading in the background (see /api/health/ready)...")
     app.run(debug=True, host='0.0.0.0', port=5000)
@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+"""
+Asyncio serving mode for the attendance API
+Serves the same routes and JSON contracts as app.py from an aiohttp event
+loop, so hundreds of idle dashboard and kiosk keep-alive connections are held
+by the loop instead of one thread each.
+
+  - Dashboard polling routes (attendance list, present today, recognition
+    logs) are native async handlers on an aiomysql connection pool.
+  - Face recognition/detection and person registration run the Flask views in
+    a dedicated thread pool, so model calls never block the loop and cannot be
+    starved by dashboard traffic.
+  - Every other route is bridged to the Flask app (WSGI) in a second pool.
+
+Requires the optional aiohttp and aiomysql packages (see requirements.txt).
+
+Usage:
+    python async_server.py
+    python async_server.py --port 5000 --inference-workers 4
+"""
+
+import argparse
+import asyncio
+import datetime
+import io
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_to_bytes
+
+import aiomysql
+from aiohttp import web
+
+import app as flask_app
+import metrics
+import queries
+from offline_journal import JOURNAL_CONFIG, offline_journal
+from response_cache import RESPONSE_CACHE_CONFIG, response_cache
+from serialization import dumps
+
+# Async server configuration
+ASYNC_CONFIG = {
+    'host': '0.0.0.0',
+    'port': 5000,
+    'db_pool_min': 0,                     # Connect lazily so the server starts while MySQL is down
+    'db_pool_max': 10,                    # MySQL connections shared by all native handlers
+    'inference_workers': 4,               # Threads running recognition/detection/registration views
+    'bridge_workers': 8,                  # Threads running the remaining Flask routes
+    'keepalive_timeout': 75.0,            # Idle keep-alive connections cost no thread, only a socket
+    'max_body_size': 16 * 1024 * 1024     # Base64 kiosk frames exceed aiohttp's 1 MB default
+}
+
+# Routes whose Flask views run model inference (or heavy image work) get their own executor
+INFERENCE_ROUTES = {
+    ('POST', '/api/face-recognition'),
+    ('POST', '/api/face-detection'),
+    ('POST', '/api/persons'),
+}
+
+CORS_HEADERS = {'Access-Control-Allow-Origin': '*'}   # Same as Flask-CORS defaults in app.py
+
+# ===================================================================
+# Native async handlers
+# ===================================================================
+
+async def fetch_raw(pool, query, params=()):
+    """Run a query on the pool and return (column names, row tuples)"""
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            await cursor.execute(query, params)
+            return [column[0] for column in cursor.description], await cursor.fetchall()
+
+def rows_body(columns, rows):
+    """JSON body for rows as dicts (same shape as rows_from_cursor)"""
+    return dumps([dict(zip(columns, row)) for row in rows])
+
+async def fetch_rows(pool, query, params=()):
+    """Run a query on the pool and return rows as dicts (for small, bounded results)"""
+    columns, rows = await fetch_raw(pool, query, params)
+    return [dict(zip(columns, row)) for row in rows]
+
+def json_reply(data, status=200):
+    return web.Response(body=dumps(data), status=status, content_type='application/json', headers=CORS_HEADERS)
+
+def native(route):
+    """Record per-route latency like the Flask hooks, and map errors to the Flask JSON shape"""
+    def decorator(handler):
+        async def wrapper(request):
+            start = time.perf_counter()
+            try:
+                response = await handler(request)
+            except Exception as e:
+                response = json_reply({'error': str(e)}, status=500)
+            if metrics.enabled():
+                metrics.REQUEST_SECONDS.observe(
+                    time.perf_counter() - start, method=request.method, route=route, status=response.status)
+            return response
+        return wrapper
+    return decorator
+
+@native('/api/attendance')
+async def get_attendance(request):
+    query, params = queries.attendance_query(request.query.get('date'), request.query.get('person_id'))
+    columns, rows = await fetch_raw(request.app['db_pool'], query, params)
+    # The list is unbounded: build and serialize it off the loop so kiosks and other dashboards keep flowing
+    loop = asyncio.get_running_loop()
+    body = await loop.run_in_executor(request.app['bridge_executor'], rows_body, columns, rows)
+    return web.Response(body=body, content_type='application/json', headers=CORS_HEADERS)
+
+@native('/api/attendance/present-today')
+async def get_present_today(request):
+    today = datetime.date.today()
+    try:
+        present_employees = await fetch_rows(request.app['db_pool'], queries.PRESENT_TODAY_QUERY, (today,))
+    except (aiomysql.OperationalError, OSError, asyncio.TimeoutError):
+        if not JOURNAL_CONFIG['enabled']:
+            raise
+        # Serve the offline journal's snapshot of today's attendance
+        currently_present = offline_journal.present_today()
+        return json_reply({'date': today, 'present_count': len(currently_present),
+                           'employees': currently_present, 'offline': True})
+    currently_present = [employee for employee in present_employees if not employee['check_out_time']]
+    return json_reply({'date': today, 'present_count': len(currently_present), 'employees': currently_present})
+
+@native('/api/recognition-logs')
+async def get_recognition_logs(request):
+    """Recognition logs through the shared response cache (ETag / 304 like the Flask route)"""
+    pool = request.app['db_pool']
+    name = 'recognition_logs'
+    if not RESPONSE_CACHE_CONFIG['enabled']:
+        return json_reply(await fetch_rows(pool, queries.RECOGNITION_LOGS_QUERY))
+
+    version = response_cache.cached_version(name)
+    if version is None:
+        async with pool.acquire() as conn:
+            async with conn.cursor() as cursor:
+                await cursor.execute(queries.RECOGNITION_LOGS_VERSION_QUERY)
+                version = response_cache.set_version(name, tuple(await cursor.fetchone()))
+
+    entry = response_cache.lookup(name, version)
+    cached = entry is not None
+    if cached:
+        etag, body, _ = entry
+    else:
+        body = dumps(await fetch_rows(pool, queries.RECOGNITION_LOGS_QUERY))
+        etag = response_cache.store(name, version, body, 'application/json')
+
+    headers = {**CORS_HEADERS, 'ETag': f'"{etag}"', 'Cache-Control': 'no-cache'}
+    not_modified = etag in request.headers.get('If-None-Match', '')
+    response_cache.count(not_modified, cached)
+    if not_modified:
+        return web.Response(status=304, headers=headers)
+    return web.Response(body=body, content_type='application/json', headers=headers)
+
+# ===================================================================
+# WSGI bridge for the remaining Flask routes
+# ===================================================================
+
+def wsgi_environ(request, body):
+    """WSGI environ for an aiohttp request"""
+    host, _, port = (request.host or '').partition(':')
+    environ = {
+        'REQUEST_METHOD': request.method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': unquote_to_bytes(request.raw_path.split('?', 1)[0]).decode('latin-1'),
+        'QUERY_STRING': request.query_string,
+        'SERVER_NAME': host or ASYNC_CONFIG['host'],
+        'SERVER_PORT': port or str(ASYNC_CONFIG['port']),
+        'SERVER_PROTOCOL': f'HTTP/{request.version.major}.{request.version.minor}',
+        'REMOTE_ADDR': request.remote or '',
+        'CONTENT_TYPE': request.headers.get('Content-Type', ''),
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': request.scheme,
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in request.headers.items():
+        key = 'HTTP_' + name.upper().replace('-', '_')
+        if key in ('HTTP_CONTENT_TYPE', 'HTTP_CONTENT_LENGTH'):
+            continue
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+def call_wsgi(environ):
+    """Run the Flask app for one request; returns (status, headers, body)"""
+    reply = {}
+
+    def start_response(status, headers, exc_info=None):
+        reply['status'], reply['headers'] = int(status.split(' ', 1)[0]), headers
+
+    chunks = flask_app.app.wsgi_app(environ, start_response)
+    try:
+        body = b''.join(chunks)
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+    return reply['status'], reply['headers'], body
+
+async def bridge(request):
+    """Hand the request to Flask in a worker thread (inference routes use their own pool)"""
+    body = await request.read()
+    environ = wsgi_environ(request, body)
+    key = 'inference_executor' if (request.method, request.path) in INFERENCE_ROUTES else 'bridge_executor'
+    loop = asyncio.get_running_loop()
+    status, headers, body = await loop.run_in_executor(request.app[key], call_wsgi, environ)
+
+    response = web.Response(status=status, body=body)
+    for name, value in headers:
+        if name.lower() not in ('content-length', 'transfer-encoding', 'connection'):
+            response.headers.add(name, value)
+    return response
+
+# ===================================================================
+# Application
+# ===================================================================
+
+async def open_resources(application):
+    db = flask_app.DB_CONFIG
+    application['db_pool'] = await aiomysql.create_pool(
+        host=db['host'], user=db['user'], password=db['password'], db=db['database'], charset=db['charset'],
+        minsize=ASYNC_CONFIG['db_pool_min'], maxsize=ASYNC_CONFIG['db_pool_max'], autocommit=True)
+
+async def close_resources(application):
+    application['db_pool'].close()
+    await application['db_pool'].wait_closed()
+    application['inference_executor'].shutdown(wait=False)
+    application['bridge_executor'].shutdown(wait=False)
+
+def create_app():
+    application = web.Application(client_max_size=ASYNC_CONFIG['max_body_size'])
+    application['inference_executor'] = ThreadPoolExecutor(
+        max_workers=ASYNC_CONFIG['inference_workers'], thread_name_prefix='inference')
+    application['bridge_executor'] = ThreadPoolExecutor(
+        max_workers=ASYNC_CONFIG['bridge_workers'], thread_name_prefix='wsgi-bridge')
+    application.on_startup.append(open_resources)
+    application.on_cleanup.append(close_resources)
+
+    application.router.add_get('/api/attendance', get_attendance)
+    application.router.add_get('/api/attendance/present-today', get_present_today)
+    application.router.add_get('/api/recognition-logs', get_recognition_logs)
+    application.router.add_route('*', '/{tail:.*}', bridge)
+    return application
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the attendance API from an asyncio event loop')
+    parser.add_argument('--host', default=ASYNC_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=ASYNC_CONFIG['port'])
+    parser.add_argument('--inference-workers', type=int, default=ASYNC_CONFIG['inference_workers'])
+    parser.add_argument('--bridge-workers', type=int, default=ASYNC_CONFIG['bridge_workers'])
+    parser.add_argument('--db-pool-max', type=int, default=ASYNC_CONFIG['db_pool_max'])
+    args = parser.parse_args()
+    ASYNC_CONFIG.update(host=args.host, port=args.port, inference_workers=args.inference_workers,
+                        bridge_workers=args.bridge_workers, db_pool_max=args.db_pool_max)
+
+    print("Starting Face Recognition Attendance System (async server)...")
+    print("ArcFace model loading in the background (see /api/health/ready)...")
+    web.run_app(create_app(), host=args.host, port=args.port,
+                keepalive_timeout=ASYNC_CONFIG['keepalive_timeout'])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,204 @@
+# Compiled attendance calendar: system_settings, work_schedules and holidays held in memory
+import datetime
+import threading
+import time
+
+# Calendar configuration
+CALENDAR_CONFIG = {
+    # Seconds between background change checks. The API has no write routes for these tables, so
+    # edits made in the database apply to attendance status within this interval
+    'refresh_interval': 60.0
+}
+
+# Used until settings are loaded, and for settings missing from system_settings
+DEFAULT_SETTINGS = {
+    'default_on_time_start': datetime.time(8, 0, 0),   # On-time window for persons without a schedule
+    'default_on_time_end': datetime.time(9, 30, 0),
+    'late_arrival_threshold': 15,                      # Minutes after scheduled start still on time
+    'early_departure_threshold': 30,                   # Minutes before scheduled end counted as early leave
+    'overtime_threshold': 9.0                          # Hours after which a day counts as overtime
+}
+
+WEEKDAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+
+# Row counts catch deletes, updated_at catches inserts and edits
+VERSION_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM system_settings), (SELECT MAX(updated_at) FROM system_settings),
+        (SELECT COUNT(*) FROM work_schedules), (SELECT MAX(updated_at) FROM work_schedules),
+        (SELECT COUNT(*) FROM holidays), (SELECT MAX(updated_at) FROM holidays)
+"""
+
+def _as_time(value):
+    """TIME columns arrive as timedelta from mysql.connector"""
+    if value is None or isinstance(value, datetime.time):
+        return value
+    if isinstance(value, datetime.timedelta):
+        seconds = int(value.total_seconds()) % 86400
+        return datetime.time(seconds // 3600, (seconds // 60) % 60, seconds % 60)
+    return datetime.time.fromisoformat(str(value))
+
+def _parse_setting(value, setting_type):
+    if setting_type == 'integer':
+        return int(value)
+    if setting_type == 'float':
+        return float(value)
+    if setting_type == 'boolean':
+        return str(value).lower() in ('1', 'true', 'yes')
+    return value
+
+class AttendanceCalendar:
+    """Per-person effective schedules, holidays and attendance rules compiled for O(1) lookups.
+
+    Changes to system_settings, work_schedules and holidays are picked up by
+    the background poll, i.e. within CALENDAR_CONFIG['refresh_interval'].
+    """
+
+    def __init__(self, config=None):
+        self.config = config or CALENDAR_CONFIG
+        self._lock = threading.Lock()
+        self._settings = dict(DEFAULT_SETTINGS)
+        self._schedules = {}        # person_id -> [(effective_from, effective_to, starts, ends)]
+        self._holidays = {}         # date -> holiday name (non-working holidays only)
+        self._day = None            # (date, {person_id: (start, end)}) resolved for one day
+        self._version = None
+        self._connect = None
+        self.loaded_at = None
+        self.reloads = 0
+
+    def start(self, connect):
+        """Load the calendar in the background and keep it refreshed"""
+        self._connect = connect
+        threading.Thread(target=self._refresh_loop, name='attendance-calendar', daemon=True).start()
+
+    def _refresh_loop(self):
+        while True:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing attendance calendar: {e}")
+            time.sleep(self.config['refresh_interval'])
+
+    def refresh(self, force=False):
+        """Reload from the database if any calendar table changed"""
+        conn = self._connect()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute(VERSION_QUERY)
+            version = tuple(cursor.fetchone())
+            if not force and version == self._version:
+                return False
+
+            cursor.execute("SELECT setting_key, setting_value, setting_type FROM system_settings")
+            settings = dict(DEFAULT_SETTINGS)
+            for key, value, setting_type in cursor.fetchall():
+                if key in DEFAULT_SETTINGS and value is not None:
+                    try:
+                        if isinstance(DEFAULT_SETTINGS[key], datetime.time):
+                            settings[key] = _as_time(value)
+                        else:
+                            settings[key] = _parse_setting(value, setting_type)
+                    except ValueError:
+                        print(f"Ignoring invalid system setting {key}={value!r}")
+
+            columns = ', '.join(f"{day}_start, {day}_end" for day in WEEKDAYS)
+            cursor.execute(f"""
+                SELECT person_id, effective_from, effective_to, {columns}
+                FROM work_schedules
+                WHERE is_active = TRUE
+                ORDER BY person_id, effective_from DESC
+            """)
+            schedules = {}
+            for row in cursor.fetchall():
+                person_id, effective_from, effective_to = row[0], row[1], row[2]
+                times = [_as_time(v) for v in row[3:]]
+                starts, ends = tuple(times[0::2]), tuple(times[1::2])
+                schedules.setdefault(person_id, []).append((effective_from, effective_to, starts, ends))
+
+            cursor.execute("SELECT date, name FROM holidays WHERE is_working_day = FALSE")
+            holidays = {day: name for day, name in cursor.fetchall()}
+        finally:
+            conn.close()
+
+        with self._lock:
+            self._settings = settings
+            self._schedules = schedules
+            self._holidays = holidays
+            self._day = None
+            self._version = version
+            self.loaded_at = datetime.datetime.now()
+            self.reloads += 1
+        return True
+
+    def _day_rules(self, day):
+        """Resolve every person's schedule for one day (once per day, lock held)"""
+        if self._day is None or self._day[0] != day:
+            weekday = day.weekday()
+            rules = {}
+            for person_id, entries in self._schedules.items():
+                for effective_from, effective_to, starts, ends in entries:
+                    if effective_from <= day and (effective_to is None or day <= effective_to):
+                        rules[person_id] = (starts[weekday], ends[weekday])
+                        break
+            self._day = (day, rules)
+        return self._day[1]
+
+    def evaluate_check_in(self, person_id, check_in_time):
+        """Return (status, status_message) for a check-in at check_in_time"""
+        day = check_in_time.date()
+        with self._lock:
+            holiday = self._holidays.get(day)
+            rule = self._day_rules(day).get(person_id)
+            settings = self._settings
+
+        if holiday:
+            return 'present', f"holiday: {holiday}"
+
+        check_in_only = check_in_time.time()
+        if rule is None:
+            # No schedule for this person: company-wide on-time window
+            if settings['default_on_time_start'] <= check_in_only <= settings['default_on_time_end']:
+                return 'present', "on time"
+            return 'late', "late"
+
+        start, _ = rule
+        if start is None:
+            return 'present', "unscheduled day"
+
+        grace_end = datetime.datetime.combine(day, start) + datetime.timedelta(minutes=settings['late_arrival_threshold'])
+        if check_in_time <= grace_end:
+            return 'present', "on time"
+        return 'late', "late"
+
+    def evaluate_check_out(self, person_id, check_out_time, total_hours):
+        """Return (status, status_message) for a check-out after total_hours worked"""
+        day = check_out_time.date()
+        with self._lock:
+            holiday = day in self._holidays
+            rule = self._day_rules(day).get(person_id)
+            settings = self._settings
+
+        if total_hours > settings['overtime_threshold']:
+            return 'overtime', f"with overtime ({total_hours} hours)"
+
+        end = rule[1] if rule else None
+        if end is not None and not holiday:
+            leave_limit = datetime.datetime.combine(day, end) - datetime.timedelta(minutes=settings['early_departure_threshold'])
+            if check_out_time < leave_limit:
+                return 'early_leave', f"({total_hours} hours worked, early leave)"
+
+        return 'present', f"({total_hours} hours worked)"
+
+    def stats(self):
+        """Calendar state for health endpoints"""
+        with self._lock:
+            return {
+                'loaded_at': self.loaded_at.isoformat() if self.loaded_at else None,
+                'reloads': self.reloads,
+                'scheduled_persons': len(self._schedules),
+                'holidays': len(self._holidays)
+            }
+
+attendance_calendar = AttendanceCalendar()
@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+Backend benchmark suite
+Runs the recognition, attendance and reporting code paths of app.py against
+an in-process SQLite stand-in (stub_db.py) with synthetic galleries, and
+writes machine-readable JSON results.
+
+Usage:
+    python benchmark.py --gallery-sizes 1000,10000 --output bench.json
+    python benchmark.py --frames-dir recorded_frames/ --baseline bench.json --max-regression 0.2
+"""
+
+import argparse
+import base64
+import datetime
+import glob
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from stub_db import StubDatabase
+
+def percentile(sorted_samples, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, max(0, math.ceil(pct / 100.0 * len(sorted_samples)) - 1))
+    return sorted_samples[index]
+
+def summarize(samples):
+    """Latency summary in milliseconds"""
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        'n': len(ordered),
+        'mean_ms': round(statistics.fmean(ordered) * 1000, 3) if ordered else 0.0,
+        'p50_ms': round(percentile(ordered, 50) * 1000, 3),
+        'p95_ms': round(percentile(ordered, 95) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 99) * 1000, 3),
+        'min_ms': round(ordered[0] * 1000, 3) if ordered else 0.0,
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0,
+        'ops_per_sec': round(len(ordered) / total, 2) if total > 0 else 0.0
+    }
+
+def time_calls(func, repeat, warmup=1):
+    """Call func() repeatedly and return per-call durations in seconds"""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+def load_frames(frames_dir, count, seed):
+    """Recorded kiosk frames from a directory, or synthetic 640x480 frames"""
+    import cv2
+    import numpy as np
+
+    frames = []
+    if frames_dir:
+        for path in sorted(glob.glob(os.path.join(frames_dir, '*')))[:count]:
+            image = cv2.imread(path)
+            if image is not None:
+                frames.append((os.path.basename(path), image))
+        if not frames:
+            print(f"No readable frames in {frames_dir}, using synthetic frames", file=sys.stderr)
+
+    if not frames:
+        rng = np.random.default_rng(seed)
+        for i in range(count):
+            # Smooth gradient plus noise: passes decode and exercises detection without faces
+            gradient = np.linspace(40, 200, 640, dtype=np.float32)[None, :, None]
+            noise = rng.normal(0, 12, (480, 640, 3)).astype(np.float32)
+            image = np.clip(gradient + noise, 0, 255).astype(np.uint8)
+            frames.append((f"synthetic_{i}", image))
+
+    return frames
+
+def bench_find_matching_person(app_module, sizes, repeat, seed, sites=0):
+    """find_matching_person latency vs gallery size (site-scoped when sites > 0)"""
+    import numpy as np
+
+    results = {}
+    for size in sizes:
+        db = StubDatabase()
+        print(f"   Seeding gallery of {size} persons...", file=sys.stderr)
+        embeddings = db.seed_gallery(size, seed=seed, sites=sites)
+        app_module.get_db_connection = db.connect
+        app_module.face_gallery.invalidate()
+
+        rng = np.random.default_rng(seed + 1)
+        probes = []
+        for _ in range(repeat + 1):
+            # Genuine probe: a gallery template plus noise
+            index = int(rng.integers(0, size))
+            base = embeddings[index]
+            probe = base + rng.normal(0, 0.01, base.shape).astype(np.float32)
+            site = f"site-{index % sites}" if sites else None
+            probes.append(((probe / np.linalg.norm(probe)).tolist(), site))
+
+        probe_iter = iter(probes)
+
+        def call():
+            embedding, site = next(probe_iter)
+            return app_module.find_matching_person(embedding, site=site)
+
+        start = time.perf_counter()
+        app_module.face_gallery.refresh(force=True)
+        load_ms = round((time.perf_counter() - start) * 1000, 3)
+
+        result = summarize(time_calls(call, repeat))
+        result['gallery_load_ms'] = load_ms
+        results[str(size)] = result
+        db.close()
+    return results
+
+def bench_extract_face_encoding(app_module, frames, repeat):
+    """Decode + extract_face_encoding latency over recorded or synthetic frames"""
+    import cv2
+
+    encoded = []
+    for name, image in frames:
+        ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+        if ok:
+            encoded.append('data:image/jpeg;base64,' + base64.b64encode(buffer.tobytes()).decode())
+
+    decode_samples, extract_samples = [], []
+    for i in range(repeat):
+        payload = encoded[i % len(encoded)]
+        start = time.perf_counter()
+        image = app_module.face_engine.decode_base64_image(payload)
+        decode_samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        app_module.face_engine.extract_face_encoding(image)
+        extract_samples.append(time.perf_counter() - start)
+
+    return {
+        'frames': len(encoded),
+        'decode_base64_image': summarize(decode_samples),
+        'extract_face_encoding': summarize(extract_samples)
+    }
+
+def bench_record_attendance(app_module, repeat, seed):
+    """record_attendance check-in and check-out latency"""
+    db = StubDatabase()
+    db.seed_gallery(max(repeat, 10), dim=8, seed=seed)
+    app_module.get_db_connection = db.connect
+
+    person_ids = list(range(1, repeat + 1))
+    check_in, check_out = [], []
+    for person_id in person_ids:
+        start = time.perf_counter()
+        app_module.record_attendance(person_id, f"Synthetic Person {person_id}", 0.9, {}, 'check_in')
+        check_in.append(time.perf_counter() - start)
+    for person_id in person_ids:
+        start = time.perf_counter()
+        app_module.record_attendance(person_id, f"Synthetic Person {person_id}", 0.9, {}, 'check_out')
+        check_out.append(time.perf_counter() - start)
+
+    db.close()
+    return {'check_in': summarize(check_in), 'check_out': summarize(check_out)}
+
+def bench_reports(app_module, persons, days, repeat, seed):
+    """Export and summary endpoint latency through the Flask test client"""
+    db = StubDatabase()
+    db.seed_gallery(persons, dim=8, seed=seed)
+    rows = db.seed_attendance(days=days, seed=seed)
+    app_module.get_db_connection = db.connect
+
+    end_date = datetime.date.today()
+    start_date = end_date - datetime.timedelta(days=days)
+    query = f"start_date={start_date.isoformat()}&end_date={end_date.isoformat()}"
+    client = app_module.app.test_client()
+
+    results = {'persons': persons, 'attendance_rows': rows}
+    endpoints = {
+        'attendance_summary': f"/api/attendance/summary?{query}",
+        'export_csv': f"/api/attendance/export?{query}&format=csv",
+        'export_excel': f"/api/attendance/export?{query}&format=excel",
+        'attendance_list': "/api/attendance",
+    }
+    for name, url in endpoints.items():
+        def call():
+            response = client.get(url)
+            if response.status_code != 200:
+                raise RuntimeError(f"{url} returned {response.status_code}")
+        results[name] = summarize(time_calls(call, repeat))
+
+    db.close()
+    return results
+
+def bench_serialization(app_module, persons, days, repeat, seed):
+    """Attendance list serialization: per-row isoformat + jsonify vs the serialization layer"""
+    import serialization
+
+    db = StubDatabase()
+    db.seed_gallery(persons, dim=8, seed=seed)
+    db.seed_attendance(days=days, seed=seed)
+    conn = db.connect()
+    cursor = conn.cursor()
+    cursor.execute("""
+        SELECT ar.*, p.name as person_name, p.department, p.position
+        FROM attendance_records ar
+        LEFT JOIN persons p ON ar.person_id = p.id
+        ORDER BY ar.check_in_time DESC
+    """)
+    columns = [column[0] for column in cursor.description]
+    rows = cursor.fetchall()
+    conn.close()
+    db.close()
+
+    def legacy():
+        # What the routes did before: dict rows, isoformat per field, then jsonify
+        records = [dict(zip(columns, row)) for row in rows]
+        for record in records:
+            for field in ('check_in_time', 'check_out_time', 'date', 'created_at', 'updated_at'):
+                if record.get(field):
+                    record[field] = record[field].isoformat()
+        with app_module.app.app_context():
+            return app_module.jsonify(records).get_data()
+
+    def fast():
+        return serialization.dumps([dict(zip(columns, row)) for row in rows])
+
+    return {
+        'rows': len(rows),
+        'encoder': serialization.encoder_name(),
+        'legacy_jsonify': summarize(time_calls(legacy, repeat)),
+        'serialization': summarize(time_calls(fast, repeat)),
+        'response_bytes': len(fast())
+    }
+
+def environment_info():
+    """Machine and code version the results were produced on"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = None
+    return {
+        'timestamp': datetime.datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpu_count': os.cpu_count(),
+        'git_commit': commit or None
+    }
+
+def compare_with_baseline(results, baseline, max_regression, path=()):
+    """Return list of (metric path, baseline p50, current p50) that regressed"""
+    regressions = []
+    for key, value in results.items():
+        if key not in baseline:
+            continue
+        if isinstance(value, dict) and 'p50_ms' in value and isinstance(baseline[key], dict):
+            old, new = baseline[key].get('p50_ms', 0), value['p50_ms']
+            if old > 0 and new > old * (1 + max_regression):
+                regressions.append(('.'.join(path + (key,)), old, new))
+        elif isinstance(value, dict) and isinstance(baseline[key], dict):
+            regressions.extend(compare_with_baseline(value, baseline[key], max_regression, path + (key,)))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the attendance backend against a stub database')
+    parser.add_argument('--gallery-sizes', default='1000,10000',
+                        help='Comma-separated gallery sizes for find_matching_person (up to 200000)')
+    parser.add_argument('--sites', type=int, default=0,
+                        help='Spread the matching gallery over this many sites and probe site-first (default: none)')
+    parser.add_argument('--repeat', type=int, default=50, help='Timed calls per benchmark')
+    parser.add_argument('--frames-dir', help='Directory of recorded kiosk frames (jpg/png)')
+    parser.add_argument('--report-persons', type=int, default=200, help='Persons for export/summary benchmarks')
+    parser.add_argument('--report-days', type=int, default=30, help='Days of attendance for export/summary benchmarks')
+    parser.add_argument('--only', help='Comma-separated subset: matching,extraction,attendance,reports,serialization')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    parser.add_argument('--baseline', help='Previous JSON results to compare p50 latencies against')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Allowed relative p50 slowdown vs baseline before failing (default 0.2)')
+    args = parser.parse_args()
+
+    selected = set((args.only or 'matching,extraction,attendance,reports,serialization').split(','))
+    sizes = [int(s) for s in args.gallery_sizes.split(',') if s]
+
+    # Keep benchmark runs away from the kiosk's offline journal and gallery snapshot
+    from gallery import GALLERY_CONFIG
+    from offline_journal import JOURNAL_CONFIG
+    GALLERY_CONFIG['snapshot_path'] = None
+    JOURNAL_CONFIG['enabled'] = False
+
+    print("Loading app module...", file=sys.stderr)
+    import app as app_module
+
+    results = {'environment': environment_info(), 'benchmarks': {}}
+    benchmarks = results['benchmarks']
+
+    if 'matching' in selected:
+        print("Benchmarking find_matching_person...", file=sys.stderr)
+        benchmarks['find_matching_person'] = bench_find_matching_person(app_module, sizes, args.repeat, args.seed, args.sites)
+
+    if 'extraction' in selected:
+        print("Benchmarking extract_face_encoding...", file=sys.stderr)
+        frames = load_frames(args.frames_dir, min(args.repeat, 50), args.seed)
+        benchmarks['extract_face_encoding'] = bench_extract_face_encoding(app_module, frames, args.repeat)
+
+    if 'attendance' in selected:
+        print("Benchmarking record_attendance...", file=sys.stderr)
+        benchmarks['record_attendance'] = bench_record_attendance(app_module, args.repeat, args.seed)
+
+    if 'reports' in selected:
+        print("Benchmarking export/summary endpoints...", file=sys.stderr)
+        benchmarks['reports'] = bench_reports(app_module, args.report_persons, args.report_days,
+                                              max(1, args.repeat // 5), args.seed)
+
+    if 'serialization' in selected:
+        print("Benchmarking JSON serialization...", file=sys.stderr)
+        benchmarks['serialization'] = bench_serialization(app_module, args.report_persons, args.report_days,
+                                                          max(1, args.repeat // 5), args.seed)
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f).get('benchmarks', {})
+        regressions = compare_with_baseline(benchmarks, baseline, args.max_regression)
+        for name, old, new in regressions:
+            print(f"REGRESSION {name}: p50 {old:.3f} ms -> {new:.3f} ms", file=sys.stderr)
+        if regressions:
+            return 1
+        print("No regressions against baseline", file=sys.stderr)
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Query-plan regression check for the hot API queries
+Runs EXPLAIN on every statement in HOT_QUERIES (SQL from queries.py) against
+a seeded attendance_system database and fails when a plan does a full table
+scan (type ALL) or a filesort that the query does not explicitly allow.
+
+Small tables make the optimizer prefer scans, so seed a realistic dataset first:
+
+    python ../FINAL_setup_database.py --generate --persons 20000 --days 365
+    python check_query_plans.py --output query_plans.json
+    python check_query_plans.py --verbose --min-rows 0
+
+--output records every plan row (with MySQL version and table sizes) so a
+run can be attached to the change that altered a query or index.
+"""
+
+import argparse
+import datetime
+import json
+import sys
+
+import mysql.connector
+
+import queries
+from offline_journal import TODAY_QUERY
+
+# Same database as app.py
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '',  # Update this if you have a password
+    'database': 'attendance_system',
+    'charset': 'utf8mb4',
+}
+
+# name -> (build(sample) -> (sql, params), allowances). Allowances name the table aliases a plan
+# may scan in full, and whether it may filesort (True, or up to N estimated rows); every
+# allowance carries its reason. They state what the indexes are designed to do; confirm them
+# with a recorded run (--output) against a seeded database.
+HOT_QUERIES = {
+    'open_record': (
+        lambda s: (queries.OPEN_RECORD_QUERY, (s['person_id'], s['day'])), {}),
+    'gallery_templates': (
+        lambda s: (queries.GALLERY_TEMPLATES_QUERY, ()), {
+            # Loads every primary template; when nearly all templates are primary a scan is cheapest
+            'full_scan': {'fe'},
+        }),
+    'persons_version': (
+        lambda s: (queries.PERSONS_VERSION_QUERY, ()), {}),
+    'persons_list': (
+        lambda s: (queries.PERSONS_QUERY, ()), {
+            # Returns every person
+            'full_scan': {'persons'},
+            'filesort': True,
+        }),
+    'attendance_by_date': (
+        lambda s: queries.attendance_query(s['day']), {}),
+    'attendance_by_person_date': (
+        lambda s: queries.attendance_query(s['day'], s['person_id']), {
+            # idx_attendance_person_open has check_out_time between date and check_in_time, so one
+            # person's records for the day come back unordered; sorting those few rows is expected
+            'filesort': 10,
+        }),
+    'present_today': (
+        lambda s: (queries.PRESENT_TODAY_QUERY, (s['day'],)), {}),
+    'recognition_logs': (
+        lambda s: (queries.RECOGNITION_LOGS_QUERY, ()), {}),
+    'recognition_logs_version': (
+        lambda s: (queries.RECOGNITION_LOGS_VERSION_QUERY, ()), {}),
+    'export_range': (
+        lambda s: (queries.EXPORT_QUERY, (s['range_start'], s['day'])), {
+            # Sort key spans two tables (date, person name)
+            'filesort': True,
+        }),
+    'summary_range': (
+        lambda s: (queries.SUMMARY_QUERY, (s['range_start'], s['day'])), {}),
+    'employee_summary_range': (
+        lambda s: (queries.EMPLOYEE_SUMMARY_QUERY, (s['range_start'], s['day'])), {
+            # One row per active person, grouped by id and sorted by name
+            'full_scan': {'p'},
+            'filesort': True,
+        }),
+    'journal_today_snapshot': (
+        lambda s: (TODAY_QUERY, (s['day'],)), {}),
+}
+
+def load_sample(cursor, range_days):
+    """Parameters that hit real data: the latest attendance day and a person present on it"""
+    cursor.execute("SELECT MAX(date) FROM attendance_records")
+    day = cursor.fetchone()[0] or datetime.date.today()
+    cursor.execute("SELECT person_id FROM attendance_records WHERE date = %s LIMIT 1", (day,))
+    row = cursor.fetchone()
+    return {
+        'day': day,
+        'person_id': row[0] if row else 1,
+        'range_start': day - datetime.timedelta(days=range_days),
+    }
+
+def explain(cursor, sql, params):
+    cursor.execute("EXPLAIN " + sql, params)
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+def violations(plan, allowances):
+    """Plan rows that scan a table or filesort without an allowance"""
+    problems = []
+    sort_limit = allowances.get('filesort', False)
+    for row in plan:
+        table = row.get('table')
+        extra = row.get('Extra') or ''
+        rows = row.get('rows') or 0
+        if row.get('type') == 'ALL' and table not in allowances.get('full_scan', ()):
+            problems.append(f"full scan of {table} (~{rows} rows)")
+        if 'Using filesort' in extra and (sort_limit is False or (sort_limit is not True and rows > sort_limit)):
+            problems.append(f"filesort on {table} (~{rows} rows)")
+    return problems
+
+def main():
+    parser = argparse.ArgumentParser(description='EXPLAIN the hot API queries and fail on plan regressions')
+    parser.add_argument('--range-days', type=int, default=30, help='Date range for export/summary queries')
+    parser.add_argument('--min-rows', type=int, default=10000,
+                        help='Refuse to judge plans when attendance_records has fewer rows (0 disables)')
+    parser.add_argument('--verbose', action='store_true', help='Print every plan row')
+    parser.add_argument('--output', help='Write every plan (and the verdicts) to this JSON file')
+    args = parser.parse_args()
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    cursor.execute("SELECT COUNT(*) FROM attendance_records")
+    attendance_rows = cursor.fetchone()[0]
+    if attendance_rows < args.min_rows:
+        print(f"attendance_records has {attendance_rows} rows; seed at least {args.min_rows} "
+              f"(FINAL_setup_database.py --generate) so plans reflect production", file=sys.stderr)
+        conn.close()
+        return 2
+
+    sample = load_sample(cursor, args.range_days)
+    cursor.execute("SELECT VERSION()")
+    record = {
+        'mysql_version': cursor.fetchone()[0],
+        'checked_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'attendance_rows': attendance_rows,
+        'sample': {key: str(value) for key, value in sample.items()},
+        'queries': {}
+    }
+    failed = 0
+    for name, (build, allowances) in HOT_QUERIES.items():
+        plan = explain(cursor, *build(sample))
+        problems = violations(plan, allowances)
+        failed += bool(problems)
+        record['queries'][name] = {'plan': plan, 'problems': problems}
+
+        keys = ', '.join(f"{row.get('table')}:{row.get('type')}/{row.get('key') or '-'}" for row in plan)
+        print(f"{'FAIL' if problems else 'ok  '} {name:<28} {keys}")
+        for problem in problems:
+            print(f"       {problem}")
+        if args.verbose:
+            for row in plan:
+                print(f"       {row.get('table')}: type={row.get('type')} key={row.get('key')} "
+                      f"rows={row.get('rows')} extra={row.get('Extra')}")
+    conn.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(record, f, indent=2, default=str)
+        print(f"Plans written to {args.output}")
+    print(f"\n{len(HOT_QUERIES) - failed}/{len(HOT_QUERIES)} query plans ok")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
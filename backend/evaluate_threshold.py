@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Offline match-threshold evaluation
+Sweeps the similarity threshold (and optionally the margin rule) over probe
+embeddings logged in recognition_embeddings (enable GALLERY_CONFIG
+['log_embeddings'] in gallery.py) against the current primary gallery, and
+reports FAR/FRR curves and the equal error rate without re-running the model.
+
+Decision rule (same as FaceGallery.search): accept the best person when
+similarity >= threshold and best - second-best >= margin.
+
+  FRR: genuine probes not accepted as their own person
+  FAR: impostor attempts accepted as someone. Each genuine probe is also
+       scored against the gallery without its own person, which simulates
+       an unregistered face. Probes labelled as not enrolled count as well.
+
+Labels come from --labels (CSV: log_id,person_id; empty or 0 = not enrolled)
+or, by default, from logged matches with similarity >= --label-threshold.
+Pseudo-labels only contain confident matches, so FRR is optimistic.
+
+Usage:
+    python evaluate_threshold.py --since 2025-01-01 --margins 0,0.03,0.05
+    python evaluate_threshold.py --labels reviewed.csv --output curve.json
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+import mysql.connector
+import numpy as np
+
+# Same database as app.py
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '',  # Update this if you have a password
+    'database': 'attendance_system',
+    'charset': 'utf8mb4',
+}
+
+def load_gallery(cursor):
+    """One unit-normalized primary template per active person: (person_ids, matrix)"""
+    cursor.execute("""
+        SELECT fe.person_id, fe.encoding_data
+        FROM face_encodings fe
+        JOIN persons p ON fe.person_id = p.id
+        WHERE fe.is_primary = true AND p.status = 'active'
+        ORDER BY fe.id
+    """)
+    templates = {}
+    for person_id, encoding_data in cursor.fetchall():
+        templates[person_id] = json.loads(encoding_data)  # Latest primary wins
+    person_ids = np.asarray(list(templates))
+    matrix = np.asarray(list(templates.values()), dtype=np.float32)
+    return person_ids, matrix / np.linalg.norm(matrix, axis=1, keepdims=True)
+
+def load_probes(cursor, since, labels, label_threshold, unknown_as_impostors):
+    """Logged embeddings with labels: (log_ids, matrix, labels), label 0 = not enrolled"""
+    query = """
+        SELECT re.log_id, re.embedding_data, rl.person_id, rl.confidence_score, rl.error_message
+        FROM recognition_embeddings re
+        JOIN recognition_logs rl ON re.log_id = rl.id
+    """
+    params = []
+    if since:
+        query += " WHERE rl.recognition_time >= %s"
+        params.append(since)
+    cursor.execute(query, params)
+
+    log_ids, vectors, probe_labels = [], [], []
+    for log_id, embedding_data, person_id, confidence, error_message in cursor.fetchall():
+        if labels is not None:
+            if log_id not in labels:
+                continue
+            label = labels[log_id]
+        elif person_id is not None and confidence >= label_threshold:
+            label = person_id
+        elif unknown_as_impostors and error_message == 'Face not recognized':
+            label = 0
+        else:
+            continue
+        log_ids.append(log_id)
+        vectors.append(json.loads(embedding_data))
+        probe_labels.append(label)
+
+    if not vectors:
+        return np.asarray([]), np.zeros((0, 0), dtype=np.float32), np.asarray([])
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return np.asarray(log_ids), matrix / np.linalg.norm(matrix, axis=1, keepdims=True), np.asarray(probe_labels)
+
+def read_labels(path):
+    """log_id -> person_id (0 for not enrolled) from a reviewed CSV"""
+    labels = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            labels[int(row['log_id'])] = int(row['person_id'] or 0)
+    return labels
+
+def score_probes(probes, labels, person_ids, gallery, chunk_size=1024):
+    """Per-probe scores needed by the decision rule, in one vectorized pass per chunk.
+
+    Returns dict of arrays: top1, top2 and top1_person over the full gallery,
+    other1 and other2 over the gallery without the probe's own person.
+    """
+    column_of = {pid: i for i, pid in enumerate(person_ids.tolist())}
+    own = np.asarray([column_of.get(label, -1) for label in labels.tolist()])
+    results = {name: [] for name in ('top1', 'top2', 'top1_person', 'other1', 'other2')}
+
+    for start in range(0, len(probes), chunk_size):
+        scores = probes[start:start + chunk_size] @ gallery.T
+        rows = np.arange(len(scores))
+        chunk_own = own[start:start + chunk_size]
+
+        best = np.argmax(scores, axis=1)
+        top2 = np.partition(scores, -2, axis=1)[:, -2:]
+        results['top1'].append(top2[:, 1])
+        results['top2'].append(top2[:, 0])
+        results['top1_person'].append(person_ids[best])
+
+        masked = scores.copy()
+        enrolled = chunk_own >= 0
+        masked[rows[enrolled], chunk_own[enrolled]] = -np.inf
+        other = np.partition(masked, -2, axis=1)[:, -2:]
+        results['other1'].append(other[:, 1])
+        results['other2'].append(other[:, 0])
+
+    return {name: np.concatenate(parts) for name, parts in results.items()}
+
+def sweep(scores, labels, thresholds, margin):
+    """FAR/FRR for each threshold at one margin"""
+    genuine = labels > 0
+    t = thresholds[None, :]
+
+    passes_margin = (scores['top1'] - scores['top2'] >= margin)[:, None]
+    accepted = (scores['top1'][:, None] >= t) & passes_margin
+    correct = accepted & (scores['top1_person'] == labels)[:, None]
+
+    # Simulated impostors: genuine probes against the gallery without their own person
+    simulated = (scores['other1'][:, None] >= t) & (scores['other1'] - scores['other2'] >= margin)[:, None]
+    impostor_accepts = simulated[genuine].sum(axis=0) + accepted[~genuine].sum(axis=0)
+    misidentified = (accepted & ~correct)[genuine].sum(axis=0)
+
+    n_genuine = max(1, genuine.sum())
+    frr = 1.0 - correct[genuine].sum(axis=0) / n_genuine
+    far = impostor_accepts / len(labels)
+    eer_index = int(np.argmin(np.abs(far - frr)))
+    return {
+        'margin': margin,
+        'curve': [
+            {'threshold': round(float(th), 4), 'far': round(float(a), 6), 'frr': round(float(r), 6),
+             'misidentification_rate': round(float(m) / n_genuine, 6)}
+            for th, a, r, m in zip(thresholds, far, frr, misidentified)
+        ],
+        'eer': round(float((far[eer_index] + frr[eer_index]) / 2), 6),
+        'eer_threshold': round(float(thresholds[eer_index]), 4)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Sweep match thresholds over logged recognition embeddings')
+    parser.add_argument('--since', help='Only use attempts logged on or after this date (YYYY-MM-DD)')
+    parser.add_argument('--labels', help='CSV of reviewed labels: log_id,person_id (0 or empty = not enrolled)')
+    parser.add_argument('--label-threshold', type=float, default=0.75,
+                        help='Without --labels, logged matches at or above this similarity are genuine')
+    parser.add_argument('--unknown-as-impostors', action='store_true',
+                        help="Without --labels, treat 'Face not recognized' attempts as not enrolled")
+    parser.add_argument('--thresholds', default='0.30:0.90:0.01', help='start:stop:step (default 0.30:0.90:0.01)')
+    parser.add_argument('--margins', default='0', help='Comma-separated margin values to evaluate')
+    parser.add_argument('--output', help='Write JSON curves to this file')
+    args = parser.parse_args()
+
+    start, stop, step = (float(x) for x in args.thresholds.split(':'))
+    thresholds = np.arange(start, stop + step / 2, step)
+    margins = [float(m) for m in args.margins.split(',') if m]
+    labels = read_labels(args.labels) if args.labels else None
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    person_ids, gallery = load_gallery(cursor)
+    log_ids, probes, probe_labels = load_probes(cursor, args.since, labels, args.label_threshold,
+                                                args.unknown_as_impostors)
+    conn.close()
+
+    # Genuine probes of persons no longer in the gallery cannot be scored
+    if len(probes):
+        keep = (probe_labels == 0) | np.isin(probe_labels, person_ids)
+        log_ids, probes, probe_labels = log_ids[keep], probes[keep], probe_labels[keep]
+
+    if len(person_ids) < 2 or len(probes) == 0:
+        print("Need at least 2 enrolled persons and some labelled logged embeddings "
+              "(enable log_embeddings in gallery.py)", file=sys.stderr)
+        return 1
+
+    genuine = int((probe_labels > 0).sum())
+    print(f"Gallery: {len(person_ids)} persons; probes: {len(probes)} "
+          f"({genuine} genuine, {len(probes) - genuine} not enrolled)", file=sys.stderr)
+
+    scores = score_probes(probes, probe_labels, person_ids, gallery)
+    results = {
+        'gallery_persons': int(len(person_ids)),
+        'probes': int(len(probes)),
+        'genuine_probes': genuine,
+        'pseudo_labels': labels is None,
+        'curves': [sweep(scores, probe_labels, thresholds, margin) for margin in margins]
+    }
+
+    for curve in results['curves']:
+        print(f"\nmargin {curve['margin']}: EER {curve['eer']:.4f} at threshold {curve['eer_threshold']}")
+        print(f"  {'threshold':>9} {'FAR':>9} {'FRR':>9} {'misid':>9}")
+        for point in curve['curve']:
+            print(f"  {point['threshold']:>9.2f} {point['far']:>9.4f} {point['frr']:>9.4f} "
+                  f"{point['misidentification_rate']:>9.4f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.output}", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# Face analysis result cache keyed by image content hash
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+# Cache configuration
+FACE_CACHE_CONFIG = {
+    'enabled': True,
+    'max_entries': 256,    # Bounded LRU size
+    'ttl_seconds': 30.0    # Kiosk retries and registration re-posts land well inside this window
+}
+
+def image_content_key(image_bytes):
+    """Fast content hash of raw image bytes used as the cache key"""
+    return hashlib.blake2b(image_bytes, digest_size=16).hexdigest()
+
+class FaceAnalysisCache:
+    """Thread-safe LRU cache with TTL for face analysis results"""
+
+    def __init__(self, max_entries=256, ttl_seconds=30.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Return cached value for key or None if missing/expired"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            stored_at, value = entry
+            if now - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Store value for key, evicting least recently used entries"""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+face_cache = FaceAnalysisCache(
+    max_entries=FACE_CACHE_CONFIG['max_entries'],
+    ttl_seconds=FACE_CACHE_CONFIG['ttl_seconds']
+)
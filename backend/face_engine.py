@@ -0,0 +1,250 @@
+# ArcFace model lifecycle (background loading, warm-up, readiness) and face extraction
+import base64
+import threading
+import time
+from io import BytesIO
+import cv2
+import numpy as np
+from PIL import Image
+
+# Model configuration
+MODEL_CONFIG = {
+    'allowed_modules': ['detection', 'recognition'],
+    'ctx_id': 0,
+    'det_size': (640, 640),
+    'background': True,            # Load in a daemon thread instead of blocking import
+    'warmup_shape': (480, 640, 3), # Dummy frame for the warm-up inference (kiosk capture size)
+    'group_mode': False,           # Embed every face of multi-face frames (kiosks opt in per request)
+    'group_max_faces': 8,          # Largest faces kept per group frame
+    'group_min_face_size': 80      # Pixels; smaller (distant) faces in group frames are skipped
+}
+
+NOT_READY_MESSAGE = "Face recognition model is still loading. Please try again shortly."
+
+_model = None
+_ready = threading.Event()
+_lock = threading.Lock()
+_state = {
+    'status': 'not_started',   # not_started | loading | ready | failed
+    'error': None,
+    'started_at': None,
+    'load_seconds': None,
+    'warmup_seconds': None
+}
+
+def _load_model():
+    """Import insightface, prepare the model and run one warm-up inference"""
+    global _model
+    started = time.perf_counter()
+    try:
+        # Heavy import kept off the module import path
+        from insightface.app import FaceAnalysis
+
+        model = FaceAnalysis(allowed_modules=MODEL_CONFIG['allowed_modules'])
+        model.prepare(ctx_id=MODEL_CONFIG['ctx_id'], det_size=MODEL_CONFIG['det_size'])
+        loaded = time.perf_counter()
+
+        # First inference allocates runtime buffers; pay that cost before serving
+        model.get(np.zeros(MODEL_CONFIG['warmup_shape'], dtype=np.uint8))
+        warmed = time.perf_counter()
+
+        with _lock:
+            _model = model
+            _state.update({
+                'status': 'ready',
+                'load_seconds': round(loaded - started, 3),
+                'warmup_seconds': round(warmed - loaded, 3)
+            })
+        _ready.set()
+        print(f"ArcFace model ready (load {loaded - started:.1f}s, warm-up {warmed - loaded:.1f}s)")
+    except Exception as e:
+        with _lock:
+            _state.update({'status': 'failed', 'error': str(e)})
+        print(f"Error loading ArcFace model: {e}")
+
+def start_model_loading():
+    """Start loading the model (once); returns immediately when running in background mode"""
+    with _lock:
+        if _state['status'] in ('loading', 'ready'):
+            return
+        _state.update({'status': 'loading', 'error': None, 'started_at': time.time()})
+
+    if MODEL_CONFIG['background']:
+        threading.Thread(target=_load_model, name='arcface-loader', daemon=True).start()
+    else:
+        _load_model()
+
+def is_ready():
+    """True once the model is loaded and warmed up"""
+    return _ready.is_set()
+
+def get_model(timeout=None):
+    """Return the loaded model, waiting up to timeout seconds (None waits indefinitely)"""
+    if not _ready.is_set():
+        with _lock:
+            failed = _state['status'] in ('failed', 'not_started')
+        if failed or not _ready.wait(timeout):
+            return None
+    return _model
+
+def model_status():
+    """Loading state for health/readiness endpoints"""
+    with _lock:
+        return dict(_state)
+
+def decode_base64_bytes(base64_string):
+    """Decode base64 payload (optionally a data URL) to raw image bytes"""
+    try:
+        # Remove data URL prefix if present
+        if ',' in base64_string:
+            base64_string = base64_string.split(',')[1]
+        
+        return base64.b64decode(base64_string)
+    except Exception as e:
+        print(f"Error decoding image: {e}")
+        return None
+
+def image_bytes_to_cv(image_data):
+    """Convert raw image bytes to OpenCV format"""
+    try:
+        # Convert to PIL Image
+        pil_image = Image.open(BytesIO(image_data))
+        
+        # Convert to OpenCV format
+        cv_image = cv2.cvtColor(np.array(pil_image), cv2.COLOR_RGB2BGR)
+        
+        return cv_image
+    except Exception as e:
+        print(f"Error decoding image: {e}")
+        return None
+
+def decode_base64_image(base64_string):
+    """Decode base64 image to OpenCV format"""
+    image_data = decode_base64_bytes(base64_string)
+    if image_data is None:
+        return None
+    return image_bytes_to_cv(image_data)
+
+def extract_face_encoding(image):
+    """Extract face encoding using ArcFace"""
+    try:
+        face_app = get_model()
+        if face_app is None:
+            return None, NOT_READY_MESSAGE
+        faces = face_app.get(image)
+        return encoding_from_faces(faces, image)
+    except Exception as e:
+        print(f"Error extracting face encoding: {e}")
+        return None, f"Error processing face: {str(e)}"
+
+def encoding_from_faces(faces, image):
+    """Validate detected faces and build the encoding result for a single face"""
+    try:
+        if len(faces) == 0:
+            return None, "No face detected"
+        
+        if len(faces) > 1:
+            return None, "Multiple faces detected. Please ensure only one face is visible."
+        
+        face = faces[0]
+        
+        # Get face embedding (512-dimensional vector)
+        embedding = face.embedding
+        
+        # Check if embedding is valid
+        if embedding is None:
+            return None, "Failed to extract face features. Please try with better lighting."
+        
+        # Get face bounding box and landmarks for validation
+        bbox = face.bbox
+        landmarks = face.landmark_2d_106
+        
+        # Validate bbox and landmarks
+        if bbox is None:
+            return None, "Failed to detect face boundaries."
+        
+        if landmarks is None:
+            landmarks = []  # Set empty list if landmarks not available
+        
+        # Calculate face quality score based on size and position
+        face_width = bbox[2] - bbox[0]
+        face_height = bbox[3] - bbox[1]
+        face_area = face_width * face_height
+        image_area = image.shape[0] * image.shape[1]
+        face_ratio = face_area / image_area
+        
+        # Quality checks
+        if face_ratio < 0.05:  # Face too small
+            return None, "Face too small. Please move closer to the camera."
+        
+        if face_width < 100 or face_height < 100:  # Face resolution too low
+            return None, "Face resolution too low. Please ensure good lighting."
+        
+        return {
+            'embedding': embedding.tolist(),
+            'bbox': bbox.tolist(),
+            'landmarks': landmarks.tolist() if len(landmarks) > 0 else [],
+            'confidence': float(face.det_score) if hasattr(face, 'det_score') and face.det_score is not None else 0.0,
+            'face_area': face_area,
+            'quality_score': min(1.0, face_ratio * 10)  # Normalize quality score
+        }, None
+        
+    except Exception as e:
+        print(f"Error extracting face encoding: {e}")
+        return None, f"Error processing face: {str(e)}"
+
+def group_encodings_from_faces(faces, image):
+    """Encodings for every usable face of a multi-face frame, largest first.
+
+    Returns None unless group mode is enabled and the frame has more than one
+    face (single faces keep the stricter encoding_from_faces checks).
+    """
+    if not MODEL_CONFIG['group_mode'] or len(faces) < 2:
+        return None
+    
+    image_area = image.shape[0] * image.shape[1]
+    min_size = MODEL_CONFIG['group_min_face_size']
+    encodings = []
+    for face in faces:
+        if face.embedding is None or face.bbox is None:
+            continue
+        bbox = face.bbox
+        face_width = bbox[2] - bbox[0]
+        face_height = bbox[3] - bbox[1]
+        if face_width < min_size or face_height < min_size:
+            continue
+        face_area = face_width * face_height
+        encodings.append({
+            'embedding': face.embedding.tolist(),
+            'bbox': bbox.tolist(),
+            'confidence': float(face.det_score) if getattr(face, 'det_score', None) is not None else 0.0,
+            'face_area': float(face_area),
+            'quality_score': min(1.0, face_area / image_area * 10)
+        })
+    
+    encodings.sort(key=lambda e: e['face_area'], reverse=True)
+    return encodings[:MODEL_CONFIG['group_max_faces']]
+
+def detection_from_faces(faces):
+    """Build face detection summary from detected faces"""
+    response = {
+        'face_detected': len(faces) > 0,
+        'face_count': len(faces)
+    }
+    
+    if faces:
+        # Get face details for the first face
+        face = faces[0]
+        bbox = face.bbox
+        
+        response.update({
+            'face_area': {
+                'x': int(bbox[0]),
+                'y': int(bbox[1]),
+                'width': int(bbox[2] - bbox[0]),
+                'height': int(bbox[3] - bbox[1])
+            },
+            'confidence': float(face.det_score)
+        })
+    
+    return response
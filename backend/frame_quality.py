@@ -0,0 +1,145 @@
+# Cheap pre-inference frame quality gate (runs before ArcFace)
+import threading
+import time
+import cv2
+
+# Quality gate configuration (measured on a downscaled grayscale copy of the frame)
+FRAME_QUALITY_CONFIG = {
+    'enabled': True,
+    'analysis_width': 160,          # Width of the downscaled analysis image
+    'min_sharpness': 25.0,          # Laplacian variance below this is treated as blurry
+    'min_brightness': 40.0,         # Mean gray level below this is too dark
+    'max_brightness': 225.0,        # Mean gray level above this is washed out
+    'static_diff_threshold': 2.0,   # Mean abs difference vs previous frame treated as unchanged
+    'max_static_skips': 5,          # Force a model run after this many skipped unchanged frames
+    'kiosk_state_ttl': 120.0        # Forget kiosks that have not sent frames for this long
+}
+
+# Messages follow the wording of the existing extract_face_encoding errors
+BLURRY_MESSAGE = "Image too blurry. Please hold still and face the camera."
+DARK_MESSAGE = "Image too dark. Please ensure good lighting."
+BRIGHT_MESSAGE = "Image too bright. Please avoid strong light facing the camera."
+
+class FrameQualityGate:
+    """Rejects unusable frames before they reach the face model"""
+
+    def __init__(self, config=None):
+        self.config = config or FRAME_QUALITY_CONFIG
+        self._kiosks = {}
+        self._lock = threading.Lock()
+        self.counters = {
+            'frames_checked': 0,
+            'rejected_blurry': 0,
+            'rejected_dark': 0,
+            'rejected_bright': 0,
+            'skipped_unchanged': 0
+        }
+
+    def _analysis_image(self, image):
+        """Downscaled grayscale copy used for all checks"""
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        height, width = gray.shape[:2]
+        target_width = self.config['analysis_width']
+        if width > target_width:
+            target_height = max(1, int(height * target_width / width))
+            gray = cv2.resize(gray, (target_width, target_height), interpolation=cv2.INTER_AREA)
+        return gray
+
+    def kiosk_state(self, kiosk_id):
+        """Snapshot of the previous frame state for a kiosk (None if unknown)"""
+        if kiosk_id is None:
+            return None
+        with self._lock:
+            state = self._kiosks.get(kiosk_id)
+            return dict(state) if state else None
+
+    def evaluate(self, image, previous=None):
+        """Pure quality evaluation of a decoded frame against the previous kiosk state.
+
+        Returns (error_message, reason, thumbnail). error_message is None when the
+        frame should go to the model. Does not touch counters or kiosk state, so it
+        can run inside inference worker processes.
+        """
+        if not self.config['enabled']:
+            return None, None, None
+
+        gray = self._analysis_image(image)
+
+        brightness = float(gray.mean())
+        if brightness < self.config['min_brightness']:
+            return DARK_MESSAGE, 'dark', gray
+
+        if brightness > self.config['max_brightness']:
+            return BRIGHT_MESSAGE, 'bright', gray
+
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+        if sharpness < self.config['min_sharpness']:
+            return BLURRY_MESSAGE, 'blurry', gray
+
+        # Unchanged scene since a frame that already failed: repeat that answer
+        if previous and previous['error'] and previous['thumbnail'].shape == gray.shape:
+            if previous['skips'] < self.config['max_static_skips']:
+                diff = float(cv2.absdiff(gray, previous['thumbnail']).mean())
+                if diff < self.config['static_diff_threshold']:
+                    return previous['error'], 'unchanged', gray
+
+        return None, None, gray
+
+    def record_check(self, kiosk_id, reason):
+        """Update counters (and the kiosk skip count) for an evaluated frame"""
+        if not self.config['enabled']:
+            return
+
+        with self._lock:
+            self.counters['frames_checked'] += 1
+            if reason == 'unchanged':
+                self.counters['skipped_unchanged'] += 1
+                state = self._kiosks.get(kiosk_id)
+                if state:
+                    state['skips'] += 1
+                    state['seen_at'] = time.monotonic()
+            elif reason:
+                self.counters['rejected_' + reason] += 1
+
+    def check(self, image, kiosk_id=None):
+        """Evaluate a decoded frame for a kiosk and record the result.
+
+        Returns (error_message, reason, thumbnail); the thumbnail is passed back
+        to record_outcome once the model has run.
+        """
+        error, reason, gray = self.evaluate(image, self.kiosk_state(kiosk_id))
+        self.record_check(kiosk_id, reason)
+        return error, reason, gray
+
+    def record_outcome(self, kiosk_id, thumbnail, error):
+        """Remember the model outcome for a kiosk's frame (used by the unchanged-frame check)"""
+        if kiosk_id is None or thumbnail is None:
+            return
+
+        now = time.monotonic()
+        with self._lock:
+            self._kiosks[kiosk_id] = {
+                'thumbnail': thumbnail,
+                'error': error,
+                'skips': 0,
+                'seen_at': now
+            }
+
+            # Drop kiosks that went quiet
+            ttl = self.config['kiosk_state_ttl']
+            stale = [k for k, v in self._kiosks.items() if now - v['seen_at'] > ttl]
+            for k in stale:
+                del self._kiosks[k]
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['tracked_kiosks'] = len(self._kiosks)
+        stats['model_invocations_avoided'] = (
+            stats['rejected_blurry'] + stats['rejected_dark']
+            + stats['rejected_bright'] + stats['skipped_unchanged']
+        )
+        return stats
+
+frame_quality_gate = FrameQualityGate()
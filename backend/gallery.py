@@ -0,0 +1,379 @@
+# In-memory face gallery sharded by site (location-scoped matching)
+import json
+import os
+import threading
+import time
+import numpy as np
+
+import metrics
+from queries import GALLERY_TEMPLATES_QUERY
+
+# Gallery configuration
+GALLERY_CONFIG = {
+    'refresh_interval': 5.0,   # Seconds between background change checks
+    'global_fallback': True,   # Search the whole company when the kiosk's site has no match
+    'kiosk_sites': {},         # kiosk_id -> site for kiosks that do not send their location
+    'top_k': 3,                # Candidates returned per search (distinct persons)
+    'min_margin': 0.0,         # Reject matches whose best-vs-second margin is below this (0 disables)
+    'log_embeddings': False,   # Store probe embeddings and candidates for evaluate_threshold.py
+    # Last loaded gallery, used at startup while the database is unreachable (None disables)
+    'snapshot_path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gallery_snapshot.npz')
+}
+
+GLOBAL_SHARD = '*'
+
+# Row counts catch deletes, MAX(id)/MAX(last_updated)/MAX(assigned_at) catch inserts and edits
+VERSION_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM face_encodings), (SELECT MAX(id) FROM face_encodings),
+        (SELECT COUNT(*) FROM persons), (SELECT MAX(last_updated) FROM persons)
+"""
+
+# person_sites is optional: databases not yet migrated (migrate_database.py) match on the global shard only
+SITES_VERSION_QUERY = "SELECT COUNT(*), MAX(assigned_at) FROM person_sites"
+SITES_QUERY = "SELECT person_id, site FROM person_sites"
+
+MATCH_SECONDS = metrics.registry.histogram(
+    'attnd_gallery_match_seconds', 'Gallery search latency per shard', ('shard',))
+SEARCHES = metrics.registry.counter(
+    'attnd_gallery_searches_total', 'Gallery searches per shard and outcome', ('shard', 'result'))
+
+def _missing_table(error):
+    """True when a query failed because its table does not exist (MySQL 1146, SQLite stub)"""
+    return getattr(error, 'errno', None) == 1146 or 'no such table' in str(error)
+
+class _Shard:
+    """Unit-normalized embedding matrix with aligned person ids and names"""
+    __slots__ = ('person_ids', 'names', 'matrix')
+
+    def __init__(self, person_ids, names, matrix):
+        self.person_ids = person_ids
+        self.names = names
+        self.matrix = matrix
+
+class FaceGallery:
+    """Active persons' primary embeddings held in memory, one shard per site plus a global shard.
+
+    A kiosk's site shard is searched first; if nothing there reaches the
+    threshold the global shard is searched when global_fallback is enabled.
+    Persons without a site assignment are only found through the global shard.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or GALLERY_CONFIG
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._shards = {}
+        self._version = None
+        self._dirty = True
+        self._connect = None
+        self._unreachable_at = float('-inf')
+        self._sites_missing = False
+        self.loaded_at = None
+        self.reloads = 0
+        self.load_seconds = 0.0
+
+    def start(self, connect):
+        """Keep the gallery in sync with the database from a background thread"""
+        self._connect = connect
+        self.load_snapshot()
+        threading.Thread(target=self._refresh_loop, name='face-gallery', daemon=True).start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.config['refresh_interval'])
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing face gallery: {e}")
+
+    def invalidate(self):
+        """Reload before the next search (call after registering persons or changing sites)"""
+        with self._lock:
+            self._dirty = True
+
+    def refresh(self, force=False):
+        """Reload shards if the gallery tables changed; returns True when reloaded.
+
+        Any failure (database down or query error) starts the retry backoff used by search_many.
+        """
+        with self._load_lock:
+            try:
+                return self._reload(force)
+            except Exception:
+                self._unreachable_at = time.monotonic()
+                raise
+
+    def _reload(self, force):
+        conn = self._connect()
+        if not conn:
+            self._unreachable_at = time.monotonic()
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute(VERSION_QUERY)
+            version = tuple(cursor.fetchone())
+            sites_version = self._sites_rows(cursor, SITES_VERSION_QUERY)
+            version += tuple(sites_version[0]) if sites_version else (None, None)
+            with self._lock:
+                current = not force and not self._dirty and version == self._version
+            if current:
+                return False
+
+            started = time.perf_counter()
+            cursor.execute(GALLERY_TEMPLATES_QUERY)
+            rows = cursor.fetchall()
+            sites = self._sites_rows(cursor, SITES_QUERY) or []
+        finally:
+            conn.close()
+
+        person_ids, names, matrix = self._parse_rows(rows)
+        shards = self._build_shards(person_ids, names, matrix, sites)
+        with self._lock:
+            self._shards = shards
+            self._version = version
+            self._dirty = False
+            self.loaded_at = time.time()
+            self.load_seconds = round(time.perf_counter() - started, 3)
+            self.reloads += 1
+        self.save_snapshot(person_ids, names, matrix, sites)
+        return True
+
+    def _sites_rows(self, cursor, query):
+        """Rows of a person_sites query, or None when the table does not exist yet"""
+        try:
+            cursor.execute(query)
+        except Exception as e:
+            if not _missing_table(e):
+                raise
+            if not self._sites_missing:
+                print("person_sites table not found (run migrate_database.py); "
+                      "matching against the global shard only")
+            self._sites_missing = True
+            return None
+        self._sites_missing = False
+        return cursor.fetchall()
+
+    def _parse_rows(self, rows):
+        """Decode encoding rows into (person_ids, names, unit-normalized matrix)"""
+        person_ids, names, vectors = [], [], []
+        for person_id, encoding_data, name in rows:
+            try:
+                vector = np.asarray(json.loads(encoding_data), dtype=np.float32)
+            except (TypeError, ValueError) as e:
+                print(f"Skipping invalid embedding for person {person_id}: {e}")
+                continue
+            if vectors and vector.shape != vectors[0].shape:
+                print(f"Skipping embedding of unexpected size for person {person_id}")
+                continue
+            person_ids.append(person_id)
+            names.append(name)
+            vectors.append(vector)
+
+        if not vectors:
+            return np.asarray(person_ids), names, None
+
+        matrix = np.vstack(vectors)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+        return np.asarray(person_ids), names, matrix
+
+    def _build_shards(self, person_ids, names, matrix, sites):
+        if matrix is None:
+            return {}
+
+        shards = {GLOBAL_SHARD: _Shard(person_ids, names, matrix)}
+
+        # Rows of the global matrix belonging to each site (a person may have several primaries)
+        rows_by_person = {}
+        for row, person_id in enumerate(person_ids.tolist()):
+            rows_by_person.setdefault(person_id, []).append(row)
+        site_rows = {}
+        for person_id, site in sites:
+            site_rows.setdefault(site, []).extend(rows_by_person.get(person_id, ()))
+        for site, indexes in site_rows.items():
+            if indexes:
+                indexes = np.asarray(sorted(indexes))
+                shards[site] = _Shard(person_ids[indexes], [names[i] for i in indexes], matrix[indexes])
+        return shards
+
+    def save_snapshot(self, person_ids, names, matrix, sites):
+        """Write the loaded gallery to disk (atomically) for offline startup"""
+        path = self.config['snapshot_path']
+        if not path or matrix is None:
+            return
+        try:
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, person_ids=person_ids, names=np.asarray(names, dtype=str), matrix=matrix,
+                         site_person_ids=np.asarray([person_id for person_id, _ in sites], dtype=np.int64),
+                         site_names=np.asarray([site for _, site in sites], dtype=str))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Error saving face gallery snapshot: {e}")
+
+    def load_snapshot(self):
+        """Serve the last saved gallery until the first database load succeeds"""
+        path = self.config['snapshot_path']
+        if not path or not os.path.exists(path):
+            return False
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                sites = list(zip(data['site_person_ids'].tolist(), data['site_names'].tolist()))
+                shards = self._build_shards(data['person_ids'], data['names'].tolist(), data['matrix'], sites)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading face gallery snapshot: {e}")
+            return False
+        with self._lock:
+            if self._shards:
+                return False
+            self._shards = shards
+            self.loaded_at = os.path.getmtime(path)
+        print(f"Loaded face gallery snapshot: {self.stats()['persons']} templates")
+        return True
+
+    def site_for(self, location, kiosk_id):
+        """Site of the requesting kiosk: sent location, else configured kiosk mapping"""
+        return location or self.config['kiosk_sites'].get(kiosk_id)
+
+    def _search(self, shard_name, shard, targets, k):
+        """Top-k distinct persons per target row as [(person_id, name, similarity)], best first"""
+        started = time.perf_counter()
+        similarities = targets @ shard.matrix.T
+        # Over-select so persons with several primary templates still yield k distinct candidates
+        count = min(similarities.shape[1], 2 * k)
+        if count < similarities.shape[1]:
+            top = np.argpartition(similarities, -count, axis=1)[:, -count:]
+        else:
+            top = np.broadcast_to(np.arange(similarities.shape[1]), similarities.shape)
+        rows = np.arange(len(similarities))[:, None]
+        order = np.argsort(similarities[rows, top], axis=1)[:, ::-1]
+        top = top[rows, order]
+
+        ranked = []
+        for row, indexes in enumerate(top.tolist()):
+            candidates, seen = [], set()
+            for index in indexes:
+                person_id = int(shard.person_ids[index])
+                if person_id in seen:
+                    continue
+                seen.add(person_id)
+                candidates.append((person_id, shard.names[index], float(similarities[row, index])))
+                if len(candidates) == k:
+                    break
+            ranked.append(candidates)
+        MATCH_SECONDS.observe(time.perf_counter() - started, shard=shard_name)
+        return ranked
+
+    def _decide(self, shard_name, candidates, threshold):
+        """Apply threshold and margin rules to one shard's candidates"""
+        best = candidates[0][2]
+        margin = best - candidates[1][2] if len(candidates) > 1 else best
+        if best < threshold:
+            rejected = 'below_threshold'
+        elif margin < self.config['min_margin']:
+            rejected = 'ambiguous'
+        else:
+            rejected = None
+        SEARCHES.inc(shard=shard_name, result=rejected or 'hit')
+        return {
+            'match': candidates[0][:2] if rejected is None else None,
+            'similarity': best,
+            'margin': margin,
+            'candidates': candidates,
+            'shard': shard_name,
+            'rejected': rejected
+        }
+
+    def search(self, target_embedding, threshold=0.6, site=None, k=None):
+        """Rank gallery candidates for an embedding, searching the site shard first.
+
+        Returns a dict with 'match' ((person_id, name) or None), 'similarity'
+        (best score), 'margin' (best minus second-best person), 'candidates'
+        (top-k (person_id, name, similarity)), 'shard' and 'rejected'
+        (None, 'below_threshold', 'ambiguous' or 'empty').
+        """
+        return self.search_many([target_embedding], threshold, site, k)[0]
+
+    def search_many(self, target_embeddings, threshold=0.6, site=None, k=None):
+        """search() for several embeddings (e.g. every face in a frame) with one matrix product per shard"""
+        empty = {'match': None, 'similarity': 0.0, 'margin': 0.0, 'candidates': [], 'shard': None,
+                 'rejected': 'empty'}
+        with self._lock:
+            dirty = self._dirty
+        # While the database is down, keep serving the loaded (or snapshot) gallery without retrying per search
+        retry_after = self._unreachable_at + self.config['refresh_interval']
+        if dirty and self._connect is not None and time.monotonic() >= retry_after:
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing face gallery: {e}")
+
+        with self._lock:
+            shards = self._shards
+        if not shards or not len(target_embeddings):
+            return [dict(empty) for _ in target_embeddings]
+
+        targets = np.asarray(target_embeddings, dtype=np.float32)
+        norms = np.linalg.norm(targets, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        targets = targets / norms
+        k = max(2, k or self.config['top_k'])
+
+        results = [None] * len(targets)
+        pending = list(range(len(targets)))
+        shard = shards.get(site) if site else None
+        if shard is not None:
+            for i, candidates in zip(pending, self._search(site, shard, targets, k)):
+                result = self._decide(site, candidates, threshold)
+                # An ambiguous site match is not resolved by searching more people
+                if result['rejected'] != 'below_threshold' or not self.config['global_fallback']:
+                    results[i] = result
+            pending = [i for i, result in enumerate(results) if result is None]
+
+        if pending:
+            ranked = self._search(GLOBAL_SHARD, shards[GLOBAL_SHARD], targets[pending], k)
+            for i, candidates in zip(pending, ranked):
+                results[i] = self._decide(GLOBAL_SHARD, candidates, threshold)
+        return results
+
+    def match(self, target_embedding, threshold=0.6, site=None):
+        """Best (person_id, name) passing the threshold and margin rules.
+
+        Returns ((person_id, name), similarity) or (None, best similarity seen).
+        """
+        result = self.search(target_embedding, threshold, site)
+        return result['match'], result['similarity']
+
+    def stats(self):
+        """Shard sizes and load state for health endpoints"""
+        with self._lock:
+            return {
+                'persons': len(self._shards[GLOBAL_SHARD].person_ids) if self._shards else 0,
+                'shards': len(self._shards) - 1 if self._shards else 0,
+                'sites_table': not self._sites_missing,
+                'reloads': self.reloads,
+                'load_seconds': self.load_seconds
+            }
+
+    def shard_stats(self):
+        """Per-shard size, hit rate and mean match latency"""
+        with self._lock:
+            sizes = {name: len(shard.person_ids) for name, shard in self._shards.items()}
+        report = {}
+        for name, size in sizes.items():
+            hits = SEARCHES.value(shard=name, result='hit')
+            ambiguous = SEARCHES.value(shard=name, result='ambiguous')
+            searches = hits + ambiguous + SEARCHES.value(shard=name, result='below_threshold')
+            report[name] = {
+                'persons': size,
+                'searches': searches,
+                'hits': hits,
+                'ambiguous': ambiguous,
+                'hit_rate': round(hits / searches, 4) if searches else 0.0,
+                'mean_match_ms': round(MATCH_SECONDS.mean(shard=name) * 1000, 3)
+            }
+        return report
+
+face_gallery = FaceGallery()
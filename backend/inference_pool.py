@@ -0,0 +1,256 @@
+# Optional process-pool inference backend: one warm ArcFace model per worker process
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from multiprocessing import shared_memory
+from face_engine import image_bytes_to_cv, encoding_from_faces, group_encodings_from_faces, detection_from_faces
+
+# Inference backend configuration
+INFERENCE_CONFIG = {
+    'backend': 'thread',                    # 'thread': run in the request thread, 'process': worker pool
+    'workers': 2,                           # Worker processes, each holding its own model
+    'max_frame_bytes': 4 * 1024 * 1024,     # Shared-memory slot size per worker (encoded image bytes)
+    'request_timeout': 30.0,                # Max seconds for one inference before the worker is restarted
+    'acquire_timeout': 10.0,                # Max seconds to wait for an idle worker
+    'start_timeout': 300.0,                 # Max seconds for a worker to load and warm up its model
+    'max_restarts': 10                      # Stop after this many restarts in a row without a worker becoming ready
+}
+
+BUSY_MESSAGE = "Face recognition service is busy. Please try again."
+FAILED_MESSAGE = "Error processing face: inference worker failed"
+TOO_LARGE_MESSAGE = "Image too large. Please reduce the camera resolution."
+
+def _analyze_frame(image_data, model, gate, previous):
+    """Decode, quality-gate and run the model on one frame inside a worker"""
+    image = image_bytes_to_cv(image_data)
+    if image is None:
+        return {'invalid': True}
+
+    gate_error, gate_reason, thumbnail = gate.evaluate(image, previous)
+    if gate_error:
+        return {'gate_error': gate_error, 'gate_reason': gate_reason, 'thumbnail': thumbnail}
+
+    faces = model.get(image)
+    face_data, error = encoding_from_faces(faces, image)
+    return {
+        'face_data': face_data,
+        'error': error,
+        'faces': group_encodings_from_faces(faces, image),
+        'detection': detection_from_faces(faces),
+        'gate_reason': None,
+        'thumbnail': thumbnail
+    }
+
+def _worker_main(conn, shm_name, model_config, gate_config):
+    """Worker process entry point: load the model, then serve frames from shared memory"""
+    import face_engine
+    from frame_quality import FrameQualityGate
+
+    face_engine.MODEL_CONFIG.update(model_config)
+    face_engine.MODEL_CONFIG['background'] = False
+    face_engine.start_model_loading()
+    model = face_engine.get_model(timeout=0)
+    if model is None:
+        conn.send(('failed', face_engine.model_status()['error']))
+        return
+
+    shm = shared_memory.SharedMemory(name=shm_name)
+    if os.name == 'posix':
+        # The parent owns the segment; stop this process's tracker from unlinking it on exit
+        try:
+            from multiprocessing import resource_tracker
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        except Exception:
+            pass
+
+    gate = FrameQualityGate(gate_config)
+    conn.send(('ready', os.getpid()))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+
+        size, previous = message
+        try:
+            result = _analyze_frame(bytes(shm.buf[:size]), model, gate, previous)
+        except Exception as e:
+            result = {'face_data': None, 'error': f"Error processing face: {str(e)}", 'detection': None,
+                      'gate_reason': None, 'thumbnail': None, 'transient': True}
+        conn.send(result)
+
+    shm.close()
+
+class _Worker:
+    """Parent-side handle for one worker process and its shared-memory slot"""
+
+    def __init__(self, ctx, slot_size, model_config, gate_config):
+        self.shm = shared_memory.SharedMemory(create=True, size=slot_size)
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_worker_main, args=(child_conn, self.shm.name, model_config, gate_config),
+            name='arcface-worker', daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+        self.pid = None
+
+    def stop(self, timeout=5.0):
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join(timeout)
+        self.conn.close()
+        self.shm.close()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+class InferencePool:
+    """Pool of worker processes running decode + extract_face_encoding.
+
+    Encoded frames are copied into a per-worker shared-memory slot and only the
+    frame size (plus the small previous-frame thumbnail for the quality gate) is
+    sent over the pipe. Workers that crash or time out are replaced.
+    """
+
+    def __init__(self, config=None, model_config=None, gate_config=None):
+        self.config = config or INFERENCE_CONFIG
+        self.model_config = dict(model_config or {})
+        self.gate_config = dict(gate_config or {})
+        self._ctx = multiprocessing.get_context('spawn')  # Never fork a threaded server
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers = []
+        self._stopped = False
+        self._failed_restarts = 0   # Restarts since a worker last became ready (reset on ready)
+        self.counters = {'tasks': 0, 'failures': 0, 'timeouts': 0, 'restarts': 0, 'busy_rejections': 0}
+
+    def start(self):
+        """Spawn the workers; each becomes available once its model is warm"""
+        for _ in range(self.config['workers']):
+            self._spawn()
+
+    def _spawn(self):
+        worker = _Worker(self._ctx, self.config['max_frame_bytes'], self.model_config, self.gate_config)
+        with self._lock:
+            self._workers.append(worker)
+        threading.Thread(target=self._await_ready, args=(worker,), name='arcface-worker-start', daemon=True).start()
+
+    def _await_ready(self, worker):
+        """Wait for a worker's ready message, then make it available"""
+        try:
+            if worker.conn.poll(self.config['start_timeout']):
+                status, detail = worker.conn.recv()
+                if status == 'ready':
+                    worker.pid = detail
+                    with self._lock:
+                        self._failed_restarts = 0
+                    self._idle.put(worker)
+                    return
+                print(f"Inference worker failed to load model: {detail}")
+            else:
+                print("Inference worker did not become ready in time")
+        except (EOFError, OSError) as e:
+            print(f"Inference worker exited during startup: {e}")
+        self._replace(worker)
+
+    def _replace(self, worker):
+        """Stop a broken worker and start a new one (bounded by max_restarts in a row)
+
+        Occasional crashes over a long uptime never exhaust the limit; only a
+        worker that keeps failing before it gets ready (e.g. the model cannot
+        load) does.
+        """
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            self.counters['restarts'] += 1
+            self._failed_restarts += 1
+            failed_restarts = self._failed_restarts
+            give_up = self._stopped or failed_restarts > self.config['max_restarts']
+        worker.stop(timeout=1.0)
+        if give_up:
+            if not self._stopped:
+                print("Inference worker restart limit reached; not restarting")
+            return
+        time.sleep(min(5.0, 0.5 * failed_restarts))
+        self._spawn()
+
+    def analyze(self, image_data, previous=None):
+        """Run decode + quality gate + extraction for raw image bytes in a worker.
+
+        Returns the worker result dict (see _analyze_frame) or an error dict with
+        'face_data' None and 'transient' True when no result could be produced.
+        """
+        if len(image_data) > self.config['max_frame_bytes']:
+            return {'face_data': None, 'error': TOO_LARGE_MESSAGE, 'detection': None, 'gate_reason': None,
+                    'thumbnail': None}
+
+        try:
+            worker = self._idle.get(timeout=self.config['acquire_timeout'])
+        except queue.Empty:
+            with self._lock:
+                self.counters['busy_rejections'] += 1
+            return {'face_data': None, 'error': BUSY_MESSAGE, 'detection': None, 'gate_reason': None,
+                    'thumbnail': None, 'transient': True}
+
+        healthy = False
+        try:
+            size = len(image_data)
+            worker.shm.buf[:size] = image_data
+            worker.conn.send((size, previous))
+            if not worker.conn.poll(self.config['request_timeout']):
+                with self._lock:
+                    self.counters['timeouts'] += 1
+                raise TimeoutError('inference timed out')
+            result = worker.conn.recv()
+            healthy = True
+            with self._lock:
+                self.counters['tasks'] += 1
+            return result
+        except (EOFError, OSError, TimeoutError) as e:
+            print(f"Inference worker {worker.pid} failed: {e}")
+            with self._lock:
+                self.counters['failures'] += 1
+            return {'face_data': None, 'error': FAILED_MESSAGE, 'detection': None, 'gate_reason': None,
+                    'thumbnail': None, 'transient': True}
+        finally:
+            if healthy:
+                self._idle.put(worker)
+            else:
+                threading.Thread(target=self._replace, args=(worker,), daemon=True).start()
+
+    def is_ready(self):
+        """True when at least one worker has a warm model"""
+        with self._lock:
+            return any(w.pid is not None and w.process.is_alive() for w in self._workers)
+
+    def stats(self):
+        """Pool state for health and metrics endpoints"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['failed_restarts'] = self._failed_restarts
+            stats['workers'] = len(self._workers)
+            stats['ready_workers'] = sum(1 for w in self._workers if w.pid is not None and w.process.is_alive())
+        stats['idle_workers'] = self._idle.qsize()
+        return stats
+
+    def shutdown(self):
+        """Stop all workers and release shared memory"""
+        with self._lock:
+            self._stopped = True
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Kiosk traffic load generator
+Simulates N kiosks following the scanForFaces cadence in camera.service.ts
+(2 s interval, double interval after a recognized-but-rejected attempt,
+10 s pause after a successful recognition, retry on error) plus dashboards
+polling the attendance endpoints, and reports throughput, p50/p95/p99
+latency and error rates per endpoint.
+
+Usage:
+    python loadtest.py --kiosks 20 --duration 120 --start-server
+    python loadtest.py --url http://localhost:5000 --kiosks 50 --frames-dir recorded_frames/ --output load.json
+"""
+
+import argparse
+import base64
+import datetime
+import glob
+import json
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+
+import requests
+
+from benchmark import summarize
+
+# Cadence from camera.service.ts
+SCAN_INTERVAL = 2.0
+SUCCESS_PAUSE = 10.0
+
+# Polling interval of attendance.component.ts / live-attendance.ts
+DASHBOARD_INTERVAL = 30.0
+
+class LoadStats:
+    """Thread-safe per-endpoint latency and error accounting"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.status_codes = {}
+        self.outcomes = {}
+
+    def record(self, endpoint, latency, status_code, error=False):
+        with self._lock:
+            self.latencies.setdefault(endpoint, []).append(latency)
+            codes = self.status_codes.setdefault(endpoint, {})
+            codes[str(status_code)] = codes.get(str(status_code), 0) + 1
+            if error:
+                self.errors[endpoint] = self.errors.get(endpoint, 0) + 1
+
+    def outcome(self, name):
+        with self._lock:
+            self.outcomes[name] = self.outcomes.get(name, 0) + 1
+
+    def report(self, elapsed):
+        with self._lock:
+            endpoints = {}
+            for endpoint, samples in self.latencies.items():
+                errors = self.errors.get(endpoint, 0)
+                summary = summarize(samples)
+                summary.update({
+                    'requests': len(samples),
+                    'errors': errors,
+                    'error_rate': round(errors / len(samples), 4) if samples else 0.0,
+                    'throughput_rps': round(len(samples) / elapsed, 2) if elapsed > 0 else 0.0,
+                    'status_codes': dict(self.status_codes.get(endpoint, {}))
+                })
+                del summary['ops_per_sec']  # Per-call rate is meaningless under concurrency
+                endpoints[endpoint] = summary
+            return {'elapsed_seconds': round(elapsed, 2), 'endpoints': endpoints, 'kiosk_outcomes': dict(self.outcomes)}
+
+def load_payloads(frames_dir, count):
+    """Base64 data-URL frames from a directory, or synthetic JPEG frames"""
+    payloads = []
+    if frames_dir:
+        for path in sorted(glob.glob(os.path.join(frames_dir, '*')))[:count]:
+            if path.lower().endswith(('.jpg', '.jpeg', '.png')):
+                mime = 'image/png' if path.lower().endswith('.png') else 'image/jpeg'
+                with open(path, 'rb') as f:
+                    payloads.append(f"data:{mime};base64,{base64.b64encode(f.read()).decode()}")
+
+    if not payloads:
+        import cv2
+        from benchmark import load_frames
+        for _, image in load_frames(None, count, seed=7):
+            ok, buffer = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, 80])
+            if ok:
+                payloads.append('data:image/jpeg;base64,' + base64.b64encode(buffer.tobytes()).decode())
+
+    return payloads
+
+def timed_request(session, stats, endpoint, method, url, timeout, **kwargs):
+    """Issue one request and record its latency; returns the response or None"""
+    start = time.perf_counter()
+    try:
+        response = session.request(method, url, timeout=timeout, **kwargs)
+    except requests.RequestException:
+        stats.record(endpoint, time.perf_counter() - start, 'exception', error=True)
+        return None
+    stats.record(endpoint, time.perf_counter() - start, response.status_code, error=response.status_code >= 500)
+    return response
+
+def kiosk_worker(index, args, payloads, stats, stop_event):
+    """One kiosk running the scanForFaces loop"""
+    session = requests.Session()
+    url = f"{args.url}/api/face-recognition"
+    frame = index
+    kiosk_id = f"loadtest-kiosk-{index}"
+
+    # Stagger kiosk start so they do not fire in lockstep
+    stop_event.wait((index % 10) * args.interval / 10)
+
+    while not stop_event.is_set():
+        payload = payloads[frame % len(payloads)]
+        frame += 1
+
+        response = timed_request(session, stats, 'POST /api/face-recognition', 'POST', url, args.timeout,
+                                 json={'image': payload, 'mode': args.mode, 'kiosk_id': kiosk_id})
+
+        if response is None or response.status_code >= 500:
+            stats.outcome('error')
+            delay = args.interval
+        elif response.status_code == 429:
+            # Shed by admission control: honour Retry-After like camera.service.ts
+            stats.outcome('shed')
+            delay = max(args.interval, float(response.headers.get('Retry-After', args.interval)))
+        else:
+            try:
+                result = response.json()
+            except ValueError:
+                result = {}
+            if response.status_code == 400:
+                # Unusable frame (no face, too small, ...): the UI error path retries after one interval
+                stats.outcome('frame_rejected')
+                delay = args.interval
+            elif result.get('recognized') and result.get('success'):
+                stats.outcome('recognized')
+                delay = SUCCESS_PAUSE
+            elif result.get('recognized'):
+                stats.outcome('rejected')
+                delay = args.interval * 2
+            else:
+                stats.outcome('not_recognized')
+                delay = args.interval
+
+        stop_event.wait(delay)
+
+def dashboard_worker(index, args, stats, stop_event):
+    """One dashboard polling the attendance endpoints"""
+    session = requests.Session()
+    stop_event.wait(index * args.dashboard_interval / max(1, args.dashboards))
+
+    while not stop_event.is_set():
+        today = datetime.date.today().isoformat()
+        timed_request(session, stats, 'GET /api/attendance', 'GET',
+                      f"{args.url}/api/attendance?date={today}", args.timeout)
+        timed_request(session, stats, 'GET /api/attendance/present-today', 'GET',
+                      f"{args.url}/api/attendance/present-today", args.timeout)
+        timed_request(session, stats, 'GET /api/recognition-logs', 'GET',
+                      f"{args.url}/api/recognition-logs", args.timeout)
+        stop_event.wait(args.dashboard_interval)
+
+def start_server(url, timeout):
+    """Start backend/app.py and wait until /api/health/ready answers"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    kwargs = {'cwd': backend_dir}
+    if os.name == 'posix':
+        kwargs['start_new_session'] = True
+    process = subprocess.Popen([sys.executable, 'app.py'], **kwargs)
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}")
+        try:
+            if requests.get(f"{url}/api/health/ready", timeout=2).status_code == 200:
+                return process
+        except requests.RequestException:
+            pass
+        time.sleep(1)
+
+    stop_server(process)
+    raise RuntimeError(f"Server did not become healthy within {timeout} s")
+
+def stop_server(process):
+    """Stop a server started by start_server (including the debug reloader child)"""
+    if process.poll() is not None:
+        return
+    if os.name == 'posix':
+        os.killpg(process.pid, signal.SIGTERM)
+    else:
+        process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+def main():
+    parser = argparse.ArgumentParser(description='Simulate kiosk and dashboard traffic against the backend')
+    parser.add_argument('--url', default='http://localhost:5000', help='Backend base URL')
+    parser.add_argument('--kiosks', type=int, default=10, help='Number of simulated kiosks')
+    parser.add_argument('--dashboards', type=int, default=2, help='Number of simulated dashboards')
+    parser.add_argument('--duration', type=float, default=60.0, help='Test duration in seconds')
+    parser.add_argument('--interval', type=float, default=SCAN_INTERVAL, help='Kiosk scan interval in seconds')
+    parser.add_argument('--dashboard-interval', type=float, default=DASHBOARD_INTERVAL,
+                        help='Dashboard polling interval in seconds')
+    parser.add_argument('--mode', choices=['check_in', 'check_out'], default='check_in')
+    parser.add_argument('--timeout', type=float, default=30.0, help='Per-request timeout in seconds')
+    parser.add_argument('--frames-dir', help='Directory of recorded kiosk frames to replay')
+    parser.add_argument('--frames', type=int, default=20, help='Number of distinct frames to cycle through')
+    parser.add_argument('--start-server', action='store_true', help='Start backend/app.py locally for the test')
+    parser.add_argument('--startup-timeout', type=float, default=180.0)
+    parser.add_argument('--output', help='Write JSON report to this file (default: stdout)')
+    args = parser.parse_args()
+
+    payloads = load_payloads(args.frames_dir, args.frames)
+    if not payloads:
+        print("No frames available", file=sys.stderr)
+        return 1
+
+    server = None
+    if args.start_server:
+        print("Starting backend server...", file=sys.stderr)
+        server = start_server(args.url, args.startup_timeout)
+
+    stats = LoadStats()
+    stop_event = threading.Event()
+    threads = [threading.Thread(target=kiosk_worker, args=(i, args, payloads, stats, stop_event), daemon=True)
+               for i in range(args.kiosks)]
+    threads += [threading.Thread(target=dashboard_worker, args=(i, args, stats, stop_event), daemon=True)
+                for i in range(args.dashboards)]
+
+    print(f"Running {args.kiosks} kiosks and {args.dashboards} dashboards for {args.duration:.0f} s...",
+          file=sys.stderr)
+    started = time.perf_counter()
+    try:
+        for thread in threads:
+            thread.start()
+        stop_event.wait(args.duration)
+    except KeyboardInterrupt:
+        print("Interrupted, reporting partial results", file=sys.stderr)
+    finally:
+        stop_event.set()
+        for thread in threads:
+            thread.join(timeout=args.timeout)
+        elapsed = time.perf_counter() - started
+        if server is not None:
+            stop_server(server)
+
+    report = stats.report(elapsed)
+    report['config'] = {
+        'url': args.url, 'kiosks': args.kiosks, 'dashboards': args.dashboards,
+        'duration': args.duration, 'interval': args.interval, 'mode': args.mode, 'frames': len(payloads)
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+    for endpoint, summary in sorted(report['endpoints'].items()):
+        print(f"{endpoint:40s} {summary['requests']:6d} req  {summary['throughput_rps']:7.2f} rps  "
+              f"p50 {summary['p50_ms']:8.1f}  p95 {summary['p95_ms']:8.1f}  p99 {summary['p99_ms']:8.1f} ms  "
+              f"errors {summary['error_rate'] * 100:.1f}%", file=sys.stderr)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Startup latency measurement
+Compares eager startup (the previous behaviour: insightface, scikit-learn,
+pandas and xlsxwriter imported and the model prepared while app.py is
+imported) with background loading, each in a fresh interpreter:
+    - time to import app.py
+    - latency of the first /api/health request
+    - time until the model is ready
+    - latency of the first /api/face-recognition request after readiness
+    - cost of the lazily imported reporting dependency (pandas) on first
+      use; already loaded, and so near zero, in eager mode
+
+Usage:
+    python measure_startup.py [--output startup.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+PROBE = r'''
+import json, sys, time
+started = time.perf_counter()
+eager = sys.argv[1] == 'eager'
+if eager:
+    # The previous app.py imported these at module level
+    import insightface, sklearn.metrics.pairwise, pandas, xlsxwriter
+import face_engine
+face_engine.MODEL_CONFIG['background'] = not eager
+import app
+imported = time.perf_counter()
+
+client = app.app.test_client()
+t0 = time.perf_counter()
+client.get('/api/health')
+first_health = time.perf_counter() - t0
+
+while not face_engine.is_ready() and face_engine.model_status()['status'] == 'loading':
+    time.sleep(0.05)
+ready = time.perf_counter()
+
+import base64, cv2, numpy as np
+frame = np.full((480, 640, 3), 128, dtype=np.uint8)
+frame[::8] = 40
+ok, buffer = cv2.imencode('.jpg', frame)
+payload = 'data:image/jpeg;base64,' + base64.b64encode(buffer.tobytes()).decode()
+t0 = time.perf_counter()
+response = client.post('/api/face-recognition', json={'image': payload})
+first_recognition = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+import pandas
+pandas_import = time.perf_counter() - t0
+
+print(json.dumps({
+    'import_seconds': round(imported - started, 3),
+    'first_health_seconds': round(first_health, 4),
+    'time_to_ready_seconds': round(ready - started, 3),
+    'first_recognition_seconds': round(first_recognition, 4),
+    'first_recognition_status': response.status_code,
+    'lazy_pandas_import_seconds': round(pandas_import, 3),
+    'model': face_engine.model_status()
+}))
+'''
+
+def run_probe(mode):
+    """Run the probe in a fresh interpreter so import caches are cold"""
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    result = subprocess.run([sys.executable, '-c', PROBE, mode], cwd=backend_dir,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{mode} probe failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure backend import and first-request latency')
+    parser.add_argument('--output', help='Write JSON results to this file (default: stdout)')
+    args = parser.parse_args()
+
+    results = {}
+    for mode in ('eager', 'background'):
+        print(f"Measuring {mode} model loading...", file=sys.stderr)
+        results[mode] = run_probe(mode)
+
+    results['improvement'] = {
+        'import_seconds_saved': round(results['eager']['import_seconds'] - results['background']['import_seconds'], 3),
+        'first_health_seconds_saved': round(
+            results['eager']['import_seconds'] + results['eager']['first_health_seconds']
+            - results['background']['import_seconds'] - results['background']['first_health_seconds'], 3)
+    }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,260 @@
+# Lightweight in-process metrics with Prometheus text exposition
+import bisect
+import threading
+import time
+
+# Metrics configuration
+#   'low'  - route and pipeline stage histograms, counters and gauges (safe for production)
+#   'full' - additionally times every DB query through an instrumented cursor
+#   'off'  - record nothing
+METRICS_CONFIG = {
+    'mode': 'low'
+}
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in pairs)
+    return '{' + body + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """Monotonic counter with optional labels"""
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            return self._values.get(key, 0)
+
+    def render(self):
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in items]
+
+class Gauge(Counter):
+    """Value that can go up and down"""
+    kind = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            self._values[key] = value
+
+class Histogram:
+    """Fixed-bucket histogram with optional labels"""
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def mean(self, **labels):
+        key = tuple(labels.get(n, '') for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            return series[1] / series[2] if series and series[2] else 0.0
+
+    def render(self):
+        with self._lock:
+            items = [(key, (list(s[0]), s[1], s[2])) for key, s in self._series.items()]
+
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = ('le', _format_value(bound) if bound != float('inf') else '+Inf')
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+class MetricsRegistry:
+    """Holds metrics and collector callbacks and renders the scrape output"""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def counter(self, name, help_text, labelnames=()):
+        metric = Counter(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, labelnames=()):
+        metric = Gauge(name, help_text, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help_text, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, name, help_text, kind, callback):
+        """Export values computed at scrape time.
+
+        callback() returns either a number or a dict mapping a label value
+        (rendered as label "name") to a number.
+        """
+        self._collectors.append((name, help_text, kind, callback))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+
+        for name, help_text, kind, callback in self._collectors:
+            try:
+                value = callback()
+            except Exception as e:
+                print(f"Error collecting metric {name}: {e}")
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(value, dict):
+                for label, v in value.items():
+                    lines.append(f"{name}{_format_labels(('name',), (label,))} {_format_value(v)}")
+            else:
+                lines.append(f"{name} {_format_value(value)}")
+
+        return '\n'.join(lines) + '\n'
+
+registry = MetricsRegistry()
+
+# Core metrics
+REQUEST_SECONDS = registry.histogram(
+    'attnd_http_request_duration_seconds', 'HTTP request latency by route',
+    ('method', 'route', 'status'))
+STAGE_SECONDS = registry.histogram(
+    'attnd_pipeline_stage_duration_seconds', 'Recognition pipeline stage latency',
+    ('stage',))
+DB_QUERY_SECONDS = registry.histogram(
+    'attnd_db_query_duration_seconds', 'DB query latency by statement type (full mode only)',
+    ('operation',))
+DB_QUERIES = registry.counter(
+    'attnd_db_queries_total', 'DB queries executed by statement type (full mode only)',
+    ('operation',))
+DB_CONNECT_FAILURES = registry.counter(
+    'attnd_db_connect_failures_total', 'Failed DB connection attempts')
+MODEL_QUEUE_DEPTH = registry.gauge(
+    'attnd_model_queue_depth', 'Requests currently waiting for or running face model inference')
+
+def enabled():
+    return METRICS_CONFIG['mode'] != 'off'
+
+def db_instrumented():
+    return METRICS_CONFIG['mode'] == 'full'
+
+class _StageTimer:
+    __slots__ = ('histogram', 'labels', 'start')
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+def stage(name):
+    """Context manager timing one pipeline stage"""
+    if not enabled():
+        return _NULL_TIMER
+    return _StageTimer(STAGE_SECONDS, {'stage': name})
+
+class _InstrumentedCursor:
+    """Cursor proxy that times execute() calls"""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, *args, **kwargs):
+        verb = operation.lstrip().split(None, 1)[0].upper() if operation.strip() else 'UNKNOWN'
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(operation, *args, **kwargs)
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - start, operation=verb)
+            DB_QUERIES.inc(operation=verb)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class _InstrumentedConnection:
+    """Connection proxy handing out instrumented cursors"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return _InstrumentedCursor(self._conn.cursor(*args, **kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+def instrument_connection(conn):
+    """Wrap a DB connection for per-query metrics when running in full mode"""
+    if conn is None or not db_instrumented():
+        return conn
+    return _InstrumentedConnection(conn)
@@ -0,0 +1,458 @@
+# Local event journal so kiosks keep recording attendance while MySQL is unreachable
+import contextlib
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import mysql.connector
+
+# Journal configuration
+JOURNAL_CONFIG = {
+    'enabled': True,
+    'path': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'offline_journal.sqlite3'),
+    'journal_logs': True,        # Recognition logs always go through the journal (batched inserts)
+    'sync_interval': 2.0,        # Seconds between sync passes
+    'batch_size': 200,           # Events replayed per MySQL transaction
+    'snapshot_interval': 30.0,   # Seconds between refreshes of today's attendance snapshot
+    'keep_synced_days': 7        # Synced events kept locally for inspection
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT NOT NULL UNIQUE,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    synced_at TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_pending ON events(synced_at, seq);
+CREATE TABLE IF NOT EXISTS today_attendance (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL,
+    person_id INTEGER NOT NULL,
+    name TEXT,
+    department TEXT,
+    position TEXT,
+    record_id INTEGER,
+    check_in_event_id TEXT,
+    check_in_time TEXT NOT NULL,
+    check_out_time TEXT,
+    total_hours REAL
+);
+CREATE INDEX IF NOT EXISTS idx_today_person ON today_attendance(date, person_id);
+"""
+
+# Replays are idempotent: event ids are unique in MySQL, and a check-out only closes an open record
+INSERT_CHECK_IN = """
+    INSERT INTO attendance_records
+        (person_id, check_in_time, date, check_in_method, status, confidence_score, check_in_event_id)
+    VALUES (%s, %s, %s, 'face_recognition', %s, %s, %s)
+    ON DUPLICATE KEY UPDATE id = id
+"""
+UPDATE_CHECK_OUT = """
+    UPDATE attendance_records
+    SET check_out_time = %s, check_out_method = 'face_recognition', total_hours = %s, status = %s,
+        check_out_event_id = %s
+    WHERE {key} = %s AND check_out_time IS NULL
+"""
+INSERT_LOG = """
+    INSERT INTO recognition_logs
+        (person_id, recognition_time, confidence_score, recognition_type, success, error_message, event_id)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE id = LAST_INSERT_ID(id)
+"""
+INSERT_EMBEDDING = """
+    INSERT INTO recognition_embeddings (log_id, embedding_data, candidates, margin)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE log_id = log_id
+"""
+TODAY_QUERY = """
+    SELECT ar.id, ar.person_id, p.name, p.department, p.position,
+           ar.check_in_time, ar.check_out_time, ar.total_hours
+    FROM attendance_records ar
+    JOIN persons p ON ar.person_id = p.id
+    WHERE ar.date = %s AND ar.check_in_time IS NOT NULL AND p.status = 'active'
+"""
+
+# Connection-level failures: the event stays queued and the pass is retried later
+UNAVAILABLE_ERRORS = (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError)
+
+# Errors worth retrying: too many connections, server shutdown, lock wait timeout, deadlock,
+# server gone / connection lost. A deadlock rolls back the whole transaction, so the batch is retried.
+TRANSIENT_ERRNOS = {1040, 1053, 1205, 1213, 2006, 2013}
+# Unknown column / table: the database is not migrated yet (migrate_database.py) and every event
+# would fail the same way, so events stay queued instead of being quarantined
+SCHEMA_ERRNOS = {1054, 1146}
+
+def is_retryable(error):
+    """True when a replay error should leave the batch queued for a later pass"""
+    return isinstance(error, UNAVAILABLE_ERRORS) or getattr(error, 'errno', None) in TRANSIENT_ERRNOS | SCHEMA_ERRNOS
+
+# Events still to replay, and events set aside after a non-retryable error
+PENDING = "synced_at IS NULL AND error IS NULL"
+QUARANTINED = "synced_at IS NULL AND error IS NOT NULL"
+
+def new_event_id():
+    return uuid.uuid4().hex
+
+def _iso(value):
+    return value.isoformat() if value is not None else None
+
+def _datetime(value):
+    return datetime.datetime.fromisoformat(value) if value else None
+
+class OfflineJournal:
+    """Append-only SQLite journal of attendance transitions and recognition logs.
+
+    Events are replayed to MySQL in order by a background syncer in batches,
+    one transaction per batch; a replayed batch that was already applied is a
+    no-op thanks to the event_id unique keys. Transient and schema errors roll
+    the batch back and leave it queued; an event failing for any other reason
+    is quarantined (error set, never marked synced) and retried on the next
+    start. A snapshot of today's attendance is kept locally so
+    check-in/check-out validation keeps working offline.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or JOURNAL_CONFIG
+        self._lock = threading.Lock()
+        self._db = None
+        self._connect = None
+        self._on_synced = None
+        self._snapshot_at = 0.0
+        self.online = True
+        self.journaled = 0
+        self.synced = 0
+        self.failed = 0
+        self.retries = 0
+        self.sync_passes = 0
+        self.last_sync_at = None
+
+    def _local(self):
+        """Shared SQLite connection (WAL, autocommit), opened on first use"""
+        if self._db is None:
+            self._db = sqlite3.connect(self.config['path'], check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Local write transaction, rolled back if the block raises (call with _lock held)"""
+        db = self._local()
+        db.execute("BEGIN")
+        try:
+            yield db
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        db.execute("COMMIT")
+
+    def start(self, connect, on_synced=None):
+        """Replay journaled events to MySQL from a background thread"""
+        self._connect = connect
+        self._on_synced = on_synced
+        self.requeue_quarantined()
+        threading.Thread(target=self._sync_loop, name='offline-journal', daemon=True).start()
+
+    def _sync_loop(self):
+        while True:
+            time.sleep(self.config['sync_interval'])
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Error syncing offline journal: {e}")
+
+    def append(self, kind, payload, event_id=None):
+        """Record one event locally; returns its event id"""
+        event_id = event_id or new_event_id()
+        with self._lock:
+            self._local().execute(
+                "INSERT INTO events (event_id, kind, payload, created_at) VALUES (?, ?, ?, ?)",
+                (event_id, kind, json.dumps(payload), datetime.datetime.now().isoformat()))
+            self.journaled += 1
+        return event_id
+
+    def log_recognition(self, row, embedding=None):
+        """Queue a recognition_logs row (see app.recognition_log_row) and its optional embedding"""
+        self.append('recognition_log', {**row, 'recognition_time': _iso(row['recognition_time']),
+                                        'embedding': embedding})
+
+    # ------------------------------------------------------------------
+    # Today's attendance snapshot
+    # ------------------------------------------------------------------
+
+    def _open_record(self, db, person_id, today):
+        return db.execute(
+            "SELECT id, record_id, check_in_event_id, check_in_time FROM today_attendance "
+            "WHERE date = ? AND person_id = ? AND check_out_time IS NULL ORDER BY check_in_time DESC LIMIT 1",
+            (today.isoformat(), person_id)).fetchone()
+
+    def note_attendance(self, person_id, person_name, mode, result):
+        """Mirror an attendance write made directly in MySQL into the local snapshot"""
+        if not self.config['enabled'] or not result.get('success'):
+            return
+        today = datetime.date.today().isoformat()
+        with self._lock:
+            db = self._local()
+            if mode == 'check_in':
+                db.execute(
+                    "INSERT INTO today_attendance (date, person_id, name, record_id, check_in_time) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (today, person_id, person_name, result.get('attendance_id'), result.get('timestamp')))
+            else:
+                db.execute(
+                    "UPDATE today_attendance SET check_out_time = ?, total_hours = ? WHERE date = ? AND record_id = ?",
+                    (result.get('timestamp'), result.get('total_hours'), today, result.get('attendance_id')))
+
+    def refresh_snapshot(self, cursor):
+        """Replace today's snapshot with MySQL's view (only once the journal is drained)"""
+        today = datetime.date.today()
+        cursor.execute(TODAY_QUERY, (today,))
+        rows = [
+            (today.isoformat(), person_id, name, department, position, record_id,
+             _iso(check_in_time), _iso(check_out_time), float(total_hours) if total_hours is not None else None)
+            for record_id, person_id, name, department, position, check_in_time, check_out_time, total_hours
+            in cursor.fetchall()
+        ]
+        with self._lock:
+            # Events journaled meanwhile are not in MySQL yet; keep the local view until they sync
+            if self._local().execute(f"SELECT 1 FROM events WHERE {PENDING} LIMIT 1").fetchone():
+                return
+            with self._transaction() as db:
+                db.execute("DELETE FROM today_attendance")
+                db.executemany(
+                    "INSERT INTO today_attendance (date, person_id, name, department, position, record_id, "
+                    "check_in_time, check_out_time, total_hours) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._snapshot_at = time.monotonic()
+
+    def present_today(self):
+        """Currently present persons from the local snapshot (served while MySQL is down)"""
+        with self._lock:
+            cursor = self._local().execute(
+                "SELECT person_id AS id, name, department, position, check_in_time, check_out_time, total_hours "
+                "FROM today_attendance WHERE date = ? AND check_out_time IS NULL ORDER BY check_in_time",
+                (datetime.date.today().isoformat(),))
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def record_attendance(self, person_id, person_name, confidence_score, mode, calendar):
+        """Validate against today's snapshot and journal a check-in/check-out (same result shape as online)"""
+        now = datetime.datetime.now()
+        today = now.date()
+        self.online = False
+        with self._lock:
+            db = self._local()
+            record = self._open_record(db, person_id, today)
+            if mode == 'check_in':
+                if record:
+                    return {
+                        'success': False,
+                        'error': 'already_checked_in',
+                        'message': f'{person_name}, you have already checked in today. Your check-in time was '
+                                   f'{_datetime(record[3]).strftime("%H:%M:%S")}.'
+                    }
+                status, status_message = calendar.evaluate_check_in(person_id, now)
+                event_id = new_event_id()
+                with self._transaction():
+                    db.execute(
+                        "INSERT INTO events (event_id, kind, payload, created_at) VALUES (?, 'check_in', ?, ?)",
+                        (event_id, json.dumps({'person_id': person_id, 'check_in_time': now.isoformat(),
+                                               'date': today.isoformat(), 'status': status,
+                                               'confidence_score': float(confidence_score)}), now.isoformat()))
+                    db.execute(
+                        "INSERT INTO today_attendance (date, person_id, name, check_in_event_id, check_in_time) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (today.isoformat(), person_id, person_name, event_id, now.isoformat()))
+                self.journaled += 1
+                return {
+                    'success': True,
+                    'attendance_id': None,
+                    'offline': True,
+                    'message': f'Welcome {person_name}! Check-in recorded successfully at '
+                               f'{now.strftime("%H:%M:%S")} ({status_message}).',
+                    'timestamp': now.isoformat(),
+                    'status': status
+                }
+
+            if not record:
+                return {
+                    'success': False,
+                    'error': 'no_checkin',
+                    'message': f'{person_name}, you did not check in today or you have already checked out. '
+                               f'Unable to process check-out.'
+                }
+            local_id, record_id, check_in_event_id, check_in_time = record
+            total_hours = round((now - _datetime(check_in_time)).total_seconds() / 3600, 2)
+            status, status_message = calendar.evaluate_check_out(person_id, now, total_hours)
+            event_id = new_event_id()
+            with self._transaction():
+                db.execute(
+                    "INSERT INTO events (event_id, kind, payload, created_at) VALUES (?, 'check_out', ?, ?)",
+                    (event_id, json.dumps({'record_id': record_id, 'check_in_event_id': check_in_event_id,
+                                           'check_out_time': now.isoformat(), 'total_hours': total_hours,
+                                           'status': status}), now.isoformat()))
+                db.execute("UPDATE today_attendance SET check_out_time = ?, total_hours = ? WHERE id = ?",
+                           (now.isoformat(), total_hours, local_id))
+            self.journaled += 1
+            return {
+                'success': True,
+                'attendance_id': record_id,
+                'offline': True,
+                'message': f'Goodbye {person_name}! Check-out recorded successfully at '
+                           f'{now.strftime("%H:%M:%S")} {status_message}.',
+                'total_hours': total_hours,
+                'timestamp': now.isoformat(),
+                'status': status
+            }
+
+    # ------------------------------------------------------------------
+    # Sync
+    # ------------------------------------------------------------------
+
+    def pending(self):
+        with self._lock:
+            return self._local().execute(f"SELECT COUNT(*) FROM events WHERE {PENDING}").fetchone()[0]
+
+    def quarantined(self):
+        with self._lock:
+            return self._local().execute(f"SELECT COUNT(*) FROM events WHERE {QUARANTINED}").fetchone()[0]
+
+    def requeue_quarantined(self):
+        """Give quarantined events another replay attempt (e.g. after fixing the data or schema)"""
+        with self._lock:
+            return self._local().execute(f"UPDATE events SET error = NULL WHERE {QUARANTINED}").rowcount
+
+    def _replay(self, cursor, kind, event_id, payload):
+        if kind == 'check_in':
+            cursor.execute(INSERT_CHECK_IN, (
+                payload['person_id'], _datetime(payload['check_in_time']), payload['date'],
+                payload['status'], payload['confidence_score'], event_id))
+        elif kind == 'check_out':
+            key, value = ('id', payload['record_id']) if payload['record_id'] else \
+                ('check_in_event_id', payload['check_in_event_id'])
+            cursor.execute(UPDATE_CHECK_OUT.format(key=key), (
+                _datetime(payload['check_out_time']), payload['total_hours'], payload['status'], event_id, value))
+            if cursor.rowcount == 0:
+                # Already closed (a replay) is fine; a missing check-in (itself quarantined) is not
+                cursor.execute(f"SELECT id FROM attendance_records WHERE {key} = %s", (value,))
+                if not cursor.fetchall():
+                    raise ValueError(f"Check-in record not found ({key}={value})")
+        elif kind == 'recognition_log':
+            cursor.execute(INSERT_LOG, (
+                payload['person_id'], _datetime(payload['recognition_time']), payload['confidence_score'],
+                payload['recognition_type'], payload['success'], payload['error_message'], event_id))
+            embedding = payload.get('embedding')
+            if embedding:
+                cursor.execute(INSERT_EMBEDDING, (
+                    cursor.lastrowid, json.dumps(embedding['embedding']), json.dumps(embedding['candidates']),
+                    embedding['margin']))
+        else:
+            raise ValueError(f"Unknown journal event kind: {kind}")
+
+    def sync(self):
+        """Replay pending events to MySQL in batches; returns the number of events synced"""
+        if self._connect is None:
+            return 0
+        with self._lock:
+            has_pending = self._local().execute(
+                f"SELECT 1 FROM events WHERE {PENDING} LIMIT 1").fetchone() is not None
+        snapshot_due = time.monotonic() - self._snapshot_at >= self.config['snapshot_interval']
+        if not has_pending and not snapshot_due:
+            return 0
+
+        conn = self._connect()
+        if not conn:
+            self.online = False
+            return 0
+        total = 0
+        kinds = set()
+        try:
+            cursor = conn.cursor()
+            while True:
+                with self._lock:
+                    batch = self._local().execute(
+                        f"SELECT seq, event_id, kind, payload FROM events WHERE {PENDING} "
+                        "ORDER BY seq LIMIT ?", (self.config['batch_size'],)).fetchall()
+                if not batch:
+                    break
+
+                done, failed = [], []
+                batch_kinds = set()
+                for seq, event_id, kind, payload in batch:
+                    try:
+                        self._replay(cursor, kind, event_id, json.loads(payload))
+                        done.append(seq)
+                        batch_kinds.add(kind)
+                    except (mysql.connector.Error, ValueError, KeyError) as e:
+                        if is_retryable(e):
+                            raise
+                        # Only this statement is rolled back; a bad event must not block the queue
+                        print(f"Quarantining journal event {event_id} ({kind}): {e}")
+                        failed.append((str(e), seq))
+                conn.commit()
+
+                synced_at = datetime.datetime.now().isoformat()
+                with self._lock:
+                    with self._transaction() as db:
+                        db.executemany("UPDATE events SET synced_at = ? WHERE seq = ?",
+                                       [(synced_at, s) for s in done])
+                        db.executemany("UPDATE events SET error = ? WHERE seq = ?", failed)
+                    self.synced += len(done)
+                    self.failed += len(failed)
+                total += len(done)
+                kinds |= batch_kinds
+
+            if snapshot_due:
+                self.refresh_snapshot(cursor)
+            self.online = True
+        except mysql.connector.Error as e:
+            if not is_retryable(e):
+                raise
+            # Uncommitted replays of this batch are discarded and replayed (idempotently) next pass
+            try:
+                conn.rollback()
+            except mysql.connector.Error:
+                pass
+            self.online = not isinstance(e, UNAVAILABLE_ERRORS)
+            self.retries += 1
+            print(f"Offline journal sync interrupted, will retry: {e}")
+        finally:
+            conn.close()
+
+        self.sync_passes += 1
+        self.last_sync_at = time.time()
+        if total:
+            self._prune()
+            if self._on_synced:
+                self._on_synced(kinds)
+        return total
+
+    def _prune(self):
+        cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.config['keep_synced_days'])).isoformat()
+        with self._lock:
+            db = self._local()
+            db.execute("DELETE FROM events WHERE synced_at IS NOT NULL AND synced_at < ?", (cutoff,))
+            db.execute("DELETE FROM today_attendance WHERE date < ?", (datetime.date.today().isoformat(),))
+
+    def stats(self):
+        """Queue depth and sync counters for health and metrics"""
+        return {
+            'online': 1 if self.online else 0,
+            'pending': self.pending(),
+            'journaled': self.journaled,
+            'synced': self.synced,
+            'failed': self.failed,
+            'quarantined': self.quarantined(),
+            'retries': self.retries,
+            'sync_passes': self.sync_passes
+        }
+
+offline_journal = OfflineJournal()
@@ -0,0 +1,138 @@
+# Hot-path SQL shared by app.py, async_server.py, gallery.py and check_query_plans.py.
+# Indexes in FINAL_setup_database.sql are designed around these statements; when editing
+# one, re-run check_query_plans.py against a seeded database.
+
+# Recognition: today's open record for a person (index: idx_attendance_person_open)
+OPEN_RECORD_QUERY = """
+    SELECT id, check_in_time FROM attendance_records
+    WHERE person_id = %s AND date = %s AND check_in_time IS NOT NULL AND check_out_time IS NULL
+    ORDER BY check_in_time DESC LIMIT 1
+"""
+
+# Face gallery: every active person's primary templates (idx_face_encodings_primary_person)
+GALLERY_TEMPLATES_QUERY = """
+    SELECT fe.person_id, fe.encoding_data, p.name
+    FROM face_encodings fe
+    JOIN persons p ON fe.person_id = p.id
+    WHERE fe.is_primary = true AND p.status = 'active'
+"""
+
+PERSONS_QUERY = "SELECT * FROM persons ORDER BY registration_date DESC"
+
+# MAX over an indexed column can be answered from the index (idx_persons_last_updated)
+PERSONS_VERSION_QUERY = "SELECT COUNT(*), MAX(last_updated) FROM persons"
+
+ATTENDANCE_QUERY = """
+    SELECT
+        ar.*,
+        p.name as person_name,
+        p.department,
+        p.position
+    FROM attendance_records ar
+    LEFT JOIN persons p ON ar.person_id = p.id
+    WHERE 1=1
+"""
+
+# Employees who checked in today (open records are filtered by the caller);
+# idx_attendance_date_cover is designed to return the day's rows in check-in order without row lookups
+PRESENT_TODAY_QUERY = """
+    SELECT DISTINCT
+        p.id,
+        p.name,
+        p.department,
+        p.position,
+        ar.check_in_time,
+        ar.check_out_time,
+        ar.total_hours
+    FROM persons p
+    INNER JOIN attendance_records ar ON p.id = ar.person_id
+    WHERE ar.date = %s
+      AND ar.check_in_time IS NOT NULL
+      AND p.status = 'active'
+    ORDER BY ar.check_in_time ASC
+"""
+
+RECOGNITION_LOGS_QUERY = """
+    SELECT rl.*, p.name as person_name
+    FROM recognition_logs rl
+    LEFT JOIN persons p ON rl.person_id = p.id
+    ORDER BY rl.recognition_time DESC
+    LIMIT 100
+"""
+
+# Person names come from the join, so renames also change the version
+RECOGNITION_LOGS_VERSION_QUERY = \
+    "SELECT (SELECT MAX(id) FROM recognition_logs), (SELECT MAX(last_updated) FROM persons)"
+
+EXPORT_QUERY = """
+    SELECT
+        p.employee_id,
+        p.name as employee_name,
+        p.department,
+        p.position,
+        ar.date,
+        ar.check_in_time,
+        ar.check_out_time,
+        ar.total_hours,
+        ar.overtime_hours,
+        ar.status,
+        ar.check_in_method,
+        ar.check_out_method,
+        ar.location,
+        ar.notes
+    FROM attendance_records ar
+    JOIN persons p ON ar.person_id = p.id
+    WHERE ar.date BETWEEN %s AND %s
+    AND p.status = 'active'
+    ORDER BY ar.date DESC, p.name ASC
+"""
+
+# Aggregates are designed to read only idx_attendance_date_cover
+SUMMARY_QUERY = """
+    SELECT
+        COUNT(DISTINCT ar.person_id) as total_employees,
+        COUNT(ar.id) as total_attendance_records,
+        AVG(ar.total_hours) as avg_daily_hours,
+        SUM(ar.total_hours) as total_hours_worked,
+        SUM(ar.overtime_hours) as total_overtime_hours,
+        COUNT(CASE WHEN ar.status = 'late' THEN 1 END) as late_instances,
+        COUNT(CASE WHEN ar.status = 'early_leave' THEN 1 END) as early_leave_instances
+    FROM attendance_records ar
+    JOIN persons p ON ar.person_id = p.id
+    WHERE ar.date BETWEEN %s AND %s
+    AND p.status = 'active'
+"""
+
+EMPLOYEE_SUMMARY_QUERY = """
+    SELECT
+        p.employee_id,
+        p.name,
+        p.department,
+        COUNT(ar.id) as days_present,
+        AVG(ar.total_hours) as avg_hours,
+        SUM(ar.total_hours) as total_hours,
+        SUM(ar.overtime_hours) as overtime_hours,
+        COUNT(CASE WHEN ar.status = 'late' THEN 1 END) as late_days
+    FROM persons p
+    LEFT JOIN attendance_records ar ON p.id = ar.person_id
+        AND ar.date BETWEEN %s AND %s
+    WHERE p.status = 'active'
+    GROUP BY p.id, p.employee_id, p.name, p.department
+    ORDER BY p.name
+"""
+
+def attendance_query(date_filter=None, person_id=None):
+    """Attendance records joined with employee details, optionally filtered by date and person"""
+    query = ATTENDANCE_QUERY
+    params = []
+
+    if date_filter:
+        query += " AND ar.date = %s"
+        params.append(date_filter)
+
+    if person_id:
+        query += " AND ar.person_id = %s"
+        params.append(person_id)
+
+    query += " ORDER BY ar.check_in_time DESC"
+    return query, params
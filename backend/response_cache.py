@@ -0,0 +1,128 @@
+# Versioned response cache with ETag / If-None-Match support for read-mostly GET endpoints
+import hashlib
+import threading
+import time
+from flask import Response, request
+
+# Response cache configuration
+RESPONSE_CACHE_CONFIG = {
+    'enabled': True,
+    'version_check_interval': 1.0   # Seconds a data version is trusted before re-querying it
+}
+
+class ResponseCache:
+    """Serialized JSON responses keyed by a cheap data version.
+
+    Each cached endpoint has a name, a version loader (a small query such as
+    MAX(id)) and a builder that produces the full response. A response is only
+    rebuilt when the version changes or invalidate() is called by a write path
+    in this process; unchanged responses are served from memory, or as a 304
+    when the client already holds the current ETag.
+    """
+
+    def __init__(self, config=None):
+        self.config = config or RESPONSE_CACHE_CONFIG
+        self._lock = threading.Lock()
+        self._entries = {}       # name -> (version, etag, body, mimetype)
+        self._generations = {}   # name -> local invalidation counter
+        self._versions = {}      # name -> (checked_at, data_version)
+        self.counters = {'not_modified': 0, 'hits': 0, 'rebuilds': 0, 'invalidations': 0}
+
+    def invalidate(self, name):
+        """Mark an endpoint's data as changed (call after writes)"""
+        with self._lock:
+            self._generations[name] = self._generations.get(name, 0) + 1
+            self._versions.pop(name, None)
+            self.counters['invalidations'] += 1
+
+    def cached_version(self, name):
+        """Current (generation, data_version) for name if checked within version_check_interval, else None"""
+        now = time.monotonic()
+        with self._lock:
+            checked = self._versions.get(name)
+            if checked and now - checked[0] < self.config['version_check_interval']:
+                return (self._generations.get(name, 0), checked[1])
+        return None
+
+    def set_version(self, name, data_version):
+        """Record a freshly loaded data version; returns the full (generation, data_version)"""
+        with self._lock:
+            self._versions[name] = (time.monotonic(), data_version)
+            return (self._generations.get(name, 0), data_version)
+
+    def _current_version(self, name, load_version):
+        """Data version for name, re-queried at most every version_check_interval seconds"""
+        version = self.cached_version(name)
+        if version is None:
+            data_version = load_version()
+            if data_version is None:
+                return None
+            version = self.set_version(name, data_version)
+        return version
+
+    def lookup(self, name, version):
+        """(etag, body, mimetype) cached for name at version, or None"""
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry and entry[0] == version:
+            return entry[1:]
+        return None
+
+    def store(self, name, version, body, mimetype):
+        """Cache a freshly built 200 body for name at version; returns its ETag"""
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        with self._lock:
+            self._entries[name] = (version, etag, body, mimetype)
+            self.counters['rebuilds'] += 1
+        return etag
+
+    def count(self, not_modified, cached):
+        """Count a served response (304 or a 200 from memory)"""
+        with self._lock:
+            if not_modified:
+                self.counters['not_modified'] += 1
+            elif cached:
+                self.counters['hits'] += 1
+
+    def respond(self, name, load_version, build):
+        """Serve name from cache when its version is unchanged, otherwise call build().
+
+        load_version() returns a hashable version or None when it cannot be
+        determined (the cache is bypassed). build() returns a Flask response;
+        only 200 responses are cached.
+        """
+        if not self.config['enabled']:
+            return build()
+
+        version = self._current_version(name, load_version)
+        if version is None:
+            return build()
+
+        entry = self.lookup(name, version)
+        if entry:
+            etag, body, mimetype = entry
+            cached = True
+        else:
+            response = build()
+            if isinstance(response, tuple) or response.status_code != 200:
+                return response
+            body = response.get_data()
+            mimetype = response.mimetype
+            etag = self.store(name, version, body, mimetype)
+            cached = False
+
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        response = response.make_conditional(request)
+        self.count(response.status_code == 304, cached)
+        return response
+
+    def stats(self):
+        """Counters for monitoring"""
+        with self._lock:
+            stats = dict(self.counters)
+            stats['entries'] = len(self._entries)
+        return stats
+
+response_cache = ResponseCache()
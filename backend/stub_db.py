@@ -0,0 +1,352 @@
+# SQLite stand-in for the MySQL attendance_system database (benchmarks and load tests)
+import datetime
+import json
+import random
+import re
+import sqlite3
+import threading
+import uuid
+
+# Subset of FINAL_setup_database.sql covering the tables and columns the API queries
+STUB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS persons (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    employee_id VARCHAR(20) UNIQUE,
+    name VARCHAR(255) NOT NULL,
+    email VARCHAR(255),
+    phone VARCHAR(20),
+    department VARCHAR(100),
+    position VARCHAR(100),
+    hire_date DATE,
+    status VARCHAR(20) DEFAULT 'active',
+    registration_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+    last_updated DATETIME DEFAULT CURRENT_TIMESTAMP,
+    notes TEXT,
+    user_id INTEGER,
+    created_by INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS face_encodings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    person_id INTEGER NOT NULL,
+    encoding_data TEXT NOT NULL,
+    encoding_type VARCHAR(50) DEFAULT 'arcface',
+    face_angle VARCHAR(20) DEFAULT 'front',
+    confidence_score FLOAT DEFAULT 0.0,
+    created_date DATETIME DEFAULT CURRENT_TIMESTAMP,
+    is_primary BOOLEAN DEFAULT 0,
+    is_active BOOLEAN DEFAULT 1,
+    template_version VARCHAR(10) DEFAULT '1.0',
+    quality_score FLOAT DEFAULT 0.0,
+    created_by INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS attendance_records (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    person_id INTEGER NOT NULL,
+    check_in_time DATETIME,
+    check_out_time DATETIME,
+    date DATE NOT NULL,
+    status VARCHAR(20) DEFAULT 'present',
+    check_in_method VARCHAR(20) DEFAULT 'face_recognition',
+    check_out_method VARCHAR(20) DEFAULT 'face_recognition',
+    total_hours DECIMAL(5,2) DEFAULT 0.00,
+    overtime_hours DECIMAL(5,2) DEFAULT 0.00,
+    confidence_score FLOAT DEFAULT 0.0,
+    location VARCHAR(100) DEFAULT 'Main Office',
+    ip_address VARCHAR(45),
+    notes TEXT,
+    check_in_event_id CHAR(32) UNIQUE,
+    check_out_event_id CHAR(32) UNIQUE,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    created_by INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS recognition_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    person_id INTEGER,
+    recognition_time DATETIME DEFAULT CURRENT_TIMESTAMP,
+    confidence_score FLOAT DEFAULT 0.0,
+    recognition_type VARCHAR(20) DEFAULT 'verification',
+    camera_id VARCHAR(50) DEFAULT 'default',
+    location VARCHAR(100) DEFAULT 'Main Office',
+    success BOOLEAN DEFAULT 1,
+    failure_reason VARCHAR(255),
+    error_message TEXT,
+    ip_address VARCHAR(45),
+    user_agent TEXT,
+    session_id VARCHAR(100),
+    event_id CHAR(32) UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS system_settings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    setting_key VARCHAR(100) UNIQUE NOT NULL,
+    setting_value TEXT,
+    setting_type VARCHAR(10) DEFAULT 'string',
+    description TEXT,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS holidays (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name VARCHAR(100) NOT NULL,
+    date DATE NOT NULL,
+    type VARCHAR(10) DEFAULT 'company',
+    is_working_day BOOLEAN DEFAULT 0,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS work_schedules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    person_id INTEGER NOT NULL,
+    schedule_name VARCHAR(100) NOT NULL,
+    monday_start TIME,
+    monday_end TIME,
+    tuesday_start TIME,
+    tuesday_end TIME,
+    wednesday_start TIME,
+    wednesday_end TIME,
+    thursday_start TIME,
+    thursday_end TIME,
+    friday_start TIME,
+    friday_end TIME,
+    saturday_start TIME,
+    saturday_end TIME,
+    sunday_start TIME,
+    sunday_end TIME,
+    effective_from DATE NOT NULL,
+    effective_to DATE,
+    is_active BOOLEAN DEFAULT 1,
+    updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS person_sites (
+    person_id INTEGER NOT NULL,
+    site VARCHAR(100) NOT NULL,
+    assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (person_id, site)
+);
+
+CREATE TABLE IF NOT EXISTS recognition_embeddings (
+    log_id INTEGER PRIMARY KEY,
+    embedding_data TEXT NOT NULL,
+    candidates TEXT,
+    margin FLOAT
+);
+
+CREATE INDEX IF NOT EXISTS idx_face_encodings_person_active ON face_encodings(person_id, is_active);
+CREATE INDEX IF NOT EXISTS idx_attendance_person_open ON attendance_records(person_id, date, check_out_time, check_in_time);
+CREATE INDEX IF NOT EXISTS idx_attendance_date_cover ON attendance_records(date, check_in_time, person_id, check_out_time, total_hours, overtime_hours, status);
+CREATE INDEX IF NOT EXISTS idx_recognition_logs_time ON recognition_logs(recognition_time);
+"""
+
+DEPARTMENTS = ['Engineering', 'Human Resources', 'Marketing', 'Sales', 'Finance', 'Operations', 'IT Support']
+
+def _parse_datetime(value):
+    text = value.decode()
+    try:
+        return datetime.datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+def _parse_date(value):
+    try:
+        return datetime.date.fromisoformat(value.decode()[:10])
+    except ValueError:
+        return None
+
+sqlite3.register_adapter(datetime.datetime, lambda v: v.isoformat(sep=' '))
+sqlite3.register_adapter(datetime.date, lambda v: v.isoformat())
+sqlite3.register_converter('DATETIME', _parse_datetime)
+sqlite3.register_converter('DATE', _parse_date)
+
+# Idempotent inserts used by the offline journal replay. On a conflict SQLite does not emulate
+# LAST_INSERT_ID(id): lastrowid keeps its previous value.
+_ON_DUPLICATE = re.compile(r'\s+ON DUPLICATE KEY UPDATE\s+.*$', re.IGNORECASE | re.DOTALL)
+
+def _translate(query):
+    """Translate MySQL-style placeholders and ON DUPLICATE KEY clauses to SQLite"""
+    return _ON_DUPLICATE.sub(' ON CONFLICT DO NOTHING', query.replace('%s', '?'))
+
+class StubCursor:
+    """mysql.connector-like cursor over sqlite3 (supports dictionary=True)"""
+
+    def __init__(self, cursor, dictionary=False):
+        self._cursor = cursor
+        self._dictionary = dictionary
+
+    def execute(self, operation, params=None, multi=False):
+        self._cursor.execute(_translate(operation), tuple(params or ()))
+
+    def executemany(self, operation, seq_params):
+        self._cursor.executemany(_translate(operation), [tuple(p) for p in seq_params])
+
+    def _convert(self, row):
+        if row is None or not self._dictionary:
+            return row
+        return {col[0]: value for col, value in zip(self._cursor.description, row)}
+
+    def fetchone(self):
+        return self._convert(self._cursor.fetchone())
+
+    def fetchall(self):
+        return [self._convert(row) for row in self._cursor.fetchall()]
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def close(self):
+        self._cursor.close()
+
+class StubConnection:
+    """mysql.connector-like connection over sqlite3"""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, dictionary=False, **kwargs):
+        return StubCursor(self._conn.cursor(), dictionary=dictionary)
+
+    def commit(self):
+        self._conn.commit()
+
+    def rollback(self):
+        self._conn.rollback()
+
+    def close(self):
+        self._conn.close()
+
+class StubDatabase:
+    """In-process SQLite database standing in for MySQL.
+
+    Use connect() as a drop-in for app.get_db_connection.
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            # Shared in-memory database, kept alive by the anchor connection
+            path = f"file:attnd_stub_{uuid.uuid4().hex}?mode=memory&cache=shared"
+        self.path = path
+        self._lock = threading.Lock()
+        self._anchor = self._raw_connect()
+        self._anchor.executescript(STUB_SCHEMA)
+        self._anchor.commit()
+
+    def _raw_connect(self):
+        conn = sqlite3.connect(
+            self.path, uri=self.path.startswith('file:'), timeout=30,
+            detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+        )
+        if not self.path.startswith('file:'):
+            # File-backed databases are shared by concurrent load-test threads
+            conn.execute('PRAGMA journal_mode=WAL')
+        return conn
+
+    def connect(self):
+        """Return a new mysql.connector-like connection"""
+        return StubConnection(self._raw_connect())
+
+    def execute(self, query, params=()):
+        with self._lock:
+            cur = self._anchor.execute(_translate(query), params)
+            self._anchor.commit()
+            return cur
+
+    def count(self, table):
+        return self._anchor.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def seed_gallery(self, size, dim=512, seed=0, batch_size=5000, sites=0):
+        """Insert `size` active persons with random unit-length primary embeddings.
+
+        With sites > 0, persons are assigned round-robin to sites "site-0" ...
+        Returns the generated embeddings as a (size, dim) float32 array so callers
+        can build genuine probes.
+        """
+        import numpy as np
+
+        rng = np.random.default_rng(seed)
+        embeddings = rng.standard_normal((size, dim)).astype(np.float32)
+        embeddings /= np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+        now = datetime.datetime.now()
+        start_id = self.count('persons')
+        with self._lock:
+            for offset in range(0, size, batch_size):
+                chunk = range(offset, min(size, offset + batch_size))
+                person_rows = [
+                    (f"EMP{start_id + i + 1:06d}", f"Synthetic Person {start_id + i + 1}",
+                     DEPARTMENTS[i % len(DEPARTMENTS)], 'Staff', 'active', now, now)
+                    for i in chunk
+                ]
+                self._anchor.executemany(
+                    "INSERT INTO persons (employee_id, name, department, position, status, registration_date, last_updated) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", person_rows)
+                first_id = self._anchor.execute("SELECT MAX(id) FROM persons").fetchone()[0] - len(person_rows) + 1
+                encoding_rows = [
+                    (first_id + j, json.dumps([round(float(x), 6) for x in embeddings[i]]), now, 1)
+                    for j, i in enumerate(chunk)
+                ]
+                self._anchor.executemany(
+                    "INSERT INTO face_encodings (person_id, encoding_data, created_date, is_primary) VALUES (?, ?, ?, ?)",
+                    encoding_rows)
+                if sites:
+                    self._anchor.executemany(
+                        "INSERT INTO person_sites (person_id, site) VALUES (?, ?)",
+                        [(first_id + j, f"site-{i % sites}") for j, i in enumerate(chunk)])
+            self._anchor.commit()
+
+        return embeddings
+
+    def seed_attendance(self, days=30, seed=0, end_date=None, batch_size=5000):
+        """Insert one attendance record per active person per weekday for `days` days"""
+        rnd = random.Random(seed)
+        end_date = end_date or datetime.date.today() - datetime.timedelta(days=1)
+        person_ids = [row[0] for row in self._anchor.execute("SELECT id FROM persons WHERE status = 'active'")]
+
+        rows = []
+        inserted = 0
+        with self._lock:
+            for day_offset in range(days):
+                day = end_date - datetime.timedelta(days=day_offset)
+                if day.weekday() >= 5:
+                    continue
+                for person_id in person_ids:
+                    check_in = datetime.datetime.combine(day, datetime.time(8, 0)) + datetime.timedelta(minutes=rnd.randint(0, 120))
+                    check_out = check_in + datetime.timedelta(minutes=rnd.randint(6 * 60, 10 * 60))
+                    hours = round((check_out - check_in).total_seconds() / 3600, 2)
+                    status = 'present' if check_in.time() <= datetime.time(9, 30) else 'late'
+                    rows.append((person_id, check_in, check_out, day, status, hours, max(0.0, round(hours - 9.0, 2))))
+                    if len(rows) >= batch_size:
+                        inserted += self._insert_attendance(rows)
+                        rows = []
+            if rows:
+                inserted += self._insert_attendance(rows)
+            self._anchor.commit()
+        return inserted
+
+    def _insert_attendance(self, rows):
+        self._anchor.executemany(
+            "INSERT INTO attendance_records (person_id, check_in_time, check_out_time, date, status, total_hours, overtime_hours) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def clear_today(self):
+        """Remove today's attendance so check-in benchmarks can be repeated"""
+        self.execute("DELETE FROM attendance_records WHERE date = %s", (datetime.date.today(),))
+
+    def close(self):
+        self._anchor.close()
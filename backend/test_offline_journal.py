@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Offline journal replay tests against the SQLite stand-in database (stub_db.py)
+
+Usage:
+    python -m unittest test_offline_journal
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import mysql.connector
+
+from offline_journal import JOURNAL_CONFIG, OfflineJournal
+from stub_db import StubDatabase
+
+try:
+    import app
+except ImportError:  # Flask/numpy not installed: only the journal tests run
+    app = None
+
+class FixedCalendar:
+    """attendance_calendar stand-in: everyone is on time"""
+
+    def evaluate_check_in(self, person_id, now):
+        return 'present', 'on time'
+
+    def evaluate_check_out(self, person_id, now, total_hours):
+        return 'present', ''
+
+class FlakyConnection:
+    """Stub connection whose cursors raise `error` on the first `times` statements matching `statement`"""
+
+    def __init__(self, conn, error, statement, times=1):
+        self._conn = conn
+        self.error = error
+        self.statement = statement
+        self.remaining = times
+
+    def cursor(self, **kwargs):
+        return FlakyCursor(self, self._conn.cursor(**kwargs))
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+class FlakyCursor:
+    def __init__(self, owner, cursor):
+        self._owner = owner
+        self._cursor = cursor
+
+    def execute(self, operation, params=None):
+        if self._owner.remaining and self._owner.statement in operation:
+            self._owner.remaining -= 1
+            raise self._owner.error
+        self._cursor.execute(operation, params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+class JournalTestCase(unittest.TestCase):
+    """Fresh stub database with person 1 and a started journal replaying into it"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = StubDatabase()
+        self.db.execute("INSERT INTO persons (id, employee_id, name, status) VALUES (1, 'EMP001', 'Ada', 'active')")
+        # Long interval so the background loop never races the explicit sync() calls
+        config = {**JOURNAL_CONFIG, 'path': os.path.join(self.tmp.name, 'journal.sqlite3'), 'sync_interval': 3600}
+        self.journal = OfflineJournal(config)
+        self.connect = self.db.connect
+        self.journal.start(lambda: self.connect())
+
+    def tearDown(self):
+        self.journal._local().close()
+        self.db.close()
+        self.tmp.cleanup()
+
+class OfflineJournalReplayTest(JournalTestCase):
+    def check_in_offline(self):
+        result = self.journal.record_attendance(1, 'Ada', 0.91, 'check_in', FixedCalendar())
+        self.assertTrue(result['success'])
+        self.assertTrue(result['offline'])
+
+    def log_offline(self):
+        self.journal.log_recognition({
+            'person_id': 1, 'recognition_time': datetime.datetime.now(), 'confidence_score': 0.91,
+            'recognition_type': 'identification', 'success': True, 'error_message': None})
+
+    def replay_all_again(self):
+        """Simulate a batch whose MySQL commit landed but whose local synced_at update did not"""
+        with self.journal._lock:
+            self.journal._local().execute("UPDATE events SET synced_at = NULL")
+
+    def test_replay_is_idempotent(self):
+        self.check_in_offline()
+        self.log_offline()
+        self.assertEqual(self.journal.sync(), 2)
+
+        self.replay_all_again()
+        self.assertEqual(self.journal.sync(), 2)
+        self.assertEqual(self.db.count('attendance_records'), 1)
+        self.assertEqual(self.db.count('recognition_logs'), 1)
+        self.assertEqual(self.journal.pending(), 0)
+        self.assertEqual(self.journal.quarantined(), 0)
+
+    def test_check_out_replay_is_idempotent(self):
+        self.check_in_offline()
+        result = self.journal.record_attendance(1, 'Ada', 0.91, 'check_out', FixedCalendar())
+        self.assertTrue(result['success'])
+        self.assertEqual(self.journal.sync(), 2)
+
+        self.replay_all_again()
+        self.assertEqual(self.journal.sync(), 2)
+        self.assertEqual(self.journal.quarantined(), 0)
+        rows = self.db.execute("SELECT check_out_time, check_out_event_id FROM attendance_records").fetchall()
+        self.assertEqual(len(rows), 1)
+        self.assertIsNotNone(rows[0][0])
+        self.assertIsNotNone(rows[0][1])
+
+    def assert_retried(self, error):
+        self.check_in_offline()
+        self.log_offline()
+        self.connect = lambda: FlakyConnection(self.db.connect(), error, 'INSERT INTO recognition_logs')
+
+        # The check-in replayed before the failure is rolled back with the rest of the batch
+        self.assertEqual(self.journal.sync(), 0)
+        self.assertEqual(self.journal.pending(), 2)
+        self.assertEqual(self.journal.quarantined(), 0)
+        self.assertEqual(self.db.count('attendance_records'), 0)
+
+        self.connect = self.db.connect
+        self.assertEqual(self.journal.sync(), 2)
+        self.assertEqual(self.db.count('attendance_records'), 1)
+        self.assertEqual(self.db.count('recognition_logs'), 1)
+        self.assertEqual(self.journal.pending(), 0)
+
+    def test_deadlock_is_retried(self):
+        self.assert_retried(mysql.connector.errors.InternalError(msg='Deadlock found', errno=1213))
+
+    def test_lock_wait_timeout_is_retried(self):
+        self.assert_retried(mysql.connector.errors.DatabaseError(msg='Lock wait timeout exceeded', errno=1205))
+
+    def test_unmigrated_schema_keeps_events_queued(self):
+        self.assert_retried(
+            mysql.connector.errors.ProgrammingError(msg="Unknown column 'event_id'", errno=1054))
+
+    def test_connection_loss_is_retried(self):
+        self.assert_retried(mysql.connector.errors.OperationalError(msg='Lost connection', errno=2013))
+        self.assertTrue(self.journal.online)
+
+    def test_permanent_error_is_quarantined_not_synced(self):
+        self.check_in_offline()
+        self.log_offline()
+        error = mysql.connector.errors.IntegrityError(msg='Cannot add or update a child row', errno=1452)
+        self.connect = lambda: FlakyConnection(self.db.connect(), error, 'INSERT INTO attendance_records')
+
+        # The other event in the batch still syncs; the failing one is set aside, not marked synced
+        self.assertEqual(self.journal.sync(), 1)
+        self.assertEqual(self.journal.pending(), 0)
+        self.assertEqual(self.journal.quarantined(), 1)
+        self.assertEqual(self.db.count('attendance_records'), 0)
+        self.assertEqual(self.journal.stats()['failed'], 1)
+
+        self.connect = self.db.connect
+        self.assertEqual(self.journal.requeue_quarantined(), 1)
+        self.assertEqual(self.journal.sync(), 1)
+        self.assertEqual(self.journal.quarantined(), 0)
+        self.assertEqual(self.db.count('attendance_records'), 1)
+
+    def test_check_out_waits_for_quarantined_check_in(self):
+        self.check_in_offline()
+        self.journal.record_attendance(1, 'Ada', 0.91, 'check_out', FixedCalendar())
+        error = mysql.connector.errors.IntegrityError(msg='Cannot add or update a child row', errno=1452)
+        self.connect = lambda: FlakyConnection(self.db.connect(), error, 'INSERT INTO attendance_records')
+
+        self.assertEqual(self.journal.sync(), 0)
+        self.assertEqual(self.journal.quarantined(), 2)
+
+        self.connect = self.db.connect
+        self.journal.requeue_quarantined()
+        self.assertEqual(self.journal.sync(), 2)
+        rows = self.db.execute("SELECT check_out_time FROM attendance_records").fetchall()
+        self.assertIsNotNone(rows[0][0])
+
+    def test_local_transaction_rolls_back_on_error(self):
+        with self.journal._lock:
+            with self.assertRaises(RuntimeError):
+                with self.journal._transaction() as db:
+                    db.execute("INSERT INTO events (event_id, kind, payload, created_at) "
+                               "VALUES ('e1', 'check_in', '{}', '')")
+                    raise RuntimeError('boom')
+            self.assertFalse(self.journal._local().in_transaction)
+        self.assertEqual(self.journal.pending(), 0)
+
+        # The connection is usable for the next write
+        self.check_in_offline()
+        self.assertEqual(self.journal.pending(), 1)
+
+@unittest.skipUnless(app, 'backend dependencies not installed')
+class GroupFrameJournalTest(JournalTestCase):
+    def recognize_group(self, names):
+        faces = [{'bbox': [0, 0, 10, 10], 'embedding': [0.0]} for _ in names]
+        searches = [{'match': (person_id, name), 'similarity': 0.9, 'margin': 0.2, 'candidates': [],
+                     'shard': None, 'rejected': None}
+                    for person_id, name in enumerate(names, start=1)]
+        with mock.patch.object(app, 'get_db_connection', lambda: self.connect()), \
+                mock.patch.object(app, 'offline_journal', self.journal), \
+                mock.patch.object(app, 'attendance_calendar', FixedCalendar()), \
+                mock.patch.object(app.face_gallery, 'search_many', lambda embeddings, site=None: searches):
+            return app.recognize_group(faces, 'check_in')
+
+    def test_connection_loss_mid_frame_journals_every_face(self):
+        self.db.execute("INSERT INTO persons (id, employee_id, name, status) VALUES (2, 'EMP002', 'Bob', 'active')")
+        # Ada's check-in is written, then the connection drops on her recognition log
+        error = mysql.connector.errors.OperationalError(msg='Lost connection', errno=2013)
+        self.connect = lambda: FlakyConnection(self.db.connect(), error, 'INSERT INTO recognition_logs')
+
+        results = self.recognize_group(['Ada', 'Bob'])
+        self.assertEqual([r['person_name'] for r in results], ['Ada', 'Bob'])
+        self.assertTrue(all(r['success'] and r['offline'] for r in results))
+        self.assertEqual(self.journal.pending(), 4)
+        self.assertEqual(self.db.count('attendance_records'), 0)
+
+        self.connect = self.db.connect
+        self.assertEqual(self.journal.sync(), 4)
+        self.assertEqual(self.db.count('attendance_records'), 2)
+        self.assertEqual(self.db.count('recognition_logs'), 2)
+
+if __name__ == '__main__':
+    unittest.main()
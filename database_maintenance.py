@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+🧹 DATABASE MAINTENANCE SCRIPT
+Face Recognition Attendance System
+Retention and archival for recognition_logs and attendance_records
+
+Old rows are moved out of the hot tables into monthly archive tables
+(e.g. recognition_logs_archive_202501) in small id-range chunks, each in its
+own short transaction, and archive months past their retention are dropped
+whole. MySQL cannot partition tables that have foreign keys, so rolling
+archive tables are used instead of PARTITION BY RANGE.
+
+Usage:
+    python database_maintenance.py report
+    python database_maintenance.py archive --dry-run
+    python database_maintenance.py archive --table recognition_logs --chunk-size 5000 --pause 0.1
+"""
+
+import argparse
+import mysql.connector
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+# ===================================================================
+# DATABASE CONFIGURATION
+# ===================================================================
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '',  # Change if you have a password
+    'database': 'attendance_system',
+}
+
+# ===================================================================
+# RETENTION POLICIES
+# ===================================================================
+# hot_days:     rows older than this move to monthly archive tables
+# archive_days: archive months entirely older than this are dropped (None keeps them)
+# archive_days_setting: system_settings key that overrides archive_days when present
+RETENTION_POLICIES = {
+    'recognition_logs': {
+        'time_column': 'recognition_time',
+        'hot_days': 30,
+        'archive_days': 365,
+        'archive_days_setting': 'log_retention_days',
+    },
+    'attendance_records': {
+        'time_column': 'date',
+        'hot_days': 730,     # Reports and exports read the hot table; keep two years online
+        'archive_days': None,
+        'archive_days_setting': None,
+    },
+}
+
+MAINTENANCE_CONFIG = {
+    'chunk_size': 5000,   # Rows per id-range chunk (one transaction each)
+    'pause': 0.05,        # Seconds to sleep between chunks so kiosk writes are not starved
+}
+
+def month_start(day):
+    return day.replace(day=1)
+
+def next_month(day):
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+def archive_table_name(table, month):
+    return f"{table}_archive_{month.strftime('%Y%m')}"
+
+def load_archive_days(cursor, policy):
+    """archive_days from system_settings when the policy names a setting"""
+    key = policy['archive_days_setting']
+    if not key:
+        return policy['archive_days']
+    cursor.execute("SELECT setting_value FROM system_settings WHERE setting_key = %s", (key,))
+    row = cursor.fetchone()
+    try:
+        return int(row[0]) if row and row[0] is not None else policy['archive_days']
+    except ValueError:
+        return policy['archive_days']
+
+def list_archive_tables(cursor, table):
+    """Existing archive tables for table as {month: table_name}"""
+    cursor.execute("""
+        SELECT TABLE_NAME FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME LIKE %s
+    """, (f"{table}\\_archive\\_%",))
+    archives = {}
+    for (name,) in cursor.fetchall():
+        suffix = name.rsplit('_', 1)[-1]
+        if len(suffix) == 6 and suffix.isdigit():
+            archives[date(int(suffix[:4]), int(suffix[4:]), 1)] = name
+    return archives
+
+def table_columns(cursor, table):
+    """Columns of table in ordinal order as [(name, column_type)]"""
+    cursor.execute("""
+        SELECT COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+        ORDER BY ORDINAL_POSITION
+    """, (table,))
+    return cursor.fetchall()
+
+def sync_archive_columns(cursor, table, archive):
+    """Add columns the hot table gained since archive was created; returns the hot table's column names"""
+    archived = {name for name, _ in table_columns(cursor, archive)}
+    columns = table_columns(cursor, table)
+    for name, column_type in columns:
+        if name not in archived:
+            # Nullable in the archive: rows archived before the migration have no value
+            cursor.execute(f"ALTER TABLE {archive} ADD COLUMN {name} {column_type} NULL")
+            print(f"   ✓ {archive}: added column {name}")
+    return [name for name, _ in columns]
+
+def archive_month(conn, cursor, table, time_column, month, cutoff, chunk_size, pause):
+    """Move rows of one month older than cutoff into its archive table, chunk by chunk"""
+    start = datetime.combine(month, datetime.min.time())
+    end = min(datetime.combine(next_month(month), datetime.min.time()),
+              datetime.combine(cutoff, datetime.min.time()))
+
+    cursor.execute(f"SELECT MIN(id), MAX(id) FROM {table} WHERE {time_column} >= %s AND {time_column} < %s",
+                   (start, end))
+    low, high = cursor.fetchone()
+    if low is None:
+        return 0, 0
+
+    archive = archive_table_name(table, month)
+    # LIKE copies columns and indexes but not foreign keys, so archives never block deletes of persons
+    cursor.execute(f"CREATE TABLE IF NOT EXISTS {archive} LIKE {table}")
+    # Archives created before a migration lack its columns, and an ALTER appends them out of
+    # the hot table's order, so copy by name rather than SELECT * position
+    column_list = ', '.join(sync_archive_columns(cursor, table, archive))
+
+    moved = chunks = 0
+    while low <= high:
+        chunk_high = low + chunk_size - 1
+        predicate = f"id BETWEEN %s AND %s AND {time_column} >= %s AND {time_column} < %s"
+        params = (low, chunk_high, start, end)
+        # Plain INSERT: a conversion or duplicate-key error aborts (and rolls back) the chunk, and only
+        # rows present in the archive are deleted, so nothing leaves the hot table without a copy
+        cursor.execute(f"INSERT INTO {archive} ({column_list}) SELECT {column_list} FROM {table} WHERE {predicate}",
+                       params)
+        cursor.execute(f"DELETE t FROM {table} t JOIN {archive} a ON a.id = t.id "
+                       f"WHERE t.id BETWEEN %s AND %s AND t.{time_column} >= %s AND t.{time_column} < %s", params)
+        moved += cursor.rowcount
+        conn.commit()
+        chunks += 1
+        low = chunk_high + 1
+        if pause:
+            time.sleep(pause)
+    return moved, chunks
+
+def run_archive(tables, dry_run, chunk_size, pause):
+    """Apply retention policies: move old rows to archive months, drop expired archives"""
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    # Short chunk transactions without gap locks on the hot tables
+    cursor.execute("SET SESSION TRANSACTION ISOLATION LEVEL READ COMMITTED")
+    today = date.today()
+    ok = True
+
+    for table in tables:
+        policy = RETENTION_POLICIES[table]
+        time_column = policy['time_column']
+        cutoff = today - timedelta(days=policy['hot_days'])
+        archive_days = load_archive_days(cursor, policy)
+
+        print(f"\n📦 {table}: archiving rows with {time_column} before {cutoff}")
+        cursor.execute(f"SELECT MIN({time_column}) FROM {table}")
+        oldest = cursor.fetchone()[0]
+        if oldest is None or (oldest.date() if isinstance(oldest, datetime) else oldest) >= cutoff:
+            print("   ✅ Nothing to archive")
+        else:
+            oldest_day = oldest.date() if isinstance(oldest, datetime) else oldest
+            month = month_start(oldest_day)
+            started = time.perf_counter()
+            total_moved = total_chunks = 0
+            while month < cutoff:
+                if dry_run:
+                    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE {time_column} >= %s AND {time_column} < %s",
+                                   (month, min(next_month(month), cutoff)))
+                    count = cursor.fetchone()[0]
+                    if count:
+                        print(f"   • {archive_table_name(table, month)}: would move {count} rows")
+                    total_moved += count
+                else:
+                    try:
+                        moved, chunks = archive_month(conn, cursor, table, time_column, month, cutoff,
+                                                      chunk_size, pause)
+                    except mysql.connector.Error as e:
+                        conn.rollback()
+                        print(f"   ❌ {archive_table_name(table, month)}: {e}")
+                        ok = False
+                        break
+                    if moved:
+                        print(f"   ✓ {archive_table_name(table, month)}: moved {moved} rows in {chunks} chunks")
+                    total_moved += moved
+                    total_chunks += chunks
+                month = next_month(month)
+
+            elapsed = time.perf_counter() - started
+            if not dry_run:
+                rate = total_moved / elapsed if elapsed > 0 else 0.0
+                print(f"   ✅ Moved {total_moved} rows in {total_chunks} chunks, "
+                      f"{elapsed:.1f}s ({rate:,.0f} rows/sec)")
+            else:
+                print(f"   ✅ Would move {total_moved} rows")
+
+        if archive_days is not None:
+            expire_before = month_start(today - timedelta(days=archive_days))
+            for month, archive in sorted(list_archive_tables(cursor, table).items()):
+                # Drop only months that ended before the retention horizon
+                if next_month(month) <= expire_before:
+                    if dry_run:
+                        print(f"   • would drop {archive} (older than {archive_days} days)")
+                    else:
+                        cursor.execute(f"DROP TABLE {archive}")
+                        print(f"   🗑️  Dropped {archive} (older than {archive_days} days)")
+
+    cursor.close()
+    conn.close()
+    return ok
+
+def report_sizes():
+    """Print row counts and on-disk sizes of the hot and archive tables"""
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor(dictionary=True)
+    cursor.execute("""
+        SELECT TABLE_NAME AS name, TABLE_ROWS AS table_rows,
+               DATA_LENGTH AS data_bytes, INDEX_LENGTH AS index_bytes
+        FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_TYPE = 'BASE TABLE'
+        ORDER BY DATA_LENGTH + INDEX_LENGTH DESC
+    """)
+    tables = cursor.fetchall()
+    cursor.close()
+    conn.close()
+
+    print("\n📊 TABLE SIZES (row counts are InnoDB estimates)")
+    print(f"   {'table':<42} {'rows':>12} {'data MB':>10} {'index MB':>10}")
+    for t in tables:
+        print(f"   {t['name']:<42} {t['table_rows'] or 0:>12,} "
+              f"{(t['data_bytes'] or 0) / 1048576:>10.1f} {(t['index_bytes'] or 0) / 1048576:>10.1f}")
+    return True
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Retention and archival for the attendance database')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('report', help='Show table sizes')
+    archive = subparsers.add_parser('archive', help='Move old rows to monthly archive tables and drop expired ones')
+    archive.add_argument('--table', choices=sorted(RETENTION_POLICIES), action='append',
+                         help='Limit to a table (repeatable; default: all)')
+    archive.add_argument('--dry-run', action='store_true', help='Only report what would be moved or dropped')
+    archive.add_argument('--chunk-size', type=int, default=MAINTENANCE_CONFIG['chunk_size'])
+    archive.add_argument('--pause', type=float, default=MAINTENANCE_CONFIG['pause'])
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🧹 DATABASE MAINTENANCE - FACE RECOGNITION ATTENDANCE SYSTEM")
+    print("=" * 70)
+    print(f"🕐 Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    try:
+        if args.command == 'report':
+            return report_sizes()
+        tables = args.table or list(RETENTION_POLICIES)
+        ok = run_archive(tables, args.dry_run, args.chunk_size, args.pause)
+        report_sizes()
+        return ok
+    except mysql.connector.Error as e:
+        print(f"❌ MySQL Error: {e}")
+        return False
+
+if __name__ == "__main__":
+    success = main()
+    print(f"\n{'✅ Maintenance finished' if success else '💥 Maintenance failed'} at "
+          f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""
+🔧 DATABASE MIGRATION SCRIPT
+Face Recognition Attendance System
+Brings an existing attendance_system database up to the current schema
+
+FINAL_setup_database.sql drops and recreates the database, so existing
+installs run this script instead. Every step checks information_schema
+first, so running it again (or on a fresh install) changes nothing.
+
+Usage:
+    python migrate_database.py
+    python migrate_database.py --dry-run
+"""
+
+import argparse
+import mysql.connector
+import sys
+from datetime import datetime
+
+# ===================================================================
+# DATABASE CONFIGURATION
+# ===================================================================
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': '',  # Change if you have a password
+    'database': 'attendance_system',
+}
+
+# ===================================================================
+# SCHEMA ADDITIONS (keep in sync with FINAL_setup_database.sql)
+# ===================================================================
+TABLES = {
+    # Location-scoped face galleries (backend/gallery.py)
+    'person_sites': """
+        CREATE TABLE IF NOT EXISTS person_sites (
+            person_id INT NOT NULL,
+            site VARCHAR(100) NOT NULL,
+            assigned_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (person_id, site),
+            FOREIGN KEY (person_id) REFERENCES persons(id) ON DELETE CASCADE
+        )
+    """,
+    # Probe embeddings for evaluate_threshold.py
+    'recognition_embeddings': """
+        CREATE TABLE IF NOT EXISTS recognition_embeddings (
+            log_id INT PRIMARY KEY,
+            embedding_data LONGTEXT NOT NULL,
+            candidates TEXT,
+            margin FLOAT,
+            FOREIGN KEY (log_id) REFERENCES recognition_logs(id) ON DELETE CASCADE
+        )
+    """,
+}
+
+# (table, column, definition): offline journal event ids for idempotent replay
+COLUMNS = [
+    ('attendance_records', 'check_in_event_id', 'CHAR(32) AFTER notes'),
+    ('attendance_records', 'check_out_event_id', 'CHAR(32) AFTER check_in_event_id'),
+    ('recognition_logs', 'event_id', 'CHAR(32)'),
+]
+
+# (table, index, kind, columns)
+INDEXES = [
+    ('attendance_records', 'uq_attendance_check_in_event', 'UNIQUE KEY', 'check_in_event_id'),
+    ('attendance_records', 'uq_attendance_check_out_event', 'UNIQUE KEY', 'check_out_event_id'),
+    ('recognition_logs', 'uq_recognition_logs_event', 'UNIQUE KEY', 'event_id'),
+    ('person_sites', 'idx_person_sites_site', 'INDEX', 'site'),
+    ('persons', 'idx_persons_last_updated', 'INDEX', 'last_updated'),
+    ('persons', 'idx_persons_registration_date', 'INDEX', 'registration_date'),
+    ('face_encodings', 'idx_face_encodings_primary_person', 'INDEX', 'is_primary, person_id'),
+    ('attendance_records', 'idx_attendance_person_open',
+     'INDEX', 'person_id, date, check_out_time, check_in_time'),
+    ('attendance_records', 'idx_attendance_date_cover',
+     'INDEX', 'date, check_in_time, person_id, check_out_time, total_hours, overtime_hours, status'),
+]
+
+# (table, index, replacement): dropped only once the replacement index exists
+REPLACED_INDEXES = [
+    ('attendance_records', 'idx_attendance_person_date', 'idx_attendance_person_open'),
+    ('attendance_records', 'idx_attendance_date', 'idx_attendance_date_cover'),
+]
+
+SETTINGS = [
+    ('default_on_time_start', '08:00:00', 'string',
+     'Start of the on-time check-in window for persons without a work schedule'),
+    ('default_on_time_end', '09:30:00', 'string',
+     'End of the on-time check-in window for persons without a work schedule'),
+]
+
+def table_exists(cursor, table):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+    """, (table,))
+    return cursor.fetchone()[0] > 0
+
+def column_exists(cursor, table, column):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND COLUMN_NAME = %s
+    """, (table, column))
+    return cursor.fetchone()[0] > 0
+
+def index_exists(cursor, table, index):
+    cursor.execute("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+    """, (table, index))
+    return cursor.fetchone()[0] > 0
+
+def migrate(dry_run):
+    """Apply every missing schema addition; returns the number of changes"""
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    changes = []
+
+    def apply(description, statement, params=()):
+        changes.append(description)
+        if dry_run:
+            print(f"   • would {description}")
+            return
+        cursor.execute(statement, params)
+        print(f"   ✓ {description}")
+
+    print("\n📋 Tables")
+    for table, statement in TABLES.items():
+        if not table_exists(cursor, table):
+            apply(f"create table {table}", statement)
+
+    print("\n📋 Columns")
+    for table, column, definition in COLUMNS:
+        if not column_exists(cursor, table, column):
+            apply(f"add column {table}.{column}", f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+
+    print("\n📋 Indexes")
+    for table, index, kind, columns in INDEXES:
+        # In a dry run a table created above does not exist yet, and neither do its indexes
+        if not table_exists(cursor, table) or not index_exists(cursor, table, index):
+            apply(f"add {kind.lower()} {index} on {table}",
+                  f"ALTER TABLE {table} ADD {kind} {index} ({columns})")
+    for table, index, replacement in REPLACED_INDEXES:
+        if index_exists(cursor, table, index) and (dry_run or index_exists(cursor, table, replacement)):
+            apply(f"drop index {index} on {table} (replaced by {replacement})",
+                  f"ALTER TABLE {table} DROP INDEX {index}")
+
+    print("\n📋 Settings")
+    for key, value, setting_type, description in SETTINGS:
+        cursor.execute("SELECT COUNT(*) FROM system_settings WHERE setting_key = %s", (key,))
+        if cursor.fetchone()[0] == 0:
+            apply(f"add setting {key} = {value}",
+                  "INSERT INTO system_settings (setting_key, setting_value, setting_type, description) "
+                  "VALUES (%s, %s, %s, %s)", (key, value, setting_type, description))
+
+    if not dry_run:
+        conn.commit()
+    cursor.close()
+    conn.close()
+    return len(changes)
+
+def main():
+    """Main execution function"""
+    parser = argparse.ArgumentParser(description='Bring an existing attendance database up to the current schema')
+    parser.add_argument('--dry-run', action='store_true', help='Only report what would change')
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("🔧 DATABASE MIGRATION - FACE RECOGNITION ATTENDANCE SYSTEM")
+    print("=" * 70)
+    print(f"🕐 Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+    try:
+        changes = migrate(args.dry_run)
+    except mysql.connector.Error as e:
+        print(f"❌ MySQL Error: {e}")
+        return False
+
+    if not changes:
+        print("\n✅ Schema is up to date")
+    elif args.dry_run:
+        print(f"\n✅ {changes} changes pending")
+    else:
+        print(f"\n✅ Applied {changes} changes")
+    return True
+
+if __name__ == "__main__":
+    success = main()
+    print(f"\n{'✅ Migration finished' if success else '💥 Migration failed'} at "
+          f"{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    sys.exit(0 if success else 1)
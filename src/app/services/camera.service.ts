@@ -15,6 +15,28 @@ export interface FaceRecognitionResult {
   success?: boolean;
   total_hours?: number;
   status?: string;
+  margin?: number;
+  // Group mode: one result per recognized face in the frame
+  group?: boolean;
+  face_count?: number;
+  recorded_count?: number;
+  faces?: GroupFaceResult[];
+}
+
+export interface GroupFaceResult {
+  face_index: number;
+  bbox: number[];
+  recognized: boolean;
+  success: boolean;
+  person_id?: number;
+  person_name?: string;
+  similarity?: number;
+  margin?: number;
+  attendance_id?: number;
+  status?: string;
+  total_hours?: number;
+  message?: string;
+  error?: string;
 }
 
 @Injectable({
@@ -22,6 +44,11 @@ export interface FaceRecognitionResult {
 })
 export class CameraService {
   private apiUrl = 'http://localhost:5000/api';
+  private kioskId = this.getKioskId();
+  // Site this kiosk is installed at (set once per device); scopes face matching to that site
+  private kioskLocation = localStorage.getItem('attnd_kiosk_location') || undefined;
+  // Group kiosks (e.g. shift-change entrances) record everyone in the frame at once
+  private groupMode = localStorage.getItem('attnd_kiosk_group_mode') === 'true';
   private videoElement: HTMLVideoElement | null = null;
   private stream: MediaStream | null = null;
   private isProcessing = false;
@@ -115,10 +142,26 @@ export class CameraService {
   recognizeFace(imageData: string, mode: 'check_in' | 'check_out' = 'check_in'): Observable<FaceRecognitionResult> {
     return this.http.post<FaceRecognitionResult>(`${this.apiUrl}/face-recognition`, {
       image: imageData,
-      mode: mode
+      mode: mode,
+      kiosk_id: this.kioskId,
+      location: this.kioskLocation,
+      group: this.groupMode
     });
   }
 
+  /**
+   * Stable per-browser kiosk identifier (used by the backend for per-kiosk fairness)
+   */
+  private getKioskId(): string {
+    const storageKey = 'attnd_kiosk_id';
+    let kioskId = localStorage.getItem(storageKey);
+    if (!kioskId) {
+      kioskId = `kiosk-${Math.random().toString(36).slice(2, 10)}`;
+      localStorage.setItem(storageKey, kioskId);
+    }
+    return kioskId;
+  }
+
   /**
    * Start continuous face recognition scanning
    */
@@ -182,6 +225,18 @@ export class CameraService {
           }
         },
         error: (error) => {
+          if (error.status === 429) {
+            // Backend is shedding load: back off for the suggested time instead of retrying immediately
+            const retryAfterMs = (error.error?.retry_after ?? intervalMs / 1000) * 1000;
+            this.recognitionResultSubject.next({
+              recognized: false,
+              message: error.error?.message || 'Recognition is busy, retrying shortly',
+              error: 'busy'
+            });
+            setTimeout(() => this.scanForFaces(intervalMs, mode), Math.max(intervalMs, retryAfterMs));
+            return;
+          }
+
           console.error('Face recognition error:', error);
           this.recognitionResultSubject.next({
             recognized: false,